@@ -48,6 +48,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Answers /static/ from STATIC_ROOT before anything else runs
+    'budgetbee.staticfiles.StaticFilesMiddleware',
+    'finance.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,7 +64,7 @@ ROOT_URLCONF = 'budgetbee.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'finance.instrumentation.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR,"templates")],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -95,6 +98,55 @@ DATABASES = {
 }
 
 
+# Cache
+# Per-user financial snapshots live here. Local memory is per-process;
+# point this at a shared backend (e.g. Redis) when running several workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'budgetbee',
+    }
+}
+# 304 responses need every worker to see the same data versions, so they
+# are only sent with a shared cache backend; set True/False to override
+FINANCE_CONDITIONAL_GET = None
+FINANCE_SNAPSHOT_TIMEOUT = 60 * 60 * 24
+# Prerendered guest pages (see `manage.py prerender_guest_pages`)
+FINANCE_GUEST_PAGE_TIMEOUT = 60 * 60 * 24
+# Transactions per page of the home day-group feed
+FINANCE_FEED_PAGE_SIZE = 50
+# Serve the dashboard pages from finance.async_views (set by asgi.py)
+FINANCE_ASYNC_VIEWS = os.environ.get('FINANCE_ASYNC_VIEWS') == '1'
+# Currency of new accounts and of totals, unless the user picks another
+FINANCE_BASE_CURRENCY = 'INR'
+# Default file for `manage.py load_fx_rates` (date,base,currency,rate);
+# without it the command needs a path
+FINANCE_FX_RATES_FILE = os.environ.get('FINANCE_FX_RATES_FILE')
+
+
+# Request instrumentation (finance.middleware.RequestTimingMiddleware)
+# A warning is logged when a request goes over these; per-route overrides
+# are keyed by view name, e.g. {'finance:home': {'queries': 10, 'ms': 200}}
+REQUEST_QUERY_BUDGET = 25
+REQUEST_LATENCY_BUDGET_MS = 500
+REQUEST_ROUTE_BUDGETS = {}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'budgetbee.requests': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -134,7 +186,15 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS =[
     os.path.join(BASE_DIR, 'static')
 ]
-#STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# `collectstatic` writes name.<hash>.ext plus .gz/.br copies (brotli if
+# installed); budgetbee.staticfiles.StaticFilesMiddleware serves them
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'budgetbee.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+# Cache lifetime for static files without a hash in the name
+STATIC_MAX_AGE = 60
 
 # Media files (user uploads)
 MEDIA_URL = '/media/'
@@ -142,6 +202,8 @@ MEDIAFILES_DIRS =[
     os.path.join(BASE_DIR, 'media')
 ]
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Avatar uploads are resized to these square WebP sizes (userauths.avatars)
+AVATAR_SIZES = (64, 128, 256)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -0,0 +1,133 @@
+# budgetbee/staticfiles.py
+# Fingerprinted, precompressed static files served by the app itself:
+# collectstatic writes name.<hash>.ext plus .gz (and .br when the brotli
+# module is installed) copies; StaticFilesMiddleware picks the variant the
+# client accepts and marks fingerprinted files immutable.
+import gzip
+import mimetypes
+import os
+import posixpath
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (".css", ".js", ".mjs", ".map", ".svg", ".json", ".txt", ".html", ".xml", ".ico", ".ttf", ".otf")
+# Skip variants that don't save at least this share of the original
+MIN_SAVING = 0.05
+IMMUTABLE = "public, max-age=31536000, immutable"
+_HASHED = re.compile(r"\.[0-9a-f]{12}\.[^/.]+$")
+
+
+def _compress(data):
+    variants = {}
+    for suffix, packed in (
+        (".gz", gzip.compress(data, compresslevel=9, mtime=0)),
+        (".br", brotli.compress(data) if brotli else None),
+    ):
+        if packed is not None and len(packed) <= len(data) * (1 - MIN_SAVING):
+            variants[suffix] = packed
+    return variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also writes gzip / brotli copies of
+    every compressible file it collects, hashed or not.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not isinstance(processed, Exception):
+                names.update(n for n in (name, hashed_name) if n and n.endswith(COMPRESSIBLE))
+            yield name, hashed_name, processed
+        # After every pass, so CSS is compressed with its final url()s
+        if not dry_run:
+            for name in sorted(names):
+                self._write_compressed(name)
+
+    def _write_compressed(self, name):
+        with self.open(name) as fh:
+            data = fh.read()
+        for suffix, packed in _compress(data).items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(packed))
+
+    def stored_name(self, name):
+        # Without a collectstatic run (tests, fresh checkouts with DEBUG off)
+        # there is no manifest or file to hash; use the plain name
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+
+class StaticFilesMiddleware:
+    """
+    Serves STATIC_URL from STATIC_ROOT without a reverse proxy. Picks the
+    .br / .gz copy the client accepts (Vary: Accept-Encoding) and sends
+    fingerprinted names with a one-year immutable Cache-Control. Other
+    requests, and missing files, pass through.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith("/") else "/" + settings.STATIC_URL
+        self.root = settings.STATIC_ROOT
+        self.max_age = getattr(settings, "STATIC_MAX_AGE", 60)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        response = self.serve(request)
+        if iscoroutinefunction(self):
+            return self._acall(request, response)
+        return response if response is not None else self.get_response(request)
+
+    async def _acall(self, request, response):
+        return response if response is not None else await self.get_response(request)
+
+    def serve(self, request):
+        if not self.root or request.method not in ("GET", "HEAD") or not request.path.startswith(self.prefix):
+            return None
+        name = posixpath.normpath(request.path[len(self.prefix):]).lstrip("/")
+        try:
+            path = safe_join(self.root, name)
+        except ValueError:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime):
+            response = HttpResponseNotModified()
+        else:
+            content_type, _ = mimetypes.guess_type(name)
+            accepted = request.META.get("HTTP_ACCEPT_ENCODING", "")
+            served, encoding = path, None
+            for suffix, coding in ((".br", "br"), (".gz", "gzip")):
+                if coding in accepted and os.path.isfile(path + suffix):
+                    served, encoding = path + suffix, coding
+                    break
+            response = FileResponse(open(served, "rb"), content_type=content_type or "application/octet-stream")
+            if encoding:
+                response["Content-Encoding"] = encoding
+            response["Last-Modified"] = http_date(stat.st_mtime)
+        response["Vary"] = "Accept-Encoding"
+        response["Cache-Control"] = IMMUTABLE if _HASHED.search(name) else f"public, max-age={self.max_age}"
+        return response
@@ -1,8 +1,19 @@
 # finance/admin.py
 from django.contrib import admin
-from .models import Account
+from .models import Account, FxRate, RecurringTransaction
 
 # Admin display for accounts
 @admin.register(Account)
 class AccountAdmin(admin.ModelAdmin):
-    list_display = ('icon', 'name', 'balance')
+    list_display = ('icon', 'name', 'currency', 'balance')
+
+@admin.register(RecurringTransaction)
+class RecurringTransactionAdmin(admin.ModelAdmin):
+    list_display = ('account', 'type', 'amount', 'frequency', 'interval', 'next_date', 'active')
+    list_filter = ('frequency', 'active')
+
+@admin.register(FxRate)
+class FxRateAdmin(admin.ModelAdmin):
+    list_display = ('date', 'currency', 'base', 'rate')
+    list_filter = ('base', 'currency')
+    date_hierarchy = 'date'
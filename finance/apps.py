@@ -6,4 +6,5 @@ class FinanceConfig(AppConfig):
     name = 'finance'
 
     def ready(self):
+        import finance.checks  # Register system checks
         import finance.signals  # Load signals
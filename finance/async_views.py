@@ -0,0 +1,90 @@
+# finance/async_views.py
+# Async versions of the read-only dashboard views, served instead of the
+# sync ones when FINANCE_ASYNC_VIEWS is on (the default under ASGI).
+# Independent reads are awaited together with asyncio.gather. Django still
+# executes async ORM queries on the request's own DB thread, so they queue
+# there rather than run in parallel; the event loop stays free for other
+# requests meanwhile (compare with `manage.py load_test`).
+import asyncio
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+
+from .cache import conditional_on_data_version, guest_page_cache
+from .charts import cached_chart_data
+from .feed import aday_groups_page
+from .models import Account, Budget, Category
+from .rollups import acategory_totals, amonth_totals
+from .utils import aget_ledger_summary, get_user_or_guest, month_range
+from .views import _accounts_context, _budget_context, _chart_context, _home_context
+
+# Rendering runs the context processors, which may hit the database
+arender = sync_to_async(render)
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+@conditional_on_data_version
+@guest_page_cache
+async def home(request, year=None, month=None):
+    user = get_user_or_guest(await request.auser())
+    today = date.today()
+    year = int(year) if year else today.year
+    month = int(month) if month else today.month
+    month_start, _ = month_range(year, month)
+
+    if not user:
+        context = _home_context(None, year, month, [], None, {"income": 0, "expense": 0}, [])
+        return await arender(request, 'finance/home.html', context)
+
+    (days, next_cursor), totals, accounts_list = await asyncio.gather(
+        aday_groups_page(user, year, month),
+        amonth_totals(user, month_start),
+        _alist(Account.objects.filter(user=user)),
+    )
+    context = _home_context(user, year, month, days, next_cursor, totals, accounts_list)
+    return await arender(request, 'finance/home.html', context)
+
+
+@conditional_on_data_version
+@guest_page_cache
+async def accounts(request):
+    user = get_user_or_guest(await request.auser())
+    summary = await aget_ledger_summary(user) if user else None
+    return await arender(request, 'finance/accounts.html', _accounts_context(user, summary))
+
+
+@conditional_on_data_version
+@guest_page_cache
+async def chart(request, year=None, month=None):
+    user = get_user_or_guest(await request.auser())
+    today = date.today()
+    year = int(year) if year else today.year
+    month = int(month) if month else today.month
+    month_start, month_end = month_range(year, month)
+
+    data = await sync_to_async(cached_chart_data)(user, month_start, month_end, bucket="day") if user else None
+    return await arender(request, 'finance/chart.html', _chart_context(year, month, data))
+
+
+@login_required
+@conditional_on_data_version
+async def budget(request, year=None, month=None):
+    user = await request.auser()
+    today = date.today()
+    year = int(year) if year else today.year
+    month = int(month) if month else today.month
+
+    categories_qs, spent_map, budgets = await asyncio.gather(
+        _alist(Category.objects.filter(user=user, type="expense").order_by("name")),
+        acategory_totals(user, date(year, month, 1), tx_type="expense"),
+        _alist(Budget.objects.filter(user=user, month=month, year=year)),
+    )
+    budget_map = {b.category_id: b.amount for b in budgets}
+
+    context = _budget_context(year, month, categories_qs, spent_map, budget_map)
+    return await arender(request, "finance/budget.html", context)
@@ -0,0 +1,146 @@
+# finance/batch.py
+# Applies a list of create / update / delete operations to a user's ledger
+# in one DB transaction, touching each account and rollup row once
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Account, Category, Transaction
+from .rollups import month_start
+from .signals import LedgerDeltas, deferred_ledger_updates
+
+OPERATIONS = ("create", "update", "delete")
+FIELDS = ("amount", "type", "account", "category", "date", "note")
+MAX_OPERATIONS = 500
+
+
+class BatchError(ValueError):
+    """
+    An operation that can't be applied; nothing in the batch is written.
+    """
+    def __init__(self, index, message):
+        super().__init__(f"operation {index}: {message}")
+        self.index = index
+        self.message = message
+
+
+class BatchResult:
+    def __init__(self):
+        self.created = []
+        self.updated = []
+        self.deleted = []
+        self.accounts = set()
+        # (category_id, month) pairs whose spent amount may have changed
+        self.category_months = set()
+        # The user's categories by id, for building responses
+        self.categories = {}
+
+
+def _clean(field_name, value, index):
+    field = Transaction._meta.get_field(field_name)
+    try:
+        return field.clean(value, None)
+    except ValidationError as exc:
+        raise BatchError(index, f"{field_name}: {' '.join(exc.messages)}")
+
+
+def apply_batch(user, operations):
+    """
+    Validates every operation, then applies them all in one atomic block:
+    one bulk insert, one bulk update, one delete, and one balance / rollup
+    write per affected account and category-month. Raises BatchError before
+    writing anything if an operation is invalid.
+
+    Operations are dicts: {"op": "create", "amount", "type", "account",
+    "category", "date", "note"}, {"op": "update", "id", <any of those
+    fields>} or {"op": "delete", "id"}.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise BatchError(0, "expected a non-empty list of operations")
+    if len(operations) > MAX_OPERATIONS:
+        raise BatchError(MAX_OPERATIONS, f"at most {MAX_OPERATIONS} operations per batch")
+
+    accounts = {a.id: a for a in Account.objects.filter(user=user)}
+    categories = {c.id: c for c in Category.objects.filter(user=user)}
+    tx_ids = {_int_or_none(op.get("id")) for op in operations if isinstance(op, dict) and op.get("op") in ("update", "delete")}
+    existing = {tx.id: tx for tx in Transaction.objects.filter(account__user=user, id__in=tx_ids - {None})}
+
+    result = BatchResult()
+    result.categories = categories
+    ledger = LedgerDeltas(user.id)
+    to_create, to_update, to_delete = [], [], []
+    seen = set()
+
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict) or op.get("op") not in OPERATIONS:
+            raise BatchError(index, f"op must be one of {', '.join(OPERATIONS)}")
+
+        if op["op"] == "create":
+            tx = Transaction(user=user)
+            missing = [name for name in ("amount", "type", "account", "category", "date") if op.get(name) in (None, "")]
+            if missing:
+                raise BatchError(index, f"missing {', '.join(missing)}")
+        else:
+            tx = existing.get(_int_or_none(op.get("id")))
+            if tx is None:
+                raise BatchError(index, "transaction not found")
+            if tx.type in Transaction.TRANSFER_TYPES:
+                raise BatchError(index, "transfers can't be changed in a batch")
+            if tx.id in seen:
+                raise BatchError(index, "transaction appears more than once")
+            seen.add(tx.id)
+            ledger.add(tx, -1)
+            if tx.category_id:
+                result.category_months.add((tx.category_id, month_start(tx.date)))
+            if op["op"] == "delete":
+                to_delete.append(tx)
+                result.accounts.add(tx.account_id)
+                continue
+
+        for name in FIELDS:
+            if name not in op:
+                continue
+            if name == "account":
+                account = accounts.get(_int_or_none(op[name]))
+                if account is None:
+                    raise BatchError(index, "account not found")
+                tx.account = account
+            elif name == "category":
+                category = categories.get(_int_or_none(op[name]))
+                if category is None:
+                    raise BatchError(index, "category not found")
+                tx.category = category
+            else:
+                setattr(tx, name, _clean(name, op[name] if op[name] is not None else "", index))
+        if tx.type in Transaction.TRANSFER_TYPES:
+            raise BatchError(index, "type must be income or expense")
+        # Reuse the prefetched rows so building the response needs no lookups
+        if tx.account_id in accounts:
+            tx.account = accounts[tx.account_id]
+        if tx.category_id in categories:
+            tx.category = categories[tx.category_id]
+
+        ledger.add(tx, 1)
+        result.accounts.add(tx.account_id)
+        if tx.category_id:
+            result.category_months.add((tx.category_id, month_start(tx.date)))
+        (to_create if op["op"] == "create" else to_update).append(tx)
+
+    with transaction.atomic(), deferred_ledger_updates():
+        Transaction.objects.bulk_create(to_create)
+        if to_update:
+            Transaction.objects.bulk_update(to_update, ["amount", "type", "account", "category", "date", "note"])
+        if to_delete:
+            Transaction.objects.filter(id__in=[tx.id for tx in to_delete]).delete()
+        ledger.apply()
+
+    result.created = to_create
+    result.updated = to_update
+    result.deleted = [tx.id for tx in to_delete]
+    return result
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
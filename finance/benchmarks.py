@@ -0,0 +1,393 @@
+# finance/benchmarks.py
+# End-to-end view benchmarks: latency percentiles and SQL query counts
+import json
+import math
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http.cookiejar import CookieJar
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .cache import shared_cache
+from .models import Account, Category, Transaction
+
+AJAX = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+
+class Case:
+    """
+    One benchmarked request. `kwargs`, `data` and `setup` are callables that
+    take the shared context; `setup` runs outside the timed section. With a
+    `content_type`, `data` is sent as a JSON body.
+    """
+    def __init__(self, url_name, method="get", kwargs=None, data=None, setup=None, anonymous=False, ajax=False,
+                 content_type=None):
+        self.url_name = url_name
+        self.method = method
+        self.kwargs = kwargs or (lambda ctx: {})
+        self.data = data or (lambda ctx: {})
+        self.setup = setup
+        self.anonymous = anonymous
+        self.ajax = ajax
+        self.content_type = content_type
+
+
+def _tx_form(ctx):
+    return {
+        "amount": "12.50", "type": "expense", "account": ctx.account.id,
+        "category": ctx.category.id, "date": date.today().isoformat(), "note": "benchmark",
+    }
+
+
+def _new_transaction(ctx):
+    ctx.target = Transaction.objects.create(
+        user=ctx.user, account=ctx.account, category=ctx.category,
+        amount=Decimal("1.00"), type="expense", date=date.today(),
+    )
+
+
+def _batch_operations(ctx):
+    tx = _tx_form(ctx)
+    return {"operations": [
+        {"op": "create", **tx},
+        {"op": "create", **tx, "amount": "7.25"},
+        {"op": "update", "id": ctx.tx.id, "note": "benchmark batch"},
+        {"op": "delete", "id": ctx.target.id},
+    ]}
+
+
+def _new_account(ctx):
+    ctx.counter += 1
+    ctx.target = Account.objects.create(user=ctx.user, name=f"Bench delete {ctx.counter}")
+
+
+def _new_category(ctx):
+    ctx.counter += 1
+    ctx.target = Category.objects.create(user=ctx.user, name=f"Bench delete {ctx.counter}", type="expense")
+
+
+def _unique_name(prefix):
+    def data(ctx):
+        ctx.counter += 1
+        return {"name": f"{prefix} {ctx.counter}", "icon": "💰", "initial_amount": "10", "type": "expense", "color": "#FFA500"}
+    return data
+
+
+def _login_other_client(ctx):
+    ctx.logout_client.force_login(ctx.user)
+
+
+YM = lambda ctx: {"year": ctx.year, "month": ctx.month}
+
+CASES = [
+    # finance
+    Case("finance:home"),
+    Case("finance:home", anonymous=True),
+    Case("finance:home_month", kwargs=YM),
+    Case("finance:home_days", kwargs=YM),
+    Case("finance:add_transaction"),
+    Case("finance:add_transaction", "post", data=_tx_form, ajax=True),
+    Case("finance:edit_transaction", "post", kwargs=lambda ctx: {"transaction_id": ctx.tx.id}, data=_tx_form, ajax=True),
+    Case("finance:delete_transaction", "post", kwargs=lambda ctx: {"transaction_id": ctx.target.id},
+         setup=_new_transaction, ajax=True),
+    Case("finance:add_transfer", "post", ajax=True,
+         data=lambda ctx: {"from_account": ctx.account.id, "to_account": ctx.target.id, "amount": "5.00"},
+         setup=_new_account),
+    Case("finance:batch_transactions", "post", data=_batch_operations, setup=_new_transaction, ajax=True,
+         content_type="application/json"),
+    Case("finance:import_transactions", "post", ajax=True, data=lambda ctx: {"file": SimpleUploadedFile(
+        "bench.csv", f"date,amount,account,category\n{date.today()},-3.50,{ctx.account.name},{ctx.category.name}\n".encode()
+    )}),
+    Case("finance:search_transactions", data=lambda ctx: {"q": "bench", "min_amount": "1"}),
+    Case("finance:export_ledger", kwargs=lambda ctx: {"kind": "transactions", "fmt": "csv"},
+         data=lambda ctx: {"start": date(ctx.year, ctx.month, 1).isoformat()}),
+    Case("finance:accounts"),
+    Case("finance:accounts", anonymous=True),
+    Case("finance:add_account", "post", data=_unique_name("Bench account"), ajax=True),
+    Case("finance:edit_account", "post", kwargs=lambda ctx: {"account_id": ctx.account.id},
+         data=lambda ctx: {"name": ctx.account.name, "icon": ctx.account.icon, "initial_amount": str(ctx.account.initial_amount)},
+         ajax=True),
+    Case("finance:delete_account", "post", kwargs=lambda ctx: {"account_id": ctx.target.id}, setup=_new_account, ajax=True),
+    Case("finance:category"),
+    Case("finance:category", anonymous=True),
+    Case("finance:add_category", "post", data=_unique_name("Bench category"), ajax=True),
+    Case("finance:edit_category", "post", kwargs=lambda ctx: {"category_id": ctx.category.id},
+         data=lambda ctx: {"name": ctx.category.name, "icon": ctx.category.icon, "type": "expense", "color": ctx.category.color},
+         ajax=True),
+    Case("finance:delete_category", "post", kwargs=lambda ctx: {"category_id": ctx.target.id}, setup=_new_category, ajax=True),
+    Case("finance:chart"),
+    Case("finance:chart", anonymous=True),
+    Case("finance:chart_month", kwargs=YM),
+    Case("finance:chart_data", data=lambda ctx: {"period": "last12", "year": ctx.year, "month": ctx.month}),
+    Case("finance:settings"),
+    Case("finance:budget_default"),
+    Case("finance:budget", kwargs=YM),
+    Case("finance:budget_year", kwargs=lambda ctx: {"year": ctx.year}),
+    Case("finance:budget_year_data", kwargs=lambda ctx: {"year": ctx.year}),
+    Case("finance:save_budget", "post", ajax=True,
+         data=lambda ctx: {"category": ctx.category.id, "amount": "5000", "month": ctx.month, "year": ctx.year}),
+    Case("finance:get_budget_spent", "post", ajax=True,
+         data=lambda ctx: {"category": ctx.category.id, "month": ctx.month, "year": ctx.year}),
+    # userauths
+    Case("userauths:signup", anonymous=True),
+    Case("userauths:login", anonymous=True),
+    Case("userauths:logout", setup=_login_other_client),
+    Case("userauths:profile"),
+    Case("userauths:change_password"),
+    Case("userauths:password_reset", anonymous=True),
+    Case("userauths:password_reset_done", anonymous=True),
+    Case("userauths:password_reset_confirm", anonymous=True, kwargs=lambda ctx: {
+        "uidb64": urlsafe_base64_encode(force_bytes(ctx.user.pk)),
+        "token": default_token_generator.make_token(ctx.user),
+    }),
+    Case("userauths:password_reset_complete", anonymous=True),
+]
+
+
+def url_names(namespaces=("finance", "userauths")):
+    """
+    Every named route in the given namespaces, as 'namespace:name'.
+    """
+    names = set()
+    resolver = get_resolver()
+    for namespace in namespaces:
+        _, sub_resolver = resolver.namespace_dict[namespace]
+        names.update(
+            f"{namespace}:{name}" for name in sub_resolver.reverse_dict if isinstance(name, str)
+        )
+    return names
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def _summarise(timings, queries, status):
+    timings = sorted(timings)
+    return {
+        "status": status,
+        "runs": len(timings),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p90_ms": round(percentile(timings, 90), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "mean_ms": round(sum(timings) / len(timings), 3) if timings else 0.0,
+        "max_ms": round(timings[-1], 3) if timings else 0.0,
+        "queries_min": min(queries) if queries else 0,
+        "queries_max": max(queries) if queries else 0,
+        "queries_mean": round(sum(queries) / len(queries), 2) if queries else 0,
+    }
+
+
+def _case_label(case):
+    return case.url_name + (" (guest)" if case.anonymous else "") + (f" [{case.method.upper()}]" if case.method != "get" else "")
+
+
+def run_benchmarks(user, iterations=20, warmup=2, only=None):
+    """
+    Runs every case against `user`'s data with the test client and returns a
+    JSON-serialisable dict. All writes are rolled back afterwards, and a
+    private local-memory cache keeps benchmark entries out of the real one.
+    """
+    today = date.today()
+    results = {}
+    with override_settings(
+        ALLOWED_HOSTS=["testserver"],
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchmarks"}},
+        # ETags as the real cache would have them
+        FINANCE_CONDITIONAL_GET=shared_cache(),
+    ), transaction.atomic():
+        ctx = SimpleNamespace(
+            user=user, year=today.year, month=today.month, counter=0, target=None,
+            account=Account.objects.filter(user=user).order_by("id").first(),
+            category=Category.objects.filter(user=user, type="expense").order_by("id").first(),
+            logout_client=Client(raise_request_exception=False),
+        )
+        ctx.tx = Transaction.objects.filter(account__user=user).order_by("-id").first()
+        if ctx.tx is None:
+            _new_transaction(ctx)
+            ctx.tx = ctx.target
+
+        user_client = Client(raise_request_exception=False)
+        user_client.force_login(user)
+        guest_client = Client(raise_request_exception=False)
+
+        for case in CASES:
+            label = _case_label(case)
+            if only and not any(o in label for o in only):
+                continue
+            client = guest_client if case.anonymous else user_client
+            if case.url_name == "userauths:logout":
+                client = ctx.logout_client
+
+            timings, queries, status = [], [], None
+            for run in range(warmup + iterations):
+                if case.setup:
+                    case.setup(ctx)
+                path = reverse(case.url_name, kwargs=case.kwargs(ctx))
+                data = case.data(ctx)
+                extra = dict(AJAX) if case.ajax else {}
+                if case.content_type:
+                    data = json.dumps(data)
+                    extra["content_type"] = case.content_type
+                # The whole run is one transaction; keep the query log under its cap
+                connection.queries_log.clear()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = getattr(client, case.method)(path, data, **extra)
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                    elapsed = (time.perf_counter() - started) * 1000
+                status = response.status_code
+                if run >= warmup:
+                    timings.append(elapsed)
+                    queries.append(len(captured))
+            results[label] = _summarise(timings, queries, status)
+
+        transaction.set_rollback(True)
+
+    covered = {case.url_name for case in CASES}
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "database": connection.vendor,
+            "user": user.username,
+            "transactions": Transaction.objects.filter(account__user=user).count(),
+            "iterations": iterations,
+            "warmup": warmup,
+        },
+        "results": results,
+        "missing": sorted(url_names() - covered),
+    }
+
+
+def run_signup_benchmark(signups=50, warmup=2):
+    """
+    Registers `signups` users through the signup view, each from a fresh
+    client, and returns latency percentiles, queries per signup (user,
+    customer and default categories/accounts) and signups per second.
+    Everything is rolled back.
+    """
+    prefix = f"bench_signup_{int(time.time())}"
+    timings, queries, status = [], [], None
+    with override_settings(
+        ALLOWED_HOSTS=["testserver"],
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchmarks"}},
+    ), transaction.atomic():
+        path = reverse("userauths:signup")
+        for run in range(warmup + signups):
+            username = f"{prefix}_{run}"
+            data = {
+                "first_name": "Bench", "last_name": "Signup", "username": username,
+                "email": f"{username}@example.com", "gender": "other",
+                "password1": "benchpass123!", "password2": "benchpass123!",
+            }
+            client = Client(raise_request_exception=False)
+            # The whole run is one transaction; keep the query log under its cap
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.post(path, data)
+                elapsed = (time.perf_counter() - started) * 1000
+            status = response.status_code
+            if run >= warmup:
+                timings.append(elapsed)
+                queries.append(len(captured))
+        transaction.set_rollback(True)
+
+    summary = _summarise(timings, queries, status)
+    summary["signups_per_s"] = round(1000 / summary["mean_ms"], 1) if summary["mean_ms"] else 0.0
+    return summary
+
+
+def compare(baseline, current):
+    """
+    Yields (label, baseline row, current row) for cases present in both runs.
+    """
+    for label, row in current["results"].items():
+        if label in baseline.get("results", {}):
+            yield label, baseline["results"][label], row
+
+
+LOAD_PATHS = ("/", "/accounts/", "/chart/", "/budget/")
+
+
+def _login_opener(base_url, email, password):
+    """
+    A urllib opener holding a logged-in session for a running server.
+    """
+    jar = CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    login_url = base_url.rstrip("/") + "/user/login/"
+    opener.open(login_url).read()
+    csrf = next((c.value for c in jar if c.name == "csrftoken"), "")
+    body = urllib.parse.urlencode({"email": email, "password": password, "csrfmiddlewaretoken": csrf}).encode()
+    request = urllib.request.Request(login_url, data=body, headers={"Referer": login_url})
+    opener.open(request).read()
+    if not any(c.name == "sessionid" for c in jar):
+        raise ValueError(f"could not log in to {base_url} as {email}")
+    return opener
+
+
+def run_load(base_url, email, password, paths=LOAD_PATHS, concurrency=20, requests=400):
+    """
+    Hits a running deployment (runserver/gunicorn for WSGI, uvicorn/daphne
+    for ASGI) with `concurrency` logged-in clients, spreading `requests` GETs
+    over `paths` round-robin, and returns latency percentiles per path and
+    overall. Unlike run_benchmarks this measures the server under
+    concurrent load, which is where WSGI and ASGI differ in tail latency.
+    """
+    openers = [_login_opener(base_url, email, password) for _ in range(concurrency)]
+    timings = {path: [] for path in paths}
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker(index):
+        opener = openers[index % concurrency]
+        path = paths[index % len(paths)]
+        started = time.perf_counter()
+        try:
+            with opener.open(base_url.rstrip("/") + path) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            timings[path].append(elapsed)
+            statuses[path] = status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(requests)))
+    wall = time.perf_counter() - started
+
+    results = {path: _summarise(timings[path], [], statuses.get(path)) for path in paths}
+    results["all"] = _summarise([t for path in paths for t in timings[path]], [], None)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "base_url": base_url,
+            "concurrency": concurrency,
+            "requests": requests,
+            "throughput_rps": round(requests / wall, 1) if wall else 0.0,
+        },
+        "results": results,
+    }
@@ -0,0 +1,99 @@
+# finance/budgets.py
+# Category x month budget matrix for a whole year
+import hashlib
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+
+from .cache import get_data_versions, month_scope
+from .fx import base_currency, get_fx_version, in_base
+from .models import Budget, Category, MonthlyRollup
+
+MATRIX_TIMEOUT = getattr(settings, "FINANCE_REPORT_TIMEOUT", 60 * 60 * 24)
+
+
+def _cell(spent, budget):
+    percent = (spent / budget * 100) if budget > 0 else 0
+    return {
+        "spent": float(spent),
+        "budget": float(budget),
+        "percent": int(min(percent, 100)),
+        "exceeded": budget > 0 and spent >= budget,
+    }
+
+
+def budget_matrix(user, year):
+    """
+    Budget, spent, percent and exceeded for every expense category and
+    month of `year`, spent in the user's base currency. Three queries: categories, spent grouped by category
+    and month (from the monthly rollups) and the year's budgets.
+
+    Returns {'year', 'months': [1..12], 'categories': [{'id', 'name',
+    'icon', 'months': [cell x 12], 'total': cell}], 'totals': [cell x 12],
+    'total': cell}; cells are JSON-ready.
+    """
+    categories = list(Category.objects.filter(user=user, type="expense").order_by("name").values("id", "name", "icon"))
+
+    spent = {}
+    rows = (
+        MonthlyRollup.objects
+        .filter(user=user, type="expense", month__range=(date(year, 1, 1), date(year, 12, 1)))
+        .values("category_id", "month")
+        .annotate(total=Sum(in_base("total", base_currency(user))))
+    )
+    for row in rows:
+        spent[(row["category_id"], row["month"].month)] = row["total"] or Decimal("0")
+
+    budgets = {
+        (row["category_id"], row["month"]): row["amount"]
+        for row in Budget.objects.filter(user=user, year=year).values("category_id", "month", "amount")
+    }
+
+    zero = Decimal("0")
+    month_spent = [zero] * 12
+    month_budget = [zero] * 12
+    matrix = []
+    for category in categories:
+        cells = []
+        for index, month in enumerate(range(1, 13)):
+            s = spent.get((category["id"], month), zero)
+            b = budgets.get((category["id"], month), zero)
+            month_spent[index] += s
+            month_budget[index] += b
+            cells.append({"month": month, **_cell(s, b)})
+        matrix.append({
+            **category,
+            "months": cells,
+            "total": _cell(
+                sum((spent.get((category["id"], m), zero) for m in range(1, 13)), zero),
+                sum((budgets.get((category["id"], m), zero) for m in range(1, 13)), zero),
+            ),
+        })
+
+    return {
+        "year": year,
+        "months": list(range(1, 13)),
+        "categories": matrix,
+        "totals": [{"month": m + 1, **_cell(month_spent[m], month_budget[m])} for m in range(12)],
+        "total": _cell(sum(month_spent, zero), sum(month_budget, zero)),
+    }
+
+
+def cached_budget_matrix(user, year):
+    """
+    budget_matrix cached per user and year. The key includes the category,
+    account, budget and month versions, so only writes that touch the year
+    rebuild it (deleting an account drops its transactions in every month),
+    plus the base currency and FX rates version.
+    """
+    scopes = ["categories", "accounts", "budgets"] + [month_scope(date(year, m, 1)) for m in range(1, 13)]
+    digest = hashlib.md5(repr((get_data_versions(user.pk, scopes), get_fx_version())).encode()).hexdigest()
+    key = f"finance:budget-matrix:{user.pk}:{year}:{base_currency(user)}:{digest}"
+    data = cache.get(key)
+    if data is None:
+        data = budget_matrix(user, year)
+        cache.set(key, data, MATRIX_TIMEOUT)
+    return data
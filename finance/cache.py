@@ -0,0 +1,295 @@
+# finance/cache.py
+# Per-user data versions and cached financial snapshots
+import functools
+import hashlib
+import re
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .fx import base_currency, get_fx_version, in_base, rate_expression
+from .models import Account, MonthlyRollup, Transaction
+
+SNAPSHOT_TIMEOUT = getattr(settings, "FINANCE_SNAPSHOT_TIMEOUT", 60 * 60 * 24)
+# Backends whose entries live in one process: each worker has its own
+# data versions, so a write handled by one isn't seen by the others
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+GUEST_PAGE_TIMEOUT = getattr(settings, "FINANCE_GUEST_PAGE_TIMEOUT", 60 * 60 * 24)
+
+
+# ---------------------------
+# DATA VERSION
+# ---------------------------
+def _version_key(user_id, scope=None):
+    key = f"finance:data-version:{user_id}"
+    return f"{key}:{scope}" if scope else key
+
+
+def month_scope(day):
+    """
+    Version scope for one month of a user's ledger.
+    """
+    return f"month:{day:%Y-%m}"
+
+
+def get_data_version(user_id, scope=None):
+    """
+    Returns the user's current data version (or the version of one scope,
+    e.g. a month). Anything cached under an older version is stale. Starts
+    from a timestamp so an evicted counter never comes back as a version
+    that was already used.
+    """
+    key = _version_key(user_id, scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_data_versions(user_id, scopes):
+    """
+    Versions for several scopes in one cache round trip.
+    Returns a list in the order of `scopes`.
+    """
+    keys = [_version_key(user_id, scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump_data_version(user_id, scopes=()):
+    """
+    Invalidates everything cached for the user, plus anything cached
+    against the given scopes, once the current DB transaction commits.
+    """
+    if not user_id:
+        return
+    scopes = tuple(scopes)
+
+    def bump():
+        for scope in (None, *scopes):
+            key = _version_key(user_id, scope)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, time.time_ns(), None)
+
+    transaction.on_commit(bump)
+
+
+# ---------------------------
+# CONDITIONAL GET
+# ---------------------------
+def shared_cache():
+    """
+    Whether every worker reads the same cache, and so the same data
+    versions. FINANCE_CONDITIONAL_GET overrides the guess from CACHES.
+    """
+    enabled = getattr(settings, "FINANCE_CONDITIONAL_GET", None)
+    if enabled is None:
+        return settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES
+    return enabled
+
+
+def data_etag(request, *args, **kwargs):
+    """
+    ETag for a logged-in user's page or JSON response: the user's data
+    version plus the full path, so it changes whenever anything the page
+    shows does. Only reads the cache, so a 304 runs no ledger queries.
+    None (no ETag) for guests and when flash messages are waiting, since a
+    304 would hide them, and without a shared cache, where another worker
+    may not have seen the latest write.
+    """
+    user = request.user
+    if not shared_cache() or not user.is_authenticated or len(messages.get_messages(request)):
+        return None
+    # Pages embed the CSRF token; get_token() makes sure there is a secret
+    # (set as the cookie on this response) so the first ETag stays valid
+    get_token(request)
+    raw = ":".join([
+        str(user.pk),
+        str(get_data_version(user.pk)),
+        str(get_fx_version()),
+        request.get_full_path(),
+        # Undated URLs ("/", "/chart/") show the current month
+        date.today().isoformat(),
+        request.META["CSRF_COOKIE"],
+    ])
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def conditional_on_data_version(view):
+    """
+    Answers If-None-Match with a 304 while the user's data is unchanged.
+    Responses are private and always revalidated. Works on sync and async views.
+    """
+    conditional = condition(etag_func=data_etag)(view)
+    if iscoroutinefunction(view):
+        check = conditional
+
+        @functools.wraps(view)
+        async def conditional(request, *args, **kwargs):
+            # data_etag is sync; load the user (and session) before it runs
+            request.user = await request.auser()
+            return await check(request, *args, **kwargs)
+
+    return cache_control(private=True, no_cache=True)(conditional)
+
+
+# ---------------------------
+# GUEST PAGES
+# ---------------------------
+# Guest pages are built from finance/constants.py only, so editing it
+# (and deploying) moves every guest page to a new key
+CONSTANTS_DIGEST = hashlib.md5(Path(__file__).with_name("constants.py").read_bytes()).hexdigest()[:12]
+
+_CSRF_VALUE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+_CSRF_PLACEHOLDER = b"__budgetbee_csrf_token__"
+
+
+def guest_page_key(full_path):
+    # Undated URLs ("/", "/chart/") show the current month
+    digest = hashlib.md5(full_path.encode()).hexdigest()
+    return f"finance:guest-page:{CONSTANTS_DIGEST}:{date.today().isoformat()}:{digest}"
+
+
+def _is_guest_page_request(request):
+    # Flash messages are per visitor; render those pages normally
+    return (
+        request.method in ("GET", "HEAD")
+        and not request.user.is_authenticated
+        and not len(messages.get_messages(request))
+    )
+
+
+def _guest_page_entry(response):
+    """
+    What is cached for a rendered guest page, with the visitor's CSRF token
+    swapped for a placeholder. None if the response shouldn't be shared.
+    """
+    if response.status_code != 200 or response.streaming:
+        return None
+    content = _CSRF_VALUE.sub(rb"\g<1>" + _CSRF_PLACEHOLDER + rb"\g<2>", response.content)
+    return response["Content-Type"], content
+
+
+def _guest_page_response(request, entry):
+    content_type, content = entry
+    if _CSRF_PLACEHOLDER in content:
+        content = content.replace(_CSRF_PLACEHOLDER, get_token(request).encode())
+    return HttpResponse(content, content_type=content_type)
+
+
+def guest_page_cache(view):
+    """
+    Serves guests a prerendered copy of the page, keyed by path and query,
+    so a hit renders no template and runs no queries. Logged-in users and
+    guests with flash messages get the view as usual. Each response gets
+    the visitor's own CSRF token. Works on sync and async views.
+    """
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def cached(request, *args, **kwargs):
+            request.user = await request.auser()
+            if not _is_guest_page_request(request):
+                return await view(request, *args, **kwargs)
+            key = guest_page_key(request.get_full_path())
+            entry = await cache.aget(key)
+            if entry is not None:
+                return _guest_page_response(request, entry)
+            response = await view(request, *args, **kwargs)
+            entry = _guest_page_entry(response)
+            if entry is not None:
+                await cache.aset(key, entry, GUEST_PAGE_TIMEOUT)
+            return response
+        return cached
+
+    @functools.wraps(view)
+    def cached(request, *args, **kwargs):
+        if not _is_guest_page_request(request):
+            return view(request, *args, **kwargs)
+        key = guest_page_key(request.get_full_path())
+        entry = cache.get(key)
+        if entry is not None:
+            return _guest_page_response(request, entry)
+        response = view(request, *args, **kwargs)
+        entry = _guest_page_entry(response)
+        if entry is not None:
+            cache.set(key, entry, GUEST_PAGE_TIMEOUT)
+        return response
+    return cached
+
+
+# ---------------------------
+# FINANCIAL SNAPSHOT
+# ---------------------------
+def build_financial_snapshot(user):
+    """
+    Accounts (in their own currency), totals in the user's base currency
+    and progress % for the sidebar. Two queries.
+    """
+    base = base_currency(user)
+    accounts = [
+        {"id": a["id"], "name": a["name"], "icon": a["icon"], "currency": a["currency"],
+         "balance": a["balance"], "balance_base": a["balance_base"]}
+        for a in Account.objects.filter(user=user).annotate(
+            balance_base=ExpressionWrapper(F("balance") * rate_expression(base, currency="currency", on=date.today()),
+                                           output_field=DecimalField(max_digits=20, decimal_places=2)),
+        ).values("id", "name", "icon", "currency", "balance", "balance_base")
+    ]
+
+    totals = {"income": Decimal("0"), "expense": Decimal("0")}
+    rollups = MonthlyRollup.objects.filter(user=user).exclude(type__in=Transaction.TRANSFER_TYPES)
+    for row in rollups.values("type").annotate(total=Sum(in_base("total", base))):
+        totals[row["type"]] = row["total"] or Decimal("0")
+    total_income, total_expense = totals["income"], totals["expense"]
+
+    total = total_income + total_expense
+    if total > 0:
+        earning_percent = (total_income / total) * 100
+        spent_percent = (total_expense / total) * 100
+    else:
+        earning_percent = spent_percent = 0
+
+    return {
+        "user_accounts": accounts,
+        "base_currency": base,
+        # Accounts in a currency with no rates loaded are left out
+        "total_balance": sum((a["balance_base"] for a in accounts if a["balance_base"] is not None), Decimal("0")),
+        "total_income": total_income,
+        "total_expense": total_expense,
+        "earning_percent": round(earning_percent),
+        "spent_percent": round(spent_percent),
+    }
+
+
+def get_financial_snapshot(user):
+    """
+    Cached build_financial_snapshot, keyed by the user's data version and
+    the FX rates version.
+    """
+    key = f"finance:snapshot:{user.pk}:{get_data_version(user.pk)}:{get_fx_version()}"
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_financial_snapshot(user)
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
@@ -0,0 +1,170 @@
+# finance/charts.py
+# Chart series computed in the database (grouped by category and time bucket)
+import hashlib
+import json
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Min, Sum
+from django.db.models.functions import TruncDay, TruncMonth
+
+from .cache import get_data_versions, month_scope
+from .fx import base_currency, get_fx_version, in_base
+from .models import Category, MonthlyRollup, Transaction
+from .utils import month_range
+
+REPORT_TIMEOUT = getattr(settings, "FINANCE_REPORT_TIMEOUT", 60 * 60 * 24)
+
+PERIODS = ("month", "quarter", "year", "last12")
+BUCKETS = {"day": TruncDay, "month": TruncMonth}
+
+
+def add_months(year, month, delta):
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def period_range(period, year, month):
+    """
+    Returns (start, end) dates for a named window anchored on year/month:
+    the month itself, its quarter, its calendar year, or the 12 months
+    ending with it.
+    """
+    if period == "quarter":
+        first = (month - 1) // 3 * 3 + 1
+        return month_range(year, first)[0], month_range(year, first + 2)[1]
+    if period == "year":
+        return date(year, 1, 1), date(year, 12, 31)
+    if period == "last12":
+        start_year, start_month = add_months(year, month, -11)
+        return month_range(start_year, start_month)[0], month_range(year, month)[1]
+    return month_range(year, month)
+
+
+def _whole_months(start, end):
+    return start.day == 1 and end == month_range(end.year, end.month)[1]
+
+
+def chart_data(user, start, end, bucket="day"):
+    """
+    Per-category income/expense totals and a per-bucket time series for
+    start..end, all grouped in the database and in the user's base currency.
+    Whole-month windows are read from the monthly rollups (converted at each
+    month's rate); anything else from raw transactions (at each day's rate).
+    """
+    base = base_currency(user)
+    names = {}
+    category_colors = {}
+    for c in Category.objects.filter(user=user).values("id", "name", "color"):
+        names[c["id"]] = c["name"]
+        category_colors[c["name"]] = c["color"]
+
+    if _whole_months(start, end):
+        source = MonthlyRollup.objects.filter(user=user, month__range=(start, end))
+        amount = in_base("total", base)
+    else:
+        source = Transaction.objects.filter(account__user=user, date__range=(start, end))
+        amount = in_base("amount", base, on="date")
+    # Transfers only move money between the user's own accounts
+    source = source.exclude(type__in=Transaction.TRANSFER_TYPES)
+    from_rollups = source.model is MonthlyRollup
+
+    breakdown = {"income": {}, "expense": {}}
+    for row in source.values("type", "category_id").annotate(total=Sum(amount)).order_by():
+        name = names.get(row["category_id"], "Uncategorized")
+        target = breakdown[row["type"]]
+        target[name] = target.get(name, 0.0) + float(row["total"] or 0)
+
+    if bucket == "month" and from_rollups:
+        series_qs = source.annotate(bucket=F("month"))
+    else:
+        series_qs = Transaction.objects.filter(account__user=user, date__range=(start, end)).exclude(
+            type__in=Transaction.TRANSFER_TYPES
+        ).annotate(bucket=BUCKETS[bucket]("date"))
+        amount = in_base("amount", base, on="date")
+    points = {}
+    for row in series_qs.values("bucket", "type").annotate(total=Sum(amount)).order_by("bucket"):
+        label = row["bucket"].strftime("%Y-%m-%d" if bucket == "day" else "%Y-%m")
+        point = points.setdefault(label, {"date": label, "income": 0.0, "expense": 0.0})
+        point[row["type"]] += float(row["total"] or 0)
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "bucket": bucket,
+        "income": breakdown["income"],
+        "expense": breakdown["expense"],
+        "series": list(points.values()),
+        "category_colors": category_colors,
+    }
+
+
+# ---------------------------
+# CACHED MULTI-PERIOD REPORTS
+# ---------------------------
+def months_between(start, end):
+    """
+    First days of every month from start's month to end's month.
+    """
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(date(year, month, 1))
+        year, month = add_months(year, month, 1)
+    return months
+
+
+def cached_chart_data(user, start, end, bucket="month"):
+    """
+    chart_data for whole-month windows, cached per user and window. The key
+    includes the version of every month in the window, so a write only
+    invalidates the windows that contain its month, plus the base currency
+    and FX rates version.
+    """
+    if not _whole_months(start, end):
+        return chart_data(user, start, end, bucket)
+
+    scopes = ["categories", "accounts"] + [month_scope(m) for m in months_between(start, end)]
+    digest = hashlib.md5(repr((get_data_versions(user.pk, scopes), get_fx_version())).encode()).hexdigest()
+    key = f"finance:report:{user.pk}:{start}:{end}:{bucket}:{base_currency(user)}:{digest}"
+    data = cache.get(key)
+    if data is None:
+        data = chart_data(user, start, end, bucket)
+        cache.set(key, data, REPORT_TIMEOUT)
+    return data
+
+
+def prepare_chart_data(user, months=12, end=None):
+    """
+    Prepares JSON data for charts: income, expense, monthly, category colors
+    over a rolling window of `months` months ending with `end`'s month
+    (default: this month). months=None covers the user's whole history.
+    """
+    if not user:
+        return {'income_json': '{}', 'expense_json': '{}', 'monthly_json': '[]', 'category_colors_json': '{}'}
+
+    end = end or date.today()
+    _, end_day = month_range(end.year, end.month)
+    if months is None:
+        first = MonthlyRollup.objects.filter(user=user).aggregate(first=Min("month"))["first"]
+        start = first or date(end.year, end.month, 1)
+    else:
+        start_year, start_month = add_months(end.year, end.month, -(months - 1))
+        start = date(start_year, start_month, 1)
+
+    data = cached_chart_data(user, start, end_day, bucket="month")
+    monthly = [
+        {
+            'date': date.fromisoformat(point['date'] + '-01').strftime("%b %Y"),
+            'income': point['income'],
+            'expense': point['expense'],
+        }
+        for point in data['series']
+    ]
+    return {
+        'income_json': json.dumps(data['income']),
+        'expense_json': json.dumps(data['expense']),
+        'monthly_json': json.dumps(monthly),
+        'category_colors_json': json.dumps(data['category_colors']),
+    }
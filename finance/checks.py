@@ -0,0 +1,24 @@
+# finance/checks.py
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .cache import PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Data versions live in the default cache; with a per-process backend
+    every worker keeps its own, so snapshots go stale and 304s are off.
+    """
+    if settings.DEBUG or settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        "The default cache is local to each process.",
+        hint=(
+            "Use a shared backend (Redis, Memcached or the database cache) so every worker sees "
+            "the same data versions; until then conditional GETs are disabled and cached "
+            "snapshots can lag behind writes made by other workers."
+        ),
+        id="finance.W001",
+    )]
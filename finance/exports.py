@@ -0,0 +1,100 @@
+# finance/exports.py
+# Streaming ledger exports (CSV / newline-delimited JSON)
+import csv
+import json
+from datetime import datetime
+
+from .models import Account, Budget, Category, Transaction
+
+CHUNK_SIZE = 2000
+
+# kind -> (model, exported columns, ordering)
+EXPORTS = {
+    "transactions": (
+        Transaction,
+        ["id", "date", "type", "amount", "account__currency", "account__name", "category__name", "note"],
+        ["date", "id"],
+    ),
+    "accounts": (Account, ["id", "name", "icon", "currency", "initial_amount", "balance"], ["id"]),
+    "categories": (Category, ["id", "name", "type", "icon", "color"], ["type", "name"]),
+    "budgets": (Budget, ["id", "year", "month", "category__name", "amount"], ["year", "month", "id"]),
+}
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+class ExportFilterError(ValueError):
+    pass
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ExportFilterError(f"{name} must be YYYY-MM-DD")
+
+
+def _parse_id(value, name):
+    try:
+        return int(value)
+    except ValueError:
+        raise ExportFilterError(f"{name} must be an id")
+
+
+def export_rows(kind, user=None, params=None, all_users=False):
+    """
+    Returns (header, iterator of value tuples) for one export kind.
+    Transactions accept start / end / account / category filters in `params`.
+    With all_users=True rows of every user are returned ordered by user, with
+    the user id as the first column.
+    """
+    model, fields, ordering = EXPORTS[kind]
+    params = params or {}
+    header = [f.replace("__", "_") for f in fields]
+    user_field = "account__user_id" if kind == "transactions" else "user_id"
+    qs = model.objects.all()
+    if all_users:
+        header = ["user_id"] + header
+        fields = [user_field] + fields
+        ordering = [user_field] + ordering
+    else:
+        qs = qs.filter(account__user=user) if kind == "transactions" else qs.filter(user=user)
+
+    if kind == "transactions":
+        if params.get("start"):
+            qs = qs.filter(date__gte=_parse_date(params["start"], "start"))
+        if params.get("end"):
+            qs = qs.filter(date__lte=_parse_date(params["end"], "end"))
+        if params.get("account"):
+            qs = qs.filter(account_id=_parse_id(params["account"], "account"))
+        if params.get("category"):
+            qs = qs.filter(category_id=_parse_id(params["category"], "category"))
+
+    rows = qs.order_by(*ordering).values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+    return header, rows
+
+
+# ---------------------------
+# ENCODERS
+# ---------------------------
+class _Echo:
+    """
+    File-like object whose write() just returns the line, for csv.writer.
+    """
+    def write(self, value):
+        return value
+
+
+def iter_csv(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_ndjson(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), default=str, ensure_ascii=False) + "\n"
+
+
+def encode(fmt, header, rows):
+    return iter_csv(header, rows) if fmt == "csv" else iter_ndjson(header, rows)
@@ -0,0 +1,115 @@
+# finance/feed.py
+# Keyset-paginated feed of a month's transactions, grouped by day
+from datetime import date
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .fx import annotate_base_amounts, base_currency, in_base
+from .models import Transaction
+from .utils import month_range
+
+PAGE_SIZE = getattr(settings, "FINANCE_FEED_PAGE_SIZE", 50)
+
+
+class CursorError(ValueError):
+    """
+    A malformed ?after= cursor.
+    """
+
+
+def encode_cursor(tx):
+    return f"{tx.date.isoformat()}_{tx.id}"
+
+
+def decode_cursor(value):
+    """
+    Parses 'YYYY-MM-DD_<id>' into (date, id).
+    """
+    try:
+        day, tx_id = value.split("_", 1)
+        return date.fromisoformat(day), int(tx_id)
+    except (AttributeError, ValueError):
+        raise CursorError(f"invalid cursor {value!r}")
+
+
+def _page_query(user, year, month, after, page_size):
+    start, end = month_range(year, month)
+    qs = (
+        Transaction.objects
+        .filter(account__user=user, date__range=(start, end))
+        .select_related("category")
+        .annotate(currency=F("account__currency"))
+        .order_by("-date", "-id")
+    )
+    if after:
+        after_date, after_id = decode_cursor(after)
+        qs = qs.filter(Q(date__lt=after_date) | Q(date=after_date, id__lt=after_id))
+    # One extra row tells whether there is a next page
+    return qs[:page_size + 1]
+
+
+def _group_by_day(rows, page_size):
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    days = {}
+    for tx in rows[:page_size]:
+        days.setdefault(tx.date, {"date": tx.date, "total_income": Decimal("0"), "total_expense": Decimal("0"), "items": []})
+        days[tx.date]["items"].append(tx)
+    return days, next_cursor
+
+
+def _day_totals_query(user, days):
+    zero = Value(Decimal("0"), output_field=DecimalField())
+    converted = in_base("amount", base_currency(user), on="date")
+    return (
+        Transaction.objects
+        .filter(account__user=user, date__in=list(days))
+        .values("date")
+        .annotate(
+            income=Coalesce(Sum(converted, filter=Q(type="income")), zero),
+            expense=Coalesce(Sum(converted, filter=Q(type="expense")), zero),
+        )
+        .order_by()
+    )
+
+
+def _apply_day_totals(days, rows):
+    for row in rows:
+        days[row["date"]]["total_income"] = row["income"]
+        days[row["date"]]["total_expense"] = row["expense"]
+    return list(days.values())
+
+
+def day_groups_page(user, year, month, after=None, page_size=PAGE_SIZE):
+    """
+    One page of the month's transactions, newest first, keyset-paginated on
+    (date, id) so every page costs the same however deep the scroll.
+    Day totals cover the whole day even when its rows span two pages.
+
+    Returns (days, next_cursor) where days is a list of
+    {'date', 'total_income', 'total_expense', 'items'}, in order, and
+    next_cursor is None on the last page. Totals are in the user's base
+    currency; items carry `currency` and `base_amount`. Two queries, plus
+    rate lookups that aren't cached yet.
+    """
+    rows = annotate_base_amounts(list(_page_query(user, year, month, after, page_size)), base_currency(user))
+    days, next_cursor = _group_by_day(rows, page_size)
+    if not days:
+        return [], next_cursor
+    return _apply_day_totals(days, _day_totals_query(user, days)), next_cursor
+
+
+async def aday_groups_page(user, year, month, after=None, page_size=PAGE_SIZE):
+    """
+    Async day_groups_page.
+    """
+    rows = [tx async for tx in _page_query(user, year, month, after, page_size)]
+    rows = await sync_to_async(annotate_base_amounts)(rows, base_currency(user))
+    days, next_cursor = _group_by_day(rows, page_size)
+    if not days:
+        return [], next_cursor
+    totals = [row async for row in _day_totals_query(user, days)]
+    return _apply_day_totals(days, totals), next_cursor
@@ -1,4 +1,6 @@
 # finance/forms.py
+from decimal import Decimal
+
 from django import forms
 from .models import Account, Category, Transaction
 
@@ -36,3 +38,33 @@ class TransactionForm(forms.ModelForm):
             'note': forms.TextInput(attrs={'class':'form-control', 'placeholder':'Note'}),
             'date': forms.DateInput(attrs={'class':'form-control', 'type':'date'}),
         }
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Transfers are made in pairs with TransferForm
+        self.fields['type'].choices = [c for c in Transaction.TYPES if c[0] not in Transaction.TRANSFER_TYPES]
+        # Only the user's own accounts and categories are valid choices
+        if user is not None:
+            self.fields['account'].queryset = Account.objects.filter(user=user)
+            self.fields['category'].queryset = Category.objects.filter(user=user)
+
+
+class TransferForm(forms.Form):
+    from_account = forms.ModelChoiceField(queryset=Account.objects.none())
+    to_account = forms.ModelChoiceField(queryset=Account.objects.none())
+    amount = forms.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0.01'))
+    # Amount credited, when the accounts' currencies differ (default: converted at the day's rate)
+    to_amount = forms.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0.01'), required=False)
+    date = forms.DateField(required=False)
+    note = forms.CharField(max_length=255, required=False)
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['from_account'].queryset = Account.objects.filter(user=user)
+        self.fields['to_account'].queryset = Account.objects.filter(user=user)
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get('from_account') and cleaned.get('from_account') == cleaned.get('to_account'):
+            raise forms.ValidationError("Choose two different accounts.")
+        return cleaned
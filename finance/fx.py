@@ -0,0 +1,179 @@
+# finance/fx.py
+# Currency conversion. Amounts stay in their account's currency everywhere
+# they are stored; totals are converted to the user's base currency inside
+# the aggregate queries by joining to the dated FxRate table, and single
+# amounts (feed rows) use an in-process LRU cache of rate lookups.
+import csv
+import functools
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import FxRate, currency_code_validator, default_currency
+
+RATE_CACHE_SIZE = getattr(settings, "FINANCE_FX_CACHE_SIZE", 4096)
+# Other processes pick up newly loaded rates within this many seconds
+RATE_CACHE_SECONDS = getattr(settings, "FINANCE_FX_CACHE_SECONDS", 300)
+RATE_FIELD = DecimalField(max_digits=18, decimal_places=8)
+AMOUNT_FIELD = DecimalField(max_digits=20, decimal_places=2)
+CENT = Decimal("0.01")
+_VERSION_KEY = "finance:fx-version"
+
+
+class FxRateError(ValueError):
+    """
+    A rate file row that can't be loaded.
+    """
+
+
+def base_currency(user):
+    """
+    The currency the user's totals are shown in.
+    """
+    return getattr(user, "base_currency", "") or default_currency()
+
+
+# ---------------------------
+# IN THE DATABASE
+# ---------------------------
+def rate_expression(base, currency="account__currency", on="month"):
+    """
+    Rate from the outer row's currency to `base`: 1 for the same currency,
+    else the latest rate on or before `on` (a field name, or a date), else
+    the earliest one after it. NULL when the pair has no rates at all.
+    """
+    on = OuterRef(on) if isinstance(on, str) else Value(on)
+    rates = FxRate.objects.filter(base=base, currency=OuterRef(currency))
+    return Case(
+        When(**{currency: base}, then=Value(Decimal("1"))),
+        default=Coalesce(
+            Subquery(rates.filter(date__lte=on).order_by("-date").values("rate")[:1]),
+            Subquery(rates.filter(date__gt=on).order_by("date").values("rate")[:1]),
+        ),
+        output_field=RATE_FIELD,
+    )
+
+
+def in_base(amount, base, currency="account__currency", on="month"):
+    """
+    `amount` (a field name) converted to `base`, for use inside Sum().
+    Defaults fit MonthlyRollup rows, converted at the rate for their month.
+    """
+    return ExpressionWrapper(F(amount) * rate_expression(base, currency, on), output_field=AMOUNT_FIELD)
+
+
+# ---------------------------
+# SINGLE LOOKUPS
+# ---------------------------
+@functools.lru_cache(maxsize=RATE_CACHE_SIZE)
+def _cached_rate(base, currency, on, epoch):
+    rates = FxRate.objects.filter(base=base, currency=currency)
+    rate = rates.filter(date__lte=on).order_by("-date").values_list("rate", flat=True).first()
+    if rate is None:
+        rate = rates.filter(date__gt=on).order_by("date").values_list("rate", flat=True).first()
+    return rate
+
+
+def get_rate(currency, base, on):
+    """
+    Same rate as rate_expression, from an in-process LRU cache: a query
+    only for pairs and dates not looked up recently. None if unknown.
+    """
+    if currency == base:
+        return Decimal("1")
+    return _cached_rate(base, currency, on, int(time.monotonic() // RATE_CACHE_SECONDS))
+
+
+def convert(amount, currency, base, on):
+    rate = get_rate(currency, base, on)
+    return None if rate is None else (amount * rate).quantize(CENT)
+
+
+def annotate_base_amounts(transactions, base):
+    """
+    Sets `currency` and `base_amount` (None without a rate) on each
+    transaction, converted at the rate on its date.
+    """
+    for tx in transactions:
+        if getattr(tx, "currency", None) is None:
+            tx.currency = tx.account.currency
+        tx.base_amount = convert(tx.amount, tx.currency, base, tx.date)
+    return transactions
+
+
+# ---------------------------
+# VERSION
+# ---------------------------
+def get_fx_version():
+    """
+    Changes whenever rates are loaded; part of the key of anything cached
+    with converted amounts in it.
+    """
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        cache.add(_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def _bump_fx_version():
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, time.time_ns(), None)
+
+
+# ---------------------------
+# LOADING
+# ---------------------------
+def parse_rates(lines):
+    """
+    FxRate objects from CSV with a date,base,currency,rate header
+    (date as YYYY-MM-DD; 1 currency = rate base). Raises FxRateError.
+    """
+    rates = {}
+    reader = csv.DictReader(lines)
+    missing = {"date", "base", "currency", "rate"} - set(reader.fieldnames or ())
+    if missing:
+        raise FxRateError(f"missing column(s): {', '.join(sorted(missing))}")
+    for row in reader:
+        try:
+            day = date.fromisoformat(row["date"].strip())
+            base, currency = row["base"].strip().upper(), row["currency"].strip().upper()
+            currency_code_validator(base)
+            currency_code_validator(currency)
+            rate = Decimal(row["rate"].strip())
+            if rate <= 0:
+                raise ValueError("rate must be positive")
+        except ValidationError as exc:
+            raise FxRateError(f"line {reader.line_num}: {exc.messages[0]}")
+        except InvalidOperation:
+            raise FxRateError(f"line {reader.line_num}: invalid rate")
+        except (AttributeError, ValueError) as exc:
+            raise FxRateError(f"line {reader.line_num}: {exc}")
+        # A later line for the same pair and date wins
+        rates[(base, currency, day)] = FxRate(base=base, currency=currency, date=day, rate=rate)
+    return list(rates.values())
+
+
+def load_rates(lines, batch_size=1000):
+    """
+    Inserts or updates the rates in `lines` (see parse_rates) in one
+    transaction. Returns the number of rows loaded.
+    """
+    rates = parse_rates(lines)
+    with transaction.atomic():
+        FxRate.objects.bulk_create(
+            rates, batch_size=batch_size,
+            update_conflicts=True, unique_fields=["base", "currency", "date"], update_fields=["rate"],
+        )
+        transaction.on_commit(_bump_fx_version)
+        transaction.on_commit(_cached_rate.cache_clear)
+    return len(rates)
@@ -0,0 +1,265 @@
+# finance/importers.py
+# Streaming bulk import of transactions from CSV / OFX files
+import csv
+import re
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .fx import CENT
+from .models import Account, Category, Transaction
+from .signals import LedgerDeltas
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class RowError(ValueError):
+    """
+    A row that can't be turned into a transaction.
+    """
+
+
+# ---------------------------
+# PARSERS
+# ---------------------------
+def _parse_amount(value):
+    try:
+        amount = Decimal(str(value).replace(",", "").strip())
+    except (InvalidOperation, AttributeError):
+        raise RowError(f"invalid amount {value!r}")
+    if not amount.is_finite():
+        raise RowError(f"invalid amount {value!r}")
+    return amount
+
+
+def _clean_amount(amount):
+    """
+    `amount` rounded to cents and checked against Transaction.amount, so
+    the stored rows and the balance / rollup deltas agree.
+    """
+    field = Transaction._meta.get_field("amount")
+    try:
+        return field.clean(amount.quantize(CENT), None)
+    except InvalidOperation:
+        raise RowError("amount out of range")
+    except ValidationError as exc:
+        raise RowError(" ".join(exc.messages))
+
+
+def iter_csv_rows(lines, date_format="%Y-%m-%d"):
+    """
+    Yields row dicts from a CSV with a header of
+    date, amount[, type][, account][, category][, note].
+    Without a type column, negative amounts are expenses.
+    """
+    for line_no, row in enumerate(csv.DictReader(lines), start=2):
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+        try:
+            amount = _parse_amount(row.get("amount"))
+            tx_type = row.get("type", "").lower() or ("expense" if amount < 0 else "income")
+            try:
+                day = datetime.strptime(row.get("date", ""), date_format).date()
+            except ValueError:
+                raise RowError(f"invalid date {row.get('date')!r}")
+            yield {
+                "date": day,
+                "amount": abs(amount),
+                "type": tx_type,
+                "account": row.get("account", ""),
+                "category": row.get("category", ""),
+                "note": row.get("note", "")[:255],
+            }
+        except RowError as exc:
+            yield {"error": f"line {line_no}: {exc}"}
+
+
+OFX_TAG = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+
+def iter_ofx_rows(lines):
+    """
+    Yields row dicts from the <STMTTRN> blocks of an OFX (SGML or XML) file,
+    reading it line by line. OFX files belong to one account, so `account`
+    is left blank for the caller to fill in.
+    """
+    current = None
+    count = 0
+    for line in lines:
+        for tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                current = {}
+            elif current is not None:
+                current[tag] = value.strip()
+        if current is not None and "</STMTTRN>" in line.upper():
+            count += 1
+            try:
+                amount = _parse_amount(current.get("TRNAMT"))
+                try:
+                    day = datetime.strptime(current.get("DTPOSTED", "")[:8], "%Y%m%d").date()
+                except ValueError:
+                    raise RowError(f"invalid DTPOSTED {current.get('DTPOSTED')!r}")
+                yield {
+                    "date": day,
+                    "amount": abs(amount),
+                    "type": "expense" if amount < 0 else "income",
+                    "account": "",
+                    "category": "",
+                    "note": (current.get("NAME") or current.get("MEMO") or "")[:255],
+                }
+            except RowError as exc:
+                yield {"error": f"transaction {count}: {exc}"}
+            current = None
+
+
+# ---------------------------
+# IMPORT
+# ---------------------------
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.errors = []
+        self.aborted = False
+        self.accounts = set()
+        self.started = time.monotonic()
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.imported / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        return {
+            "imported": self.imported,
+            "errors": self.errors[:100],
+            "error_count": len(self.errors),
+            "aborted": self.aborted,
+            "accounts": len(self.accounts),
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+class _NameMap:
+    """
+    Maps account / category names to ids for one user, creating missing ones.
+    `default_account` (an Account) takes rows without an account name.
+    """
+    def __init__(self, user, default_account=None):
+        self.user = user
+        self.default_account_id = default_account.id if default_account else None
+        self.accounts = {a.name.lower(): a.id for a in Account.objects.filter(user=user)}
+        self.categories = {(c.name.lower(), c.type): c.id for c in Category.objects.filter(user=user)}
+
+    def account_id(self, name):
+        if not name:
+            if not self.default_account_id:
+                raise RowError("no account given")
+            return self.default_account_id
+        key = name.lower()
+        if key not in self.accounts:
+            self.accounts[key] = Account.objects.create(user=self.user, name=name[:50]).id
+        return self.accounts[key]
+
+    def category_id(self, name, tx_type):
+        if not name:
+            return None
+        key = (name.lower(), tx_type)
+        if key not in self.categories:
+            self.categories[key] = Category.objects.create(user=self.user, name=name[:50], type=tx_type).id
+        return self.categories[key]
+
+    def snapshot(self):
+        return dict(self.accounts), dict(self.categories)
+
+    def restore(self, snapshot):
+        self.accounts, self.categories = snapshot
+
+
+def _write_chunk(user, names, rows, result):
+    """
+    Inserts one chunk with bulk_create (no per-row signals) and applies its
+    balance and rollup changes once per account / rollup key. Accounts and
+    categories it creates, and its data version bump, are part of the same
+    DB transaction.
+    """
+    objs = []
+    errors = []
+    ledger = LedgerDeltas(user.id)
+    snapshot = names.snapshot()
+
+    try:
+        with transaction.atomic():
+            for row in rows:
+                if "error" in row:
+                    errors.append(row["error"])
+                    continue
+                try:
+                    if row["type"] not in ("income", "expense"):
+                        raise RowError(f"invalid type {row['type']!r}")
+                    amount = _clean_amount(row["amount"])
+                    if amount <= 0:
+                        raise RowError("amount must be positive")
+                    account_id = names.account_id(row["account"])
+                    category_id = names.category_id(row["category"], row["type"])
+                except RowError as exc:
+                    errors.append(f"{row['date']} {row['amount']}: {exc}")
+                    continue
+
+                tx = Transaction(
+                    user=user, account_id=account_id, category_id=category_id,
+                    amount=amount, type=row["type"], date=row["date"], note=row["note"],
+                )
+                objs.append(tx)
+                ledger.add(tx)
+
+            Transaction.objects.bulk_create(objs)
+            ledger.apply()
+    except Exception:
+        # Names created in the rolled back chunk no longer exist
+        names.restore(snapshot)
+        raise
+
+    result.errors.extend(errors)
+    result.imported += len(objs)
+    result.accounts.update(ledger.balances)
+
+
+def import_transactions(user, rows, chunk_size=DEFAULT_CHUNK_SIZE, default_account=None, progress=None):
+    """
+    Streams parsed rows into the user's ledger in chunked DB transactions.
+    `progress(result)` is called after every chunk. A file that can't be
+    read any further (bad encoding, broken CSV) stops the import with
+    `result.aborted` set; chunks already written stay.
+    """
+    result = ImportResult()
+    names = _NameMap(user, default_account)
+    rows = iter(rows)
+    while not result.aborted:
+        chunk = []
+        try:
+            chunk.extend(islice(rows, chunk_size))
+        except (UnicodeDecodeError, csv.Error) as exc:
+            result.errors.append(f"unreadable file: {exc}")
+            result.aborted = True
+        if not chunk:
+            break
+        _write_chunk(user, names, chunk, result)
+        result.seconds = time.monotonic() - result.started
+        if progress:
+            progress(result)
+
+    result.seconds = time.monotonic() - result.started
+    return result
+
+
+def parse_rows(fmt, lines, date_format="%Y-%m-%d"):
+    if fmt == "csv":
+        return iter_csv_rows(lines, date_format)
+    if fmt == "ofx":
+        return iter_ofx_rows(lines)
+    raise ValueError(f"Unsupported format {fmt!r}")
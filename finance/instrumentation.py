@@ -0,0 +1,71 @@
+# finance/instrumentation.py
+# Per-request timing state shared by the timing middleware, the template
+# backend and the context processors
+import functools
+import time
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template
+
+current_timings = ContextVar("current_timings", default=None)
+
+
+class RequestTimings:
+    """
+    Accumulates query count and per-section durations (ms) for one request.
+    Also acts as a connection.execute_wrapper to time every SQL query.
+    """
+    def __init__(self):
+        self.queries = 0
+        self.sections = {"db": 0.0, "view": 0.0, "ctx": 0.0, "tpl": 0.0}
+
+    def add(self, section, ms):
+        self.sections[section] = self.sections.get(section, 0.0) + ms
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sections["db"] += (time.perf_counter() - started) * 1000
+
+
+def timed_section(section):
+    """
+    Decorator adding the wrapped call's duration to `section` of the current
+    request's timings (no-op outside an instrumented request).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = current_timings.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.add(section, (time.perf_counter() - started) * 1000)
+        return wrapper
+    return decorator
+
+
+# ---------------------------
+# TEMPLATE BACKEND
+# ---------------------------
+class TimedTemplate(Template):
+    @timed_section("tpl")
+    def render(self, context=None, request=None):
+        return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    DjangoTemplates whose top-level renders are recorded as the "tpl" section.
+    """
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,82 @@
+# finance/management/commands/explain_queries.py
+import re
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from finance.models import Account, Budget, Category, MonthlyRollup, Transaction
+from finance.utils import month_range
+
+User = get_user_model()
+
+# Plan fragments that mean an index (or the primary key) drives the lookup
+INDEX_MARKERS = {
+    "postgresql": ("index scan", "index only scan", "bitmap index scan"),
+    "sqlite": ("using index", "using covering index", "using integer primary key", "using primary key"),
+}
+
+
+def hot_queries(user, year, month):
+    """
+    The querysets behind the dashboard and write endpoints, labelled.
+    """
+    start, end = month_range(year, month)
+    account = Account.objects.filter(user=user).first()
+    category = Category.objects.filter(user=user, type="expense").first()
+    return [
+        ("home: month transactions",
+         Transaction.objects.filter(account__user=user, date__range=(start, end))),
+        ("dashboards: month totals (rollups)",
+         MonthlyRollup.objects.filter(user=user, month__range=(start, start)).values("type").annotate(total=Sum("total"))),
+        ("budget: category spent this month",
+         Transaction.objects.filter(user=user, type="expense", category=category, date__range=(start, end))),
+        ("budget: budgets for month",
+         Budget.objects.filter(user=user, year=year, month=month)),
+        ("reconcile: account income",
+         Transaction.objects.filter(account=account, type="income")),
+        ("summary: rollups per account",
+         MonthlyRollup.objects.filter(user=user).values("account_id", "type").annotate(total=Sum("total"))),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN on the hot finance queries and report whether an index is used."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Username to build queries for (default: first user)")
+        parser.add_argument("--year", type=int, default=date.today().year)
+        parser.add_argument("--month", type=int, default=date.today().month)
+        parser.add_argument("--verbose-plan", action="store_true", help="Print the full plans")
+        parser.add_argument(
+            "--strict", action="store_true",
+            help="Exit with an error if any hot query does not use an index",
+        )
+
+    def handle(self, *args, **options):
+        user = (
+            User.objects.filter(username=options["user"]).first()
+            if options["user"] else User.objects.order_by("id").first()
+        )
+        if not user:
+            raise CommandError("No user to build queries for")
+
+        markers = INDEX_MARKERS.get(connection.vendor, ("index",))
+        missing = []
+        for label, qs in hot_queries(user, options["year"], options["month"]):
+            plan = qs.explain()
+            lowered = plan.lower()
+            used = any(m in lowered for m in markers)
+            names = sorted(set(re.findall(r"\b\w+_idx\b|\bfinance_\w+\b", plan)))
+
+            status = self.style.SUCCESS("index") if used else self.style.ERROR("SCAN ")
+            self.stdout.write(f"[{status}] {label}" + (f"  ({', '.join(names)})" if names else ""))
+            if options["verbose_plan"]:
+                self.stdout.write(plan + "\n")
+            if not used:
+                missing.append(label)
+
+        if missing and options["strict"]:
+            raise CommandError(f"{len(missing)} hot query(s) not using an index: {', '.join(missing)}")
@@ -0,0 +1,37 @@
+# finance/management/commands/export_ledger.py
+import os
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand
+
+from finance.exports import EXPORTS, FORMATS, encode, export_rows
+
+
+class Command(BaseCommand):
+    help = "Export every user's ledger to <output-dir>/user-<id>/<kind>.<format>, one query per kind."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output_dir")
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument(
+            "--kind", action="append", choices=sorted(EXPORTS),
+            help="Export only these kinds (repeatable, default: all)",
+        )
+
+    def handle(self, *args, **options):
+        fmt = options["format"]
+        for kind in options["kind"] or EXPORTS:
+            header, rows = export_rows(kind, all_users=True)
+            files = 0
+            # Rows stream in ordered by user: one file per run of the same user id
+            for user_id, user_rows in groupby(rows, key=itemgetter(0)):
+                # Named by id: usernames are user input and may contain path parts
+                folder = os.path.join(options["output_dir"], f"user-{user_id}")
+                os.makedirs(folder, exist_ok=True)
+                with open(os.path.join(folder, f"{kind}.{fmt}"), "w", encoding="utf-8", newline="") as fh:
+                    fh.writelines(encode(fmt, header[1:], (row[1:] for row in user_rows)))
+                files += 1
+            self.stdout.write(f"{kind}: {files} file(s)")
+
+        self.stdout.write(self.style.SUCCESS(f"Export written to {options['output_dir']}"))
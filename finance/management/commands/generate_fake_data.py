@@ -0,0 +1,111 @@
+# finance/management/commands/generate_fake_data.py
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from finance.constants import DEFAULT_ACCOUNT_ICONS, DEFAULT_CATEGORIES
+from finance.importers import import_transactions
+from finance.models import Account, Budget, Category
+
+User = get_user_model()
+
+# Rough shape per default category: (share of transactions, min amount, max amount)
+EXPENSE_PROFILE = {
+    "Food": (0.40, 50, 1500),
+    "Transport": (0.25, 20, 800),
+    "Shopping": (0.15, 200, 6000),
+    "Bills": (0.10, 500, 4000),
+    "Entertainment": (0.10, 100, 2500),
+}
+INCOME_PROFILE = {
+    "Salary": (0.70, 30000, 90000),
+    "Business": (0.10, 5000, 40000),
+    "Gift": (0.08, 500, 5000),
+    "Investment": (0.07, 1000, 15000),
+    "Other Income": (0.05, 100, 3000),
+}
+
+
+class Command(BaseCommand):
+    help = "Generate realistic synthetic users, accounts, transactions and budgets for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1)
+        parser.add_argument("--accounts", type=int, default=4, help="Accounts per user (defaults included)")
+        parser.add_argument("--transactions", type=int, default=1000, help="Transactions per user")
+        parser.add_argument("--years", type=int, default=1, help="History length ending today")
+        parser.add_argument("--prefix", default="bench", help="Username prefix")
+        parser.add_argument("--password", default="benchpass123")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        end = date.today()
+        start = end - timedelta(days=365 * options["years"])
+
+        for i in range(options["users"]):
+            username = f"{options['prefix']}_{i}"
+            user = User.objects.filter(username=username).first()
+            if not user:
+                # The post_save signal provisions DEFAULT_ACCOUNTS / DEFAULT_CATEGORIES
+                user = User.objects.create_user(
+                    username=username, email=f"{username}@example.com", password=options["password"]
+                )
+
+            self._ensure_accounts(user, options["accounts"])
+            account_names = list(Account.objects.filter(user=user).values_list("name", flat=True))
+            rows = self._rows(rng, account_names, start, end, options["transactions"])
+            result = import_transactions(user, rows)
+            budgets = self._budgets(rng, user, start, end)
+
+            self.stdout.write(
+                f"{username}: {result.imported} transactions, {len(account_names)} accounts, "
+                f"{budgets} budgets ({result.rows_per_second:.0f} rows/s)"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Synthetic data ready"))
+
+    def _ensure_accounts(self, user, count):
+        existing = Account.objects.filter(user=user).count()
+        icons = [icon for icon, _ in DEFAULT_ACCOUNT_ICONS]
+        Account.objects.bulk_create(
+            [
+                Account(user=user, name=f"Account {n}", icon=icons[n % len(icons)])
+                for n in range(existing, count)
+            ],
+            ignore_conflicts=True,
+        )
+
+    def _rows(self, rng, account_names, start, end, count):
+        days = (end - start).days or 1
+        income_share = 0.1
+        for _ in range(count):
+            tx_type = "income" if rng.random() < income_share else "expense"
+            profile = INCOME_PROFILE if tx_type == "income" else EXPENSE_PROFILE
+            names = [name for name, _, _ in DEFAULT_CATEGORIES[tx_type]]
+            category = rng.choices(names, weights=[profile[n][0] for n in names])[0]
+            _, low, high = profile[category]
+            yield {
+                "date": start + timedelta(days=rng.randrange(days + 1)),
+                "amount": Decimal(rng.uniform(low, high)).quantize(Decimal("0.01")),
+                "type": tx_type,
+                "account": rng.choice(account_names),
+                "category": category,
+                "note": f"{category} #{rng.randrange(10000)}",
+            }
+
+    def _budgets(self, rng, user, start, end):
+        categories = list(Category.objects.filter(user=user, type="expense"))
+        budgets = []
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            for cat in categories:
+                high = EXPENSE_PROFILE.get(cat.name, (0, 1000, 5000))[2]
+                amount = Decimal(rng.uniform(high, high * 4)).quantize(Decimal("0.01"))
+                budgets.append(Budget(user=user, category=cat, month=month, year=year, amount=amount))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        Budget.objects.bulk_create(budgets, ignore_conflicts=True)
+        return len(budgets)
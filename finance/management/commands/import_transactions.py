@@ -0,0 +1,60 @@
+# finance/management/commands/import_transactions.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.importers import DEFAULT_CHUNK_SIZE, import_transactions, parse_rows
+from finance.models import Account
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV or OFX file into a user's ledger with bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import")
+        parser.add_argument("--user", required=True, help="Username that owns the transactions")
+        parser.add_argument("--format", choices=["csv", "ofx"], help="Default: from the file extension")
+        parser.add_argument("--account", help="Existing account name for rows without one (required for OFX)")
+        parser.add_argument("--date-format", default="%Y-%m-%d", help="strptime format for CSV dates")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options["user"]).first()
+        if not user:
+            raise CommandError(f"User '{options['user']}' not found")
+
+        fmt = options["format"] or options["path"].rsplit(".", 1)[-1].lower()
+        if fmt not in ("csv", "ofx"):
+            raise CommandError(f"Can't guess the format of {options['path']}; pass --format")
+
+        account = None
+        if options["account"]:
+            account = Account.objects.filter(user=user, name__iexact=options["account"]).first()
+            if not account:
+                raise CommandError(f"Account '{options['account']}' not found")
+
+        def progress(result):
+            self.stdout.write(
+                f"  {result.imported} rows in {result.seconds:.1f}s ({result.rows_per_second:.0f} rows/s)"
+            )
+
+        with open(options["path"], encoding="utf-8-sig", newline="") as fh:
+            result = import_transactions(
+                user,
+                parse_rows(fmt, fh, options["date_format"]),
+                chunk_size=options["chunk_size"],
+                default_account=account,
+                progress=progress,
+            )
+
+        if result.aborted:
+            raise CommandError(f"{result.errors[-1]} (imported {result.imported} rows before it)")
+        for error in result.errors[:20]:
+            self.stdout.write(self.style.WARNING(f"Skipped {error}"))
+        if len(result.errors) > 20:
+            self.stdout.write(self.style.WARNING(f"... and {len(result.errors) - 20} more"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.imported} transactions into {len(result.accounts)} account(s) "
+            f"in {result.seconds:.1f}s ({result.rows_per_second:.0f} rows/s)"
+        ))
@@ -0,0 +1,27 @@
+# finance/management/commands/load_fx_rates.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.fx import FxRateError, load_rates
+
+
+class Command(BaseCommand):
+    help = "Load dated FX rates from a CSV file (date,base,currency,rate), replacing rates for the same days."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default=getattr(settings, "FINANCE_FX_RATES_FILE", None),
+            help="CSV file (default: FINANCE_FX_RATES_FILE)",
+        )
+
+    def handle(self, *args, **options):
+        if not options["path"]:
+            raise CommandError("Give a file or set FINANCE_FX_RATES_FILE")
+        try:
+            with open(options["path"], newline="", encoding="utf-8") as fh:
+                loaded = load_rates(fh)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except FxRateError as exc:
+            raise CommandError(f"{options['path']}: {exc}")
+        self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} rate(s)"))
@@ -0,0 +1,52 @@
+# finance/management/commands/load_test.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.benchmarks import LOAD_PATHS, run_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare tail latency of running WSGI and ASGI deployments under concurrent load, "
+        "e.g. `gunicorn budgetbee.wsgi` against `uvicorn budgetbee.asgi:application`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wsgi-url", help="Base URL of the WSGI deployment, e.g. http://127.0.0.1:8000")
+        parser.add_argument("--asgi-url", help="Base URL of the ASGI deployment, e.g. http://127.0.0.1:8001")
+        parser.add_argument("--email", default="bench_0@example.com", help="Login email (see generate_fake_data)")
+        parser.add_argument("--password", default="benchpass123")
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--path", action="append", dest="paths", help="Path to request (repeatable)")
+        parser.add_argument("--output", help="Write results as JSON to this file")
+
+    def handle(self, *args, **options):
+        targets = {name: options[f"{name}_url"] for name in ("wsgi", "asgi") if options[f"{name}_url"]}
+        if not targets:
+            raise CommandError("Pass --wsgi-url and/or --asgi-url")
+        paths = tuple(options["paths"] or LOAD_PATHS)
+
+        report = {}
+        for name, url in targets.items():
+            try:
+                report[name] = run_load(
+                    url, options["email"], options["password"], paths, options["concurrency"], options["requests"]
+                )
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"{name}: {exc}")
+
+        self.stdout.write(f"{'deployment':<10} {'path':<20} {'status':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+        for name, run in report.items():
+            for path, row in run["results"].items():
+                self.stdout.write(
+                    f"{name:<10} {path:<20} {row['status'] or '':>6} {row['p50_ms']:>8.1f}ms {row['p95_ms']:>8.1f}ms "
+                    f"{row['p99_ms']:>8.1f}ms {row['max_ms']:>8.1f}ms"
+                )
+            self.stdout.write(f"{name:<10} throughput {run['meta']['throughput_rps']} req/s")
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,50 @@
+# finance/management/commands/prerender_guest_pages.py
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import Resolver404, resolve, reverse
+
+from finance.cache import guest_page_key
+
+
+def default_paths():
+    category = reverse("finance:category")
+    return [
+        reverse("finance:home"),
+        reverse("finance:accounts"),
+        category,
+        f"{category}?type=income",
+        reverse("finance:chart"),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the guest versions of the dashboard pages into the cache, replacing any "
+        "earlier copies. Run on deploy; needs a cache shared with the web workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", action="append", dest="paths", help="Path to prerender (repeatable)")
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        for path in options["paths"] or default_paths():
+            try:
+                match = resolve(path.split("?", 1)[0])
+            except Resolver404:
+                raise CommandError(f"No view for {path}")
+
+            request = factory.get(path)
+            request.user = AnonymousUser()
+            # The view stores the fresh render on a miss
+            cache.delete(guest_page_key(request.get_full_path()))
+            view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+            response = view(request, *match.args, **match.kwargs)
+            if cache.get(guest_page_key(request.get_full_path())) is None:
+                self.stdout.write(self.style.WARNING(f"{path}: not cached (status {response.status_code})"))
+            else:
+                self.stdout.write(f"{path}: {len(response.content)} bytes")
+        self.stdout.write(self.style.SUCCESS("Guest pages prerendered"))
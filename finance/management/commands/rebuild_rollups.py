@@ -0,0 +1,38 @@
+# finance/management/commands/rebuild_rollups.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.rollups import rebuild_rollups, check_rollups
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuild monthly ledger rollups from raw transactions and verify them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only this username (default: all users)")
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Only compare rollups with raw transactions, don't rebuild",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+            if not user:
+                raise CommandError(f"User '{options['user']}' not found")
+
+        if not options["check"]:
+            written = rebuild_rollups(user)
+            self.stdout.write(f"Rebuilt {written} rollup rows")
+
+        mismatches = check_rollups(user)
+        for key, expected, actual in mismatches:
+            self.stdout.write(self.style.WARNING(
+                f"Mismatch {key}: expected {expected}, stored {actual}"
+            ))
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} rollup rows don't match raw transactions")
+        self.stdout.write(self.style.SUCCESS("Rollups match raw transactions"))
@@ -0,0 +1,38 @@
+# finance/management/commands/reconcile_balances.py
+from django.core.management.base import BaseCommand
+
+from finance.models import Account
+from finance.signals import find_balance_drift
+from finance.cache import bump_data_version
+
+
+class Command(BaseCommand):
+    help = "Find account balances that drifted from their transactions and repair them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only this username (default: all users)")
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Report drift without writing corrected balances",
+        )
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.all()
+        if options["user"]:
+            accounts = accounts.filter(user__username=options["user"])
+
+        drifted = find_balance_drift(accounts)
+        for account, expected in drifted:
+            self.stdout.write(self.style.WARNING(
+                f"Account {account.id} ({account.name}): stored {account.balance}, expected {expected}"
+            ))
+            if not options["dry_run"]:
+                Account.objects.filter(pk=account.pk).update(balance=expected)
+                bump_data_version(account.user_id)
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All balances match their transactions"))
+        elif options["dry_run"]:
+            self.stdout.write(f"{len(drifted)} account(s) drifted (dry run, nothing written)")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted)} account(s)"))
@@ -0,0 +1,65 @@
+# finance/management/commands/run_benchmarks.py
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.benchmarks import compare, run_benchmarks, run_signup_benchmark
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every finance/userauths view with the test client, recording latency "
+        "percentiles and SQL query counts. Writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", default="bench_0", help="User whose data is used (see generate_fake_data)")
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--only", action="append", help="Only cases whose label contains this (repeatable)")
+        parser.add_argument("--output", help="Write results as JSON to this file")
+        parser.add_argument("--compare", help="Baseline JSON from an earlier run to diff against")
+        parser.add_argument("--signups", type=int, default=0, help="Also time this many signups end to end")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options["user"]).first()
+        if not user:
+            raise CommandError(f"User '{options['user']}' not found; run generate_fake_data first")
+
+        report = run_benchmarks(user, options["iterations"], options["warmup"], options["only"])
+
+        self.stdout.write(f"{'view':<50} {'status':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8}")
+        for label, row in report["results"].items():
+            self.stdout.write(
+                f"{label:<50} {row['status']:>6} {row['p50_ms']:>8.2f}ms {row['p95_ms']:>8.2f}ms "
+                f"{row['p99_ms']:>8.2f}ms {row['queries_max']:>8}"
+            )
+        if report["missing"]:
+            self.stdout.write(self.style.WARNING(f"No benchmark case for: {', '.join(report['missing'])}"))
+
+        if options["signups"]:
+            signup = run_signup_benchmark(options["signups"], options["warmup"])
+            report["signup"] = signup
+            self.stdout.write(
+                f"\nsignup: {signup['signups_per_s']} signups/s, p50 {signup['p50_ms']:.2f}ms, "
+                f"p95 {signup['p95_ms']:.2f}ms, {signup['queries_max']} queries (status {signup['status']})"
+            )
+
+        if options["compare"]:
+            with open(options["compare"]) as fh:
+                baseline = json.load(fh)
+            self.stdout.write(f"\n{'view':<50} {'p50 Δ':>10} {'p95 Δ':>10} {'queries Δ':>10}")
+            for label, before, after in compare(baseline, report):
+                self.stdout.write(
+                    f"{label:<50} {after['p50_ms'] - before['p50_ms']:>+9.2f}ms "
+                    f"{after['p95_ms'] - before['p95_ms']:>+9.2f}ms "
+                    f"{after['queries_max'] - before['queries_max']:>+10}"
+                )
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
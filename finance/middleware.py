@@ -0,0 +1,125 @@
+# finance/middleware.py
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .instrumentation import RequestTimings, current_timings
+
+logger = logging.getLogger("budgetbee.requests")
+
+
+class RequestTimingMiddleware:
+    """
+    Counts SQL queries and times the DB, view, context processors and
+    template for every request. Reports them in Server-Timing and
+    X-DB-Queries headers and one JSON log line, and logs a warning when a
+    route goes over its query or latency budget.
+
+    Budgets: REQUEST_QUERY_BUDGET, REQUEST_LATENCY_BUDGET_MS and per-route
+    overrides in REQUEST_ROUTE_BUDGETS = {"finance:home": {"queries": 10, "ms": 200}}.
+
+    Runs natively under ASGI too, so async views aren't forced back to sync.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_budget = getattr(settings, "REQUEST_QUERY_BUDGET", None)
+        self.latency_budget = getattr(settings, "REQUEST_LATENCY_BUDGET_MS", None)
+        self.route_budgets = getattr(settings, "REQUEST_ROUTE_BUDGETS", {})
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        request._timings = timings
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                self._wrap_connections(stack, timings)
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self._finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        request._timings = timings
+        started = time.perf_counter()
+        # Connections are per thread: wrap the ones on the request's sync
+        # thread, where the async ORM and sync_to_async run the queries
+        stack = ExitStack()
+        await sync_to_async(self._wrap_connections)(stack, timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            current_timings.reset(token)
+        return self._finish(request, response, timings, started)
+
+    @staticmethod
+    def _wrap_connections(stack, timings):
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(timings))
+
+    def _finish(self, request, response, timings, started):
+        finished = time.perf_counter()
+        total = (finished - started) * 1000
+
+        # From process_view until the response comes back (includes the cheap
+        # response phase of middleware listed after this one)
+        view_started = getattr(request, "_view_started", None)
+        if view_started is not None:
+            timings.sections["view"] = (finished - view_started) * 1000
+        # Context processors run inside the template render
+        timings.sections["tpl"] = max(timings.sections["tpl"] - timings.sections["ctx"], 0.0)
+
+        response["Server-Timing"] = ", ".join(
+            [f"{name};dur={ms:.1f}" for name, ms in timings.sections.items()] + [f"total;dur={total:.1f}"]
+        )
+        response["X-DB-Queries"] = str(timings.queries)
+        self._log(request, response, timings, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
+        return None
+
+    def _budget_for(self, route):
+        budget = {"queries": self.query_budget, "ms": self.latency_budget}
+        budget.update(self.route_budgets.get(route, {}))
+        return budget
+
+    def _log(self, request, response, timings, total):
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match else None
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": response.status_code,
+            "total_ms": round(total, 1),
+            "queries": timings.queries,
+            **{f"{name}_ms": round(ms, 1) for name, ms in timings.sections.items()},
+        }
+        logger.info(json.dumps(record))
+
+        budget = self._budget_for(route)
+        over = []
+        if budget["queries"] is not None and timings.queries > budget["queries"]:
+            over.append(f"{timings.queries} queries > {budget['queries']}")
+        if budget["ms"] is not None and total > budget["ms"]:
+            over.append(f"{total:.0f}ms > {budget['ms']}ms")
+        if over:
+            logger.warning("Request budget exceeded for %s (%s): %s", route, request.path, "; ".join(over))
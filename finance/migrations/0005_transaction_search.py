@@ -0,0 +1,59 @@
+# Search index for transaction notes (finance/search.py). The index type
+# depends on the database, so the SQL is chosen at migrate time.
+#
+# SQLite: an external-content FTS5 table kept in sync by triggers. Django
+# rebuilds a SQLite table for some ALTERs, which drops its triggers; run
+# this migration's forwards() again (or migrate back to 0004 and forwards)
+# after such a change to finance_transaction.
+
+from django.db import migrations
+
+SQLITE_FORWARDS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS finance_transaction_fts USING fts5("
+    "note, content='finance_transaction', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS finance_transaction_fts_ai AFTER INSERT ON finance_transaction BEGIN "
+    "INSERT INTO finance_transaction_fts(rowid, note) VALUES (new.id, new.note); END",
+    "CREATE TRIGGER IF NOT EXISTS finance_transaction_fts_ad AFTER DELETE ON finance_transaction BEGIN "
+    "INSERT INTO finance_transaction_fts(finance_transaction_fts, rowid, note) VALUES ('delete', old.id, old.note); END",
+    "CREATE TRIGGER IF NOT EXISTS finance_transaction_fts_au AFTER UPDATE OF note ON finance_transaction BEGIN "
+    "INSERT INTO finance_transaction_fts(finance_transaction_fts, rowid, note) VALUES ('delete', old.id, old.note); "
+    "INSERT INTO finance_transaction_fts(rowid, note) VALUES (new.id, new.note); END",
+    "INSERT INTO finance_transaction_fts(finance_transaction_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS finance_transaction_fts_ai",
+    "DROP TRIGGER IF EXISTS finance_transaction_fts_ad",
+    "DROP TRIGGER IF EXISTS finance_transaction_fts_au",
+    "DROP TABLE IF EXISTS finance_transaction_fts",
+]
+
+# PostgreSQL: trigram GIN index on the expression icontains compiles to
+POSTGRES_FORWARDS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS tx_note_trgm_idx ON finance_transaction USING gin (UPPER(note) gin_trgm_ops)",
+]
+POSTGRES_BACKWARDS = [
+    "DROP INDEX IF EXISTS tx_note_trgm_idx",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+forwards = _run({"sqlite": SQLITE_FORWARDS, "postgresql": POSTGRES_FORWARDS})
+backwards = _run({"sqlite": SQLITE_BACKWARDS, "postgresql": POSTGRES_BACKWARDS})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_recurringtransaction'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
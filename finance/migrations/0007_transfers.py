@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:41
+
+import importlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Widening `type` makes SQLite rebuild finance_transaction, which drops the
+# note search triggers; install them again (and reindex) afterwards
+search_index = importlib.import_module('finance.migrations.0005_transaction_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_currencies'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, search_index.forwards),
+        migrations.AddField(
+            model_name='transaction',
+            name='counterpart',
+            field=models.ForeignKey(blank=True, null=True, db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='finance.transaction'),
+        ),
+        migrations.AlterField(
+            model_name='monthlyrollup',
+            name='type',
+            field=models.CharField(choices=[('income', 'Income'), ('expense', 'Expense'), ('transfer_in', 'Transfer in'), ('transfer_out', 'Transfer out')], max_length=12),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='type',
+            field=models.CharField(choices=[('income', 'Income'), ('expense', 'Expense'), ('transfer_in', 'Transfer in'), ('transfer_out', 'Transfer out')], max_length=12),
+        ),
+        migrations.RunPython(search_index.forwards, migrations.RunPython.noop),
+    ]
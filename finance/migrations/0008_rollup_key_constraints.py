@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_rollups(apps, schema_editor):
+    """
+    Rollups of accounts without an owner are never read; drop them. Rows
+    that share a key (possible for uncategorised rows under the old unique
+    index) are merged into one.
+    """
+    MonthlyRollup = apps.get_model('finance', 'MonthlyRollup')
+    MonthlyRollup.objects.filter(user__isnull=True).delete()
+    duplicates = (
+        MonthlyRollup.objects
+        .values('user_id', 'account_id', 'category_id', 'type', 'month')
+        .annotate(rows=Count('id'), keep=Min('id'), sum_total=Sum('total'), sum_count=Sum('count'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for row in list(duplicates):
+        MonthlyRollup.objects.filter(id=row['keep']).update(total=row['sum_total'], count=row['sum_count'])
+        MonthlyRollup.objects.filter(
+            user_id=row['user_id'], account_id=row['account_id'], category_id=row['category_id'],
+            type=row['type'], month=row['month'],
+        ).exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_transfers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rollups, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='monthlyrollup',
+            unique_together=set(),
+        ),
+        migrations.AlterField(
+            model_name='monthlyrollup',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('user', 'account', 'category', 'type', 'month'), name='rollup_key_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('user', 'account', 'type', 'month'), name='rollup_uncategorised_key_uniq'),
+        ),
+    ]
@@ -1,5 +1,6 @@
-from django.db import models
-from django.core.validators import MinValueValidator
+from django.conf import settings
+from django.db import models, transaction
+from django.core.validators import MinValueValidator, RegexValidator
 from django.utils import timezone
 from userauths.models import User
 
@@ -8,6 +9,14 @@ from django.dispatch import receiver
 
 from .constants import DEFAULT_ACCOUNT_ICONS
 
+# ISO 4217 codes, e.g. "INR", "USD"
+currency_code_validator = RegexValidator(r"^[A-Z]{3}$", "Use a three-letter currency code such as USD.")
+
+
+def default_currency():
+    return getattr(settings, "FINANCE_BASE_CURRENCY", "INR")
+
+
 class Customer(models.Model):
     user = models.OneToOneField(User, null=True, blank=True, on_delete=models.CASCADE)
     name = models.CharField(max_length=200, null=True)
@@ -25,6 +34,9 @@ class Account(models.Model):
     initial_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0.0)
     balance = models.DecimalField(max_digits=12, decimal_places=2, default=0.0)
     icon = models.CharField(max_length=5, choices=ICON_CHOICES, default="🐖")
+    # Balances, transactions and rollups are kept in this currency;
+    # totals are converted to the user's base currency when read (finance.fx)
+    currency = models.CharField(max_length=3, default=default_currency, validators=[currency_code_validator])
 
     class Meta:
         unique_together = ('user', 'name')
@@ -48,7 +60,61 @@ class Category(models.Model):
     def __str__(self):
         return f"{self.name} ({self.type})"
 
+class RecurringTransaction(models.Model):
+    """
+    A transaction that repeats every `interval` days, weeks, months or years
+    from `start_date`. `python manage.py materialize_recurring` creates the
+    occurrences that have come due; `next_date` is the first one not created yet.
+    """
+    FREQUENCIES = (('daily', 'Daily'), ('weekly', 'Weekly'), ('monthly', 'Monthly'), ('yearly', 'Yearly'))
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        validators=[MinValueValidator(0.01)]
+    )
+    type = models.CharField(
+        max_length=10,
+        choices=[('income', 'Income'), ('expense', 'Expense')]
+    )
+    note = models.CharField(max_length=255, blank=True)
+    frequency = models.CharField(max_length=10, choices=FREQUENCIES, default='monthly')
+    interval = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1)])
+    start_date = models.DateField(default=timezone.now)
+    end_date = models.DateField(null=True, blank=True)
+    next_date = models.DateField(null=True, blank=True)
+    active = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            # Materialization: active schedules that have come due
+            models.Index(fields=['active', 'next_date'], name='recurring_due_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.next_date is None:
+            self.next_date = self.start_date
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.type} - {self.account.currency} {self.amount} {self.get_frequency_display().lower()}"
+
+
 class Transaction(models.Model):
+    # A transfer is a transfer_out / transfer_in pair with no category, each
+    # leg pointing at the other (finance.transfers); income and expense
+    # figures leave transfers out
+    TYPES = [
+        ('income', 'Income'),
+        ('expense', 'Expense'),
+        ('transfer_in', 'Transfer in'),
+        ('transfer_out', 'Transfer out'),
+    ]
+    TRANSFER_TYPES = ('transfer_in', 'transfer_out')
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -63,15 +129,56 @@ class Transaction(models.Model):
         decimal_places=2,
         validators=[MinValueValidator(0.01)]
     )
-    type = models.CharField(
-        max_length=10,
-        choices=[('income', 'Income'), ('expense', 'Expense')]
-    )
+    type = models.CharField(max_length=12, choices=TYPES)
     note = models.CharField(max_length=255, blank=True)
     date = models.DateField(default=timezone.now)
+    # The other leg of a transfer. Unconstrained so ordinary deletes don't
+    # look for it: the delete view removes both legs, and deleting an
+    # account unlinks the legs left in other accounts (finance.signals)
+    counterpart = models.ForeignKey(
+        'self',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    recurring = models.ForeignKey(
+        RecurringTransaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='occurrences'
+    )
+
+    class Meta:
+        constraints = [
+            # One occurrence per schedule and date, however often it's materialized
+            models.UniqueConstraint(fields=['recurring', 'date'], name='tx_recurring_date_uniq'),
+        ]
+        indexes = [
+            # Month views: account__user + date range
+            models.Index(fields=['account', 'date'], name='tx_account_date_idx'),
+            models.Index(fields=['user', 'date'], name='tx_user_date_idx'),
+            # Balance reconciliation: per-account income/expense sums
+            models.Index(fields=['account', 'type'], name='tx_account_type_idx'),
+            # Budget spent: user + expense + category + month range
+            models.Index(fields=['user', 'type', 'category', 'date'], name='tx_user_type_cat_date_idx'),
+        ]
+
+    @property
+    def is_transfer(self):
+        # By type: a leg whose other half was deleted is still a transfer
+        return self.type in self.TRANSFER_TYPES
+
+    def save(self, *args, **kwargs):
+        # The ledger signals lock the stored row in pre_save and apply the
+        # balance / rollup deltas in post_save: one DB transaction for both
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.type} - Rs {self.amount}"
+        return f"{self.type} - {self.account.currency} {self.amount}"
 
 
 class Budget(models.Model):
@@ -102,6 +209,69 @@ class Budget(models.Model):
     class Meta:
         unique_together = ('user', 'category', 'month', 'year')
         ordering = ['-year', '-month']
+        indexes = [
+            models.Index(fields=['user', 'year', 'month'], name='budget_user_period_idx'),
+        ]
+
+    def __str__(self):
+        # Budgets are set in the user's base currency
+        currency = getattr(self.user, "base_currency", "") or default_currency()
+        return f"{self.category.name} - {currency} {self.amount} ({self.month}/{self.year})"
+
+
+class MonthlyRollup(models.Model):
+    """
+    Running totals per user, account, category, type and month.
+    Kept up to date by the transaction signals; rebuild with
+    `python manage.py rebuild_rollups`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='rollups')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='rollups')
+    type = models.CharField(max_length=12, choices=Transaction.TYPES)
+    month = models.DateField()  # first day of the month
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        # One row per key. A plain unique index would let uncategorised rows
+        # (category NULL, e.g. transfers) repeat, since NULLs never collide
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'account', 'category', 'type', 'month'],
+                condition=models.Q(category__isnull=False),
+                name='rollup_key_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'account', 'type', 'month'],
+                condition=models.Q(category__isnull=True),
+                name='rollup_uncategorised_key_uniq',
+            ),
+        ]
+        indexes = [
+            # Dashboard reads: user + month range, grouped by type/category
+            models.Index(fields=['user', 'month', 'type'], name='rollup_user_month_type_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%b %Y} {self.type} - {self.account.currency} {self.total}"
+
+
+class FxRate(models.Model):
+    """
+    One unit of `currency` is worth `rate` units of `base` from `date` on.
+    Loaded from a file with `python manage.py load_fx_rates`.
+    """
+    base = models.CharField(max_length=3, validators=[currency_code_validator])
+    currency = models.CharField(max_length=3, validators=[currency_code_validator])
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+
+    class Meta:
+        constraints = [
+            # Also the index for "latest rate on or before a date"
+            models.UniqueConstraint(fields=['base', 'currency', 'date'], name='fxrate_pair_date_uniq'),
+        ]
 
     def __str__(self):
-        return f"{self.category.name} - Rs {self.amount} ({self.month}/{self.year})"
+        return f"{self.date} 1 {self.currency} = {self.rate} {self.base}"
@@ -0,0 +1,165 @@
+# finance/recurring.py
+# Materializes due occurrences of recurring transactions with bulk inserts
+import calendar
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import RecurringTransaction, Transaction
+from .signals import LedgerDeltas
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+# ---------------------------
+# SCHEDULES
+# ---------------------------
+def _step(schedule):
+    """
+    ('days' | 'months', how many per occurrence).
+    """
+    if schedule.frequency == "daily":
+        return "days", schedule.interval
+    if schedule.frequency == "weekly":
+        return "days", 7 * schedule.interval
+    if schedule.frequency == "yearly":
+        return "months", 12 * schedule.interval
+    return "months", schedule.interval
+
+
+def occurrence(schedule, n):
+    """
+    The n-th occurrence (0 = start_date). Monthly and yearly dates keep the
+    start's day of month, clamped to short months (Jan 31, Feb 28, Mar 31).
+    """
+    unit, size = _step(schedule)
+    start = schedule.start_date
+    if unit == "days":
+        return start + timedelta(days=n * size)
+    months = start.month - 1 + n * size
+    year, month = start.year + months // 12, months % 12 + 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def _index(schedule, day):
+    """
+    Which occurrence `day` is (rounded down).
+    """
+    unit, size = _step(schedule)
+    start = schedule.start_date
+    if unit == "days":
+        return (day - start).days // size
+    return ((day.year - start.year) * 12 + day.month - start.month) // size
+
+
+def due_dates(schedule, today):
+    """
+    Every occurrence from next_date up to `today` (and end_date), plus the
+    next_date that follows them.
+    """
+    last = min(today, schedule.end_date) if schedule.end_date else today
+    first = schedule.next_date or schedule.start_date
+    n = _index(schedule, first)
+    day = occurrence(schedule, n)
+    while day < first:
+        n += 1
+        day = occurrence(schedule, n)
+    dates = []
+    while day <= last:
+        dates.append(day)
+        n += 1
+        day = occurrence(schedule, n)
+    return dates, day
+
+
+# ---------------------------
+# MATERIALIZE
+# ---------------------------
+class MaterializeResult:
+    def __init__(self):
+        self.created = 0
+        self.schedules = 0
+        self.finished = 0
+        self.accounts = set()
+        self.started = time.monotonic()
+        self.seconds = 0.0
+
+
+def materialize_recurring(today=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Creates every occurrence of every active schedule that is due by `today`,
+    catching up on missed periods in the same pass. Idempotent: occurrences
+    and the schedules' next_date commit together, and (recurring, date) is
+    unique.
+
+    Due schedules are read in id-ordered chunks; each chunk is one bulk
+    insert plus one UPDATE per distinct new next_date. Balance and rollup deltas are
+    summed over the whole run and written once per account / rollup key at
+    the end, in the same DB transaction. `progress(result)` is called after
+    every chunk.
+    """
+    today = today or date.today()
+    result = MaterializeResult()
+    ledger = LedgerDeltas()
+
+    due = (
+        RecurringTransaction.objects
+        .filter(active=True, next_date__lte=today)
+        .annotate(owner_id=F("account__user_id"))
+        .order_by("id")
+    )
+    with transaction.atomic():
+        last_id = 0
+        while True:
+            # Concurrent runs skip each other's schedules (PostgreSQL)
+            chunk = list(due.filter(id__gt=last_id).select_for_update(skip_locked=True, of=("self",))[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+
+            planned = {schedule.id: due_dates(schedule, today) for schedule in chunk}
+            existing = set(
+                Transaction.objects
+                .filter(recurring_id__in=list(planned), date__gte=min(s.next_date for s in chunk))
+                .values_list("recurring_id", "date")
+            )
+
+            objs = []
+            for schedule in chunk:
+                dates, next_date = planned[schedule.id]
+                for day in dates:
+                    if (schedule.id, day) in existing:
+                        continue
+                    tx = Transaction(
+                        user_id=schedule.owner_id, account_id=schedule.account_id,
+                        category_id=schedule.category_id, amount=schedule.amount,
+                        type=schedule.type, date=day, note=schedule.note, recurring=schedule,
+                    )
+                    objs.append(tx)
+                    ledger.add(tx, user_id=schedule.owner_id)
+                schedule.next_date = next_date
+                if schedule.end_date and next_date > schedule.end_date:
+                    schedule.active = False
+                    result.finished += 1
+
+            Transaction.objects.bulk_create(objs)
+            # Schedules on the same cycle share their next date: one UPDATE each
+            advanced = defaultdict(list)
+            for schedule in chunk:
+                advanced[(schedule.next_date, schedule.active)].append(schedule.id)
+            for (next_date, active), ids in advanced.items():
+                RecurringTransaction.objects.filter(id__in=ids).update(next_date=next_date, active=active)
+            result.created += len(objs)
+            result.schedules += len(chunk)
+            result.seconds = time.monotonic() - result.started
+            if progress:
+                progress(result)
+
+        ledger.apply()
+
+    result.accounts.update(ledger.balances)
+    result.seconds = time.monotonic() - result.started
+    return result
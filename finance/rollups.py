@@ -0,0 +1,246 @@
+# finance/rollups.py
+# Monthly ledger rollups: incremental updates, reads and full rebuilds.
+# Rollups are in their account's currency; reads convert to the user's base.
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from .fx import base_currency, in_base
+from .models import Budget, MonthlyRollup, Transaction
+
+
+# ---------------------------
+# HELPERS
+# ---------------------------
+def month_start(day):
+    """
+    Returns the first day of the month `day` falls in.
+    """
+    return day.replace(day=1)
+
+
+def _key(user_id, account_id, category_id, tx_type, day):
+    return {
+        "user_id": user_id,
+        "account_id": account_id,
+        "category_id": category_id,
+        "type": tx_type,
+        "month": month_start(day),
+    }
+
+
+# ---------------------------
+# INCREMENTAL UPDATES
+# ---------------------------
+def apply_rollup_delta(user_id, account_id, category_id, tx_type, day, amount, count):
+    """
+    Adds `amount` / `count` to the rollup row for this key, creating it if needed.
+    Uses F() expressions so concurrent writers don't overwrite each other.
+    Accounts without an owner have no rollups.
+    """
+    if user_id is None:
+        return
+    key = _key(user_id, account_id, category_id, tx_type, day)
+    updated = MonthlyRollup.objects.filter(**key).update(
+        total=F("total") + amount, count=F("count") + count
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            MonthlyRollup.objects.create(total=amount, count=count, **key)
+    except IntegrityError:
+        # Another writer created the row first
+        MonthlyRollup.objects.filter(**key).update(
+            total=F("total") + amount, count=F("count") + count
+        )
+
+
+def fold_category_rollups(category):
+    """
+    Moves a category's rollups into the uncategorised bucket before the
+    category is deleted (its transactions are SET_NULL in the same way).
+    """
+    for r in MonthlyRollup.objects.filter(category=category):
+        apply_rollup_delta(r.user_id, r.account_id, None, r.type, r.month, r.total, r.count)
+    MonthlyRollup.objects.filter(category=category).delete()
+
+
+# ---------------------------
+# READS
+# ---------------------------
+def _month_totals_query(user, start, end):
+    end = end or start
+    return (
+        MonthlyRollup.objects
+        .filter(user=user, month__range=(month_start(start), month_start(end)))
+        .exclude(type__in=Transaction.TRANSFER_TYPES)
+        .values("type")
+        .annotate(total=Sum(in_base("total", base_currency(user))))
+    )
+
+
+def _totals_by_type(rows):
+    totals = {"income": Decimal("0"), "expense": Decimal("0")}
+    for row in rows:
+        totals[row["type"]] = row["total"] or Decimal("0")
+    return totals
+
+
+def month_totals(user, start, end=None):
+    """
+    Returns {'income': Decimal, 'expense': Decimal} in the user's base
+    currency for the months from `start` to `end` (inclusive, defaults to
+    the month of `start`).
+    """
+    return _totals_by_type(_month_totals_query(user, start, end))
+
+
+async def amonth_totals(user, start, end=None):
+    """
+    Async month_totals.
+    """
+    return _totals_by_type([row async for row in _month_totals_query(user, start, end)])
+
+
+def _category_totals_query(user, start, end, tx_type):
+    end = end or start
+    qs = MonthlyRollup.objects.filter(
+        user=user, month__range=(month_start(start), month_start(end))
+    )
+    qs = qs.filter(type=tx_type) if tx_type else qs.exclude(type__in=Transaction.TRANSFER_TYPES)
+    return qs.values("category_id").annotate(total=Sum(in_base("total", base_currency(user))))
+
+
+def category_totals(user, start, end=None, tx_type=None):
+    """
+    Returns {category_id: Decimal} summed over the months from `start` to
+    `end`, in the user's base currency.
+    """
+    return {
+        row["category_id"]: row["total"] or Decimal("0")
+        for row in _category_totals_query(user, start, end, tx_type)
+    }
+
+
+async def acategory_totals(user, start, end=None, tx_type=None):
+    """
+    Async category_totals.
+    """
+    return {
+        row["category_id"]: row["total"] or Decimal("0")
+        async for row in _category_totals_query(user, start, end, tx_type)
+    }
+
+
+def budget_status(user, keys):
+    """
+    Spent vs budget for a set of (category_id, month) keys in two queries,
+    whatever the size of the ledger. Spent is in the user's base currency.
+    Returns {(category_id, month_start): {'spent': Decimal, 'budget': Decimal}}.
+    """
+    keys = {(category_id, month_start(month)) for category_id, month in keys if category_id}
+    status = {key: {"spent": Decimal("0"), "budget": Decimal("0")} for key in keys}
+    if not keys:
+        return status
+
+    category_ids = {category_id for category_id, _ in keys}
+    months = {month for _, month in keys}
+    spent_rows = (
+        MonthlyRollup.objects
+        .filter(user=user, type="expense", category_id__in=category_ids, month__in=months)
+        .values("category_id", "month")
+        .annotate(total=Sum(in_base("total", base_currency(user))))
+    )
+    for row in spent_rows:
+        key = (row["category_id"], row["month"])
+        if key in status:
+            status[key]["spent"] = row["total"] or Decimal("0")
+
+    budget_rows = Budget.objects.filter(
+        user=user, category_id__in=category_ids,
+        year__in={m.year for m in months}, month__in={m.month for m in months},
+    ).values("category_id", "year", "month", "amount")
+    for row in budget_rows:
+        key = (row["category_id"], date(row["year"], row["month"], 1))
+        if key in status:
+            status[key]["budget"] = row["amount"]
+    return status
+
+
+# ---------------------------
+# REBUILD / CHECK
+# ---------------------------
+def _raw_rollups(user=None):
+    """
+    Aggregates raw transactions into rollup-shaped rows.
+    """
+    qs = Transaction.objects.filter(account__user__isnull=False)
+    if user is not None:
+        qs = qs.filter(account__user=user)
+    return (
+        qs.annotate(month=TruncMonth("date"))
+        .values("account__user_id", "account_id", "category_id", "type", "month")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+
+
+def rebuild_rollups(user=None, batch_size=1000):
+    """
+    Drops and recreates rollups from raw transactions. Returns rows written.
+    """
+    with transaction.atomic():
+        existing = MonthlyRollup.objects.all()
+        if user is not None:
+            existing = existing.filter(user=user)
+        existing.delete()
+
+        rows = [
+            MonthlyRollup(
+                user_id=row["account__user_id"],
+                account_id=row["account_id"],
+                category_id=row["category_id"],
+                type=row["type"],
+                month=row["month"],
+                total=row["total"],
+                count=row["count"],
+            )
+            for row in _raw_rollups(user).iterator()
+        ]
+        MonthlyRollup.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def check_rollups(user=None):
+    """
+    Compares stored rollups with raw transactions.
+    Returns a list of (key, expected, actual) tuples for every mismatch.
+    """
+    def key_of(row, user_field):
+        return (row[user_field], row["account_id"], row["category_id"], row["type"], row["month"])
+
+    expected = {
+        key_of(row, "account__user_id"): (row["total"], row["count"])
+        for row in _raw_rollups(user).iterator()
+    }
+
+    stored_qs = MonthlyRollup.objects.all()
+    if user is not None:
+        stored_qs = stored_qs.filter(user=user)
+    actual = defaultdict(lambda: (Decimal("0"), 0))
+    for row in stored_qs.values("user_id", "account_id", "category_id", "type", "month", "total", "count"):
+        total, count = actual[key_of(row, "user_id")]
+        actual[key_of(row, "user_id")] = (total + row["total"], count + row["count"])
+
+    mismatches = []
+    for key in set(expected) | set(actual):
+        exp = expected.get(key, (Decimal("0"), 0))
+        act = actual.get(key, (Decimal("0"), 0))
+        if exp != act:
+            mismatches.append((key, exp, act))
+    return mismatches
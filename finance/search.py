@@ -0,0 +1,140 @@
+# finance/search.py
+# Ranked search over transaction notes plus category and account names.
+# Notes are indexed per backend (migration 0005): a pg_trgm GIN index on
+# UPPER(note) on PostgreSQL, an FTS5 table kept in sync by triggers on SQLite.
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection
+from django.db.models import FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Account, Category, Transaction
+
+PAGE_SIZE = 50
+MAX_TERMS = 8
+FTS_TABLE = "finance_transaction_fts"
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchError(ValueError):
+    """
+    A search that can't run: no terms, or a malformed filter.
+    """
+
+
+class WordSimilarity(Func):
+    # pg_trgm: how well the query matches the best part of the note
+    function = "word_similarity"
+    output_field = FloatField()
+
+
+def _terms(query):
+    terms = [t.lower() for t in _WORD.findall(query or "")][:MAX_TERMS]
+    if not terms:
+        raise SearchError("enter something to search for")
+    return terms
+
+
+def _fts_phrase(term):
+    # Quoted so FTS5 syntax in the input is taken literally; * = prefix match
+    return '"%s"*' % term.replace('"', '""')
+
+
+def _note_match(term):
+    """
+    Q for transactions whose note contains `term`, using the note index.
+    """
+    if connection.vendor == "sqlite":
+        return Q(id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [_fts_phrase(term)]))
+    # UPPER(note) LIKE UPPER('%term%'): what the trigram index covers
+    return Q(note__icontains=term)
+
+
+def _rank(query, terms):
+    if connection.vendor == "sqlite":
+        # bm25 is lower for better matches; rows matched by name only get 0
+        match = " OR ".join(_fts_phrase(t) for t in terms)
+        return RawSQL(
+            f"COALESCE((SELECT -rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"AND rowid = finance_transaction.id), 0)",
+            [match],
+            output_field=FloatField(),
+        )
+    if connection.vendor == "postgresql":
+        return WordSimilarity(Value(query), "note")
+    return Value(0.0, output_field=FloatField())
+
+
+def parse_filters(params):
+    """
+    Amount / date / type filters from a QueryDict or dict:
+    min_amount, max_amount, start, end (YYYY-MM-DD), type.
+    """
+    filters = {}
+    try:
+        for name in ("min_amount", "max_amount"):
+            if params.get(name):
+                filters[name] = Decimal(params[name])
+        for name in ("start", "end"):
+            if params.get(name):
+                filters[name] = date.fromisoformat(params[name])
+    except (InvalidOperation, ValueError):
+        raise SearchError("invalid amount or date filter")
+    if params.get("type"):
+        if params["type"] not in ("income", "expense"):
+            raise SearchError("type must be income or expense")
+        filters["tx_type"] = params["type"]
+    return filters
+
+
+def search_transactions(user, query, page=1, page_size=PAGE_SIZE, min_amount=None, max_amount=None,
+                        start=None, end=None, tx_type=None):
+    """
+    The user's transactions where every word of `query` appears in the
+    note, the category name or the account name (notes match on word
+    prefixes on SQLite, substrings on PostgreSQL). Best note matches first,
+    then newest. Offset-paginated without a COUNT.
+
+    Returns (transactions, has_next). Three queries: the user's category
+    and account names, then the page.
+    """
+    terms = _terms(query)
+    if page < 1:
+        raise SearchError("page must be 1 or more")
+
+    # Names live in two small per-user tables: match them here and search
+    # transactions by id, so every OR branch below has an index
+    names = [
+        ("category_id", {c.id: c.name.lower() for c in Category.objects.filter(user=user).only("id", "name")}),
+        ("account_id", {a.id: a.name.lower() for a in Account.objects.filter(user=user).only("id", "name")}),
+    ]
+
+    qs = Transaction.objects.filter(account__user=user)
+    for term in terms:
+        match = _note_match(term)
+        for field, by_id in names:
+            ids = [pk for pk, name in by_id.items() if term in name]
+            if ids:
+                match |= Q(**{f"{field}__in": ids})
+        qs = qs.filter(match)
+
+    if min_amount is not None:
+        qs = qs.filter(amount__gte=min_amount)
+    if max_amount is not None:
+        qs = qs.filter(amount__lte=max_amount)
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    if tx_type:
+        qs = qs.filter(type=tx_type)
+
+    offset = (page - 1) * page_size
+    rows = list(
+        qs.select_related("category", "account")
+        .annotate(rank=_rank(" ".join(terms), terms))
+        .order_by("-rank", "-date", "-id")[offset:offset + page_size + 1]
+    )
+    return rows[:page_size], len(rows) > page_size
@@ -1,10 +1,18 @@
-from django.db.models.signals import post_save, post_delete
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.db import transaction
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from django.db.models import Sum, DecimalField
+from django.db.models import Sum, DecimalField, F, Q
 from django.db.models.functions import Coalesce
-from .models import Account, Transaction, Category
+from .models import Account, Budget, Transaction, Category
 from .constants import DEFAULT_CATEGORIES, DEFAULT_ACCOUNTS
+from .rollups import apply_rollup_delta, fold_category_rollups, month_start
+from .cache import bump_data_version, month_scope
 
 User = get_user_model()
 
@@ -12,22 +20,41 @@ User = get_user_model()
 # Default categories/accounts
 # -----------------------------
 def create_default_categories(user):
-    for c_type, items in DEFAULT_CATEGORIES.items():
-        for name, icon, color in items:
-            Category.objects.get_or_create(
-                user=user,
-                name=name,
-                type=c_type,
-                defaults={'icon': icon, 'color': color}
-            )
+    """
+    Adds any missing default categories in one INSERT; existing ones
+    (same name and type) are left alone.
+    """
+    Category.objects.bulk_create(
+        [
+            Category(user=user, name=name, type=c_type, icon=icon, color=color)
+            for c_type, items in DEFAULT_CATEGORIES.items()
+            for name, icon, color in items
+        ],
+        ignore_conflicts=True,
+    )
 
 def create_default_accounts(user):
-    for name, icon, amount in DEFAULT_ACCOUNTS:
-        Account.objects.get_or_create(
-            user=user,
-            name=name,
-            defaults={'icon': icon, 'initial_amount': amount, 'balance': amount}
-        )
+    """
+    Adds any missing default accounts in one INSERT; existing ones (same
+    name) are left alone.
+    """
+    Account.objects.bulk_create(
+        [
+            Account(user=user, name=name, icon=icon, initial_amount=amount, balance=amount)
+            for name, icon, amount in DEFAULT_ACCOUNTS
+        ],
+        ignore_conflicts=True,
+    )
+
+def provision_defaults(user):
+    """
+    Default categories and accounts for `user` in one transaction. bulk_create
+    skips the per-row post_save handlers, so the cache versions are bumped here.
+    """
+    with transaction.atomic():
+        create_default_categories(user)
+        create_default_accounts(user)
+        bump_data_version(user.pk, ["categories", "accounts"])
 
 # -----------------------------
 # Guest user
@@ -40,38 +67,220 @@ def get_or_create_guest_user():
     if created:
         guest.set_unusable_password()
         guest.save()
-        create_default_categories(guest)
-        create_default_accounts(guest)
+        provision_defaults(guest)
     return guest
 
 # -----------------------------
-# Recalculate account balance
+# Balance deltas
+# -----------------------------
+# Transaction types that add to their account's balance
+CREDIT_TYPES = ('income', 'transfer_in')
+
+def signed_amount(tx_type, amount):
+    """
+    How much a transaction moves its account's balance.
+    """
+    return amount if tx_type in CREDIT_TYPES else -amount
+
+def apply_balance_delta(account_id, delta):
+    """
+    Adds `delta` to the stored balance in a single UPDATE, so concurrent
+    writes to the same account can't overwrite each other.
+    """
+    if delta:
+        Account.objects.filter(pk=account_id).update(balance=F('balance') + delta)
+
+def find_balance_drift(accounts=None):
+    """
+    Compares stored balances with initial_amount + credits - debits (see
+    CREDIT_TYPES) computed from raw transactions in one grouped query.
+    Returns a list of (account, expected_balance) for accounts that drifted.
+    """
+    accounts = Account.objects.all() if accounts is None else accounts
+    rows = accounts.annotate(
+        income=Coalesce(Sum('transaction__amount', filter=Q(transaction__type__in=CREDIT_TYPES)), 0, output_field=DecimalField()),
+        expense=Coalesce(Sum('transaction__amount', filter=~Q(transaction__type__in=CREDIT_TYPES)), 0, output_field=DecimalField()),
+    ).order_by('id')
+    drifted = []
+    for account in rows:
+        expected = account.initial_amount + account.income - account.expense
+        if account.balance != expected:
+            drifted.append((account, expected))
+    return drifted
+
+# -----------------------------
+# Monthly rollups
+# -----------------------------
+def _rollup_state(instance):
+    """
+    The fields of a transaction that decide which rollup row it counts towards.
+    """
+    return {
+        "user_id": instance.account.user_id,
+        "account_id": instance.account_id,
+        "category_id": instance.category_id,
+        "type": instance.type,
+        "date": instance.date,
+        "amount": instance.amount,
+    }
+
+def _apply_rollup(state, sign):
+    apply_rollup_delta(
+        state["user_id"], state["account_id"], state["category_id"],
+        state["type"], state["date"], sign * state["amount"], sign
+    )
+
+# -----------------------------
+# Deferred ledger updates
 # -----------------------------
-def recalc_account_balance(account):
+_ledger_updates_deferred = ContextVar("ledger_updates_deferred", default=False)
+
+@contextmanager
+def deferred_ledger_updates():
     """
-    Recalculate balance: initial_amount + sum(income) - sum(expense)
+    Inside this block the transaction signals leave balances, rollups and
+    data versions alone. The caller applies the combined deltas itself once
+    per account / rollup key (see LedgerDeltas).
     """
-    income = Transaction.objects.filter(account=account, type='income').aggregate(
-        total=Coalesce(Sum('amount'), 0, output_field=DecimalField())
-    )['total']
-    
-    expense = Transaction.objects.filter(account=account, type='expense').aggregate(
-        total=Coalesce(Sum('amount'), 0, output_field=DecimalField())
-    )['total']
-    
-    account.balance = account.initial_amount + income - expense
-    account.save()
+    token = _ledger_updates_deferred.set(True)
+    try:
+        yield
+    finally:
+        _ledger_updates_deferred.reset(token)
+
+class LedgerDeltas:
+    """
+    Balance and rollup changes summed over many transactions, for writes the
+    transaction signals don't see (bulk inserts, deferred_ledger_updates).
+    apply() writes each account and rollup key once and bumps the data
+    version of every user and month touched.
+    """
+    def __init__(self, user_id=None):
+        self.user_id = user_id
+        self.balances = defaultdict(Decimal)
+        self.rollups = defaultdict(lambda: [Decimal("0"), 0])
+
+    def add(self, tx, sign=1, user_id=None):
+        """
+        Counts `tx` in (sign=1) or takes it back out (sign=-1). `user_id`
+        defaults to the one given to the constructor.
+        """
+        self.balances[tx.account_id] += sign * signed_amount(tx.type, tx.amount)
+        key = (user_id or self.user_id, tx.account_id, tx.category_id, tx.type, month_start(tx.date))
+        delta = self.rollups[key]
+        delta[0] += sign * tx.amount
+        delta[1] += sign
+
+    def apply(self):
+        for account_id, delta in self.balances.items():
+            apply_balance_delta(account_id, delta)
+        months_by_user = defaultdict(set)
+        for (user_id, account_id, category_id, tx_type, month), (total, count) in self.rollups.items():
+            if total or count:
+                apply_rollup_delta(user_id, account_id, category_id, tx_type, month, total, count)
+            months_by_user[user_id].add(month)
+        for user_id, months in months_by_user.items():
+            bump_data_version(user_id, [month_scope(m) for m in months])
 
 # -----------------------------
 # Signals for transactions
 # -----------------------------
+@receiver(pre_save, sender=Transaction)
+def capture_previous_state(sender, instance, **kwargs):
+    """
+    Remember the stored version of an edited transaction so post_save can
+    take it back out of the balance and rollups. The row stays locked until
+    the save commits (Transaction.save), so a concurrent edit waits and then
+    sees this one's values instead of backing out the same old amount twice.
+    """
+    instance._previous_state = None
+    if _ledger_updates_deferred.get():
+        return
+    if instance.pk:
+        previous = Transaction.objects.select_for_update().filter(pk=instance.pk).values(
+            "account__user_id", "account_id", "category_id", "type", "date", "amount"
+        ).first()
+        if previous:
+            previous["user_id"] = previous.pop("account__user_id")
+            instance._previous_state = previous
+
 @receiver(post_save, sender=Transaction)
 def update_account_balance_on_save(sender, instance, created, **kwargs):
-    recalc_account_balance(instance.account)
+    if _ledger_updates_deferred.get():
+        return
+    current = _rollup_state(instance)
+    previous = getattr(instance, "_previous_state", None)
+
+    # Balance: take the old version out, put the new one in
+    new_delta = signed_amount(current["type"], current["amount"])
+    if previous and previous["account_id"] == current["account_id"]:
+        apply_balance_delta(current["account_id"], new_delta - signed_amount(previous["type"], previous["amount"]))
+    else:
+        if previous:
+            apply_balance_delta(previous["account_id"], -signed_amount(previous["type"], previous["amount"]))
+        apply_balance_delta(current["account_id"], new_delta)
+
+    if previous != current:
+        if previous:
+            _apply_rollup(previous, -1)
+        _apply_rollup(current, 1)
+    months = {month_scope(current["date"])}
+    if previous:
+        months.add(month_scope(previous["date"]))
+    bump_data_version(current["user_id"], months)
+
+def _is_cascade(origin):
+    """
+    True when a transaction is deleted because its account or user is; the
+    balance and rollups go away with the parent, so there is nothing to update.
+    """
+    if origin is None:
+        return False
+    return not (isinstance(origin, Transaction) or getattr(origin, "model", None) is Transaction)
 
 @receiver(post_delete, sender=Transaction)
-def update_account_balance_on_delete(sender, instance, **kwargs):
-    recalc_account_balance(instance.account)
+def update_account_balance_on_delete(sender, instance, origin=None, **kwargs):
+    if _is_cascade(origin) or _ledger_updates_deferred.get():
+        return
+    apply_balance_delta(instance.account_id, -signed_amount(instance.type, instance.amount))
+    _apply_rollup(_rollup_state(instance), -1)
+    bump_data_version(instance.account.user_id, [month_scope(instance.date)])
+
+@receiver(pre_delete, sender=Account)
+def unlink_transfers_on_account_delete(sender, instance, **kwargs):
+    # The legs in other accounts stay, as money that came in or went out
+    Transaction.objects.filter(counterpart__account=instance).exclude(account=instance).update(counterpart=None)
+
+# -----------------------------
+# Data version for cached snapshots
+# -----------------------------
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def bump_version_on_account_change(sender, instance, **kwargs):
+    bump_data_version(instance.user_id, ["accounts"])
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_version_on_category_change(sender, instance, **kwargs):
+    bump_data_version(instance.user_id, ["categories"])
+
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def bump_version_on_budget_change(sender, instance, **kwargs):
+    bump_data_version(instance.user_id, ["budgets"])
+
+@receiver(post_save, sender=User)
+def bump_version_on_profile_change(sender, instance, created, **kwargs):
+    # Every page shows the username, email and avatar
+    if not created:
+        bump_data_version(instance.pk, ["profile"])
+
+# -----------------------------
+# Signals for categories
+# -----------------------------
+@receiver(pre_delete, sender=Category)
+def fold_rollups_on_category_delete(sender, instance, **kwargs):
+    fold_category_rollups(instance)
 
 # -----------------------------
 # Signal for new users
@@ -79,5 +288,4 @@ def update_account_balance_on_delete(sender, instance, **kwargs):
 @receiver(post_save, sender=User)
 def create_defaults_for_new_user(sender, instance, created, **kwargs):
     if created:
-        create_default_categories(instance)
-        create_default_accounts(instance)
+        provision_defaults(instance)
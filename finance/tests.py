@@ -1,3 +1,966 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+from decimal import Decimal
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.templatetags.static import static
+from django.test import AsyncClient, AsyncRequestFactory, Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from userauths.models import User
+from .models import Account, Budget, Category, Customer, RecurringTransaction, Transaction, MonthlyRollup
+from .rollups import acategory_totals, amonth_totals, check_rollups, month_totals, category_totals
+from .cache import get_financial_snapshot, guest_page_key
+from .utils import aget_ledger_summary, get_ledger_summary
+from .signals import find_balance_drift, provision_defaults
+from .importers import import_transactions, parse_rows
+from .charts import chart_data, prepare_chart_data
+from .benchmarks import run_benchmarks
+from .feed import aday_groups_page, day_groups_page
+from .search import SearchError, search_transactions
+from .fx import FxRateError, _cached_rate, get_rate, load_rates
+from .transfers import TransferError, create_transfer
+from .recurring import materialize_recurring
+from . import async_views
+from .budgets import budget_matrix
+
+
+class LedgerTestMixin:
+    def setUp(self):
+        self.user = User.objects.create_user(username="bee", email="bee@example.com", password="pass12345")
+        self.bank = Account.objects.get(user=self.user, name="Bank")
+        self.cash = Account.objects.get(user=self.user, name="Cash")
+        self.food = Category.objects.get(user=self.user, name="Food", type="expense")
+        self.bills = Category.objects.get(user=self.user, name="Bills", type="expense")
+        self.salary = Category.objects.get(user=self.user, name="Salary", type="income")
+
+    def add_tx(self, amount, tx_type, category, account=None, day=date(2026, 3, 10), note=""):
+        return Transaction.objects.create(
+            user=self.user, account=account or self.bank, category=category,
+            amount=Decimal(amount), type=tx_type, date=day, note=note,
+        )
+
+
+class MonthlyRollupTests(LedgerTestMixin, TestCase):
+    def test_create_edit_delete_keep_rollups_in_sync(self):
+        tx = self.add_tx("100.00", "expense", self.food)
+        self.add_tx("50.00", "expense", self.food, day=date(2026, 3, 20))
+        self.add_tx("1000.00", "income", self.salary)
+        self.assertEqual(check_rollups(self.user), [])
+        self.assertEqual(month_totals(self.user, date(2026, 3, 1))["expense"], Decimal("150.00"))
+
+        # Move to another category, account and month
+        tx.category = self.bills
+        tx.account = self.cash
+        tx.date = date(2026, 4, 2)
+        tx.amount = Decimal("80.00")
+        tx.save()
+        self.assertEqual(check_rollups(self.user), [])
+        self.assertEqual(category_totals(self.user, date(2026, 3, 1), tx_type="expense"), {self.food.id: Decimal("50.00")})
+        self.assertEqual(month_totals(self.user, date(2026, 4, 1))["expense"], Decimal("80.00"))
+
+        tx.delete()
+        self.assertEqual(check_rollups(self.user), [])
+        self.assertEqual(month_totals(self.user, date(2026, 4, 1))["expense"], Decimal("0"))
+
+    def test_category_delete_folds_into_uncategorised(self):
+        self.add_tx("30.00", "expense", self.food)
+        self.food.delete()
+        self.assertEqual(check_rollups(self.user), [])
+        self.assertEqual(category_totals(self.user, date(2026, 3, 1), tx_type="expense"), {None: Decimal("30.00")})
+
+    def test_uncategorised_rollup_key_is_unique(self):
+        self.add_tx("30.00", "expense", None)
+        key = dict(user=self.user, account=self.bank, category=None, type="expense", month=date(2026, 3, 1))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            MonthlyRollup.objects.create(total=Decimal("1.00"), count=1, **key)
+        self.add_tx("20.00", "expense", None)
+        self.assertEqual(MonthlyRollup.objects.get(**key).total, Decimal("50.00"))
+
+    def test_rebuild_command_repairs_drift(self):
+        self.add_tx("30.00", "expense", self.food)
+        MonthlyRollup.objects.update(total=Decimal("1.00"))
+        self.assertNotEqual(check_rollups(self.user), [])
+
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(check_rollups(self.user), [])
+
+
+class FinancialSnapshotTests(LedgerTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_snapshot_is_cached_until_ledger_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_tx("40.00", "expense", self.food)
+        self.assertEqual(get_financial_snapshot(self.user)["total_expense"], Decimal("40.00"))
+
+        with self.assertNumQueries(0):
+            snapshot = get_financial_snapshot(self.user)
+        self.assertEqual(snapshot["total_balance"], Decimal("-40.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_tx("60.00", "income", self.salary)
+        snapshot = get_financial_snapshot(self.user)
+        self.assertEqual(snapshot["total_income"], Decimal("60.00"))
+        self.assertEqual(snapshot["earning_percent"], 60)
+
+
+class LedgerSummaryTests(LedgerTestMixin, TestCase):
+    def test_summary_is_one_query_regardless_of_accounts(self):
+        self.add_tx("100.00", "income", self.salary)
+        self.add_tx("30.00", "expense", self.food, account=self.cash)
+        for i in range(10):
+            Account.objects.create(user=self.user, name=f"Extra {i}", initial_amount=Decimal("5.00"))
+
+        with self.assertNumQueries(1):
+            summary = get_ledger_summary(self.user)
+
+        self.assertEqual(summary.as_tuple(), (Decimal("100.00"), Decimal("30.00"), Decimal("120.00")))
+        cash = next(a for a in summary.accounts if a["id"] == self.cash.id)
+        self.assertEqual(cash["computed_balance"], Decimal("-30.00"))
+
+
+class BalanceDeltaTests(LedgerTestMixin, TestCase):
+    def balance(self, account):
+        account.refresh_from_db()
+        return account.balance
+
+    def test_edits_apply_deltas_to_old_and_new_account(self):
+        tx = self.add_tx("100.00", "expense", self.food)
+        self.add_tx("250.00", "income", self.salary)
+        self.assertEqual(self.balance(self.bank), Decimal("150.00"))
+
+        tx.account = self.cash
+        tx.type = "income"
+        tx.category = self.salary
+        tx.amount = Decimal("40.00")
+        tx.save()
+        self.assertEqual(self.balance(self.bank), Decimal("250.00"))
+        self.assertEqual(self.balance(self.cash), Decimal("40.00"))
+
+        tx.delete()
+        self.assertEqual(self.balance(self.cash), Decimal("0.00"))
+        self.assertEqual(find_balance_drift(), [])
+
+    def test_reconcile_repairs_drift(self):
+        self.add_tx("75.00", "expense", self.food)
+        Account.objects.filter(pk=self.bank.pk).update(balance=Decimal("999.00"))
+        self.assertEqual(len(find_balance_drift()), 1)
+
+        call_command("reconcile_balances", stdout=StringIO())
+        self.assertEqual(self.balance(self.bank), Decimal("-75.00"))
+        self.assertEqual(find_balance_drift(), [])
+
+
+class ImportTests(LedgerTestMixin, TestCase):
+    CSV = (
+        "date,amount,type,account,category,note\n"
+        "2026-03-01,1000.00,income,Bank,Salary,March pay\n"
+        "2026-03-02,-45.50,,Cash,Food,Lunch\n"
+        "2026-03-03,12.00,expense,Wallet,Coffee,New account and category\n"
+        "not-a-date,5.00,expense,Bank,Food,\n"
+    )
+    OFX = (
+        "<OFX><BANKTRANLIST>\n"
+        "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260305<TRNAMT>-20.00<NAME>Bus pass</STMTTRN>\n"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260306120000<TRNAMT>15.00<NAME>Refund</STMTTRN>\n"
+        "</BANKTRANLIST></OFX>\n"
+    )
+
+    def test_csv_import_updates_balances_and_rollups(self):
+        result = import_transactions(self.user, parse_rows("csv", StringIO(self.CSV)), chunk_size=2)
+
+        self.assertEqual(result.imported, 3)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(find_balance_drift(), [])
+        self.assertEqual(check_rollups(self.user), [])
+        self.assertTrue(Account.objects.filter(user=self.user, name="Wallet").exists())
+        self.assertEqual(month_totals(self.user, date(2026, 3, 1))["expense"], Decimal("57.50"))
+
+    def test_ofx_import_uses_default_account(self):
+        result = import_transactions(self.user, parse_rows("ofx", StringIO(self.OFX)), default_account=self.cash)
+
+        self.assertEqual(result.imported, 2)
+        self.cash.refresh_from_db()
+        self.assertEqual(self.cash.balance, Decimal("-5.00"))
+        self.assertEqual(find_balance_drift(), [])
+
+    def test_amounts_are_rounded_and_range_checked(self):
+        rows = "date,amount,account,category\n2026-03-01,-1.005,Bank,Food\n2026-03-01,1e20,Bank,\n2026-03-01,NaN,Bank,\n"
+        result = import_transactions(self.user, parse_rows("csv", StringIO(rows)))
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(len(result.errors), 2)
+        self.assertEqual(Transaction.objects.get(user=self.user).amount, Decimal("1.00"))
+        self.assertEqual(find_balance_drift(), [])
+        self.assertEqual(check_rollups(self.user), [])
+
+    def test_view_takes_account_id_and_rejects_unreadable_files(self):
+        self.client.force_login(self.user)
+        post = lambda body, **data: self.client.post(
+            "/transaction/import/", {"file": SimpleUploadedFile("t.csv", body), **data},
+            headers={"x-requested-with": "XMLHttpRequest"},
+        )
+        ok = post(b"date,amount\n2026-03-01,-4.00\n", account=self.cash.id)
+        self.assertEqual(ok.json()["imported"], 1)
+        self.assertFalse(Account.objects.filter(user=self.user, name=str(self.cash.id)).exists())
+
+        self.assertEqual(post(b"date,amount\n2026-03-01,-4.00\n", account=999999).status_code, 400)
+        bad = post("date,amount,account,note\n2026-03-02,-1.00,Bank,caf\u00e9\n".encode("latin-1"))
+        self.assertEqual(bad.status_code, 400)
+        self.assertTrue(bad.json()["aborted"])
+
+
+class SignupProvisioningTests(TestCase):
+    def test_defaults_are_bulk_created_once(self):
+        user = User.objects.create_user(username="new", email="new@example.com", password="pass12345")
+        self.assertEqual(Category.objects.filter(user=user).count(), 10)
+        self.assertEqual(Account.objects.filter(user=user).count(), 4)
+
+        Category.objects.filter(user=user, name="Food").update(color="#000000")
+        with self.assertNumQueries(4):
+            provision_defaults(user)
+        self.assertEqual(Category.objects.filter(user=user).count(), 10)
+        self.assertEqual(Category.objects.get(user=user, name="Food").color, "#000000")
+
+    def test_signup_creates_user_customer_and_defaults(self):
+        data = {
+            "first_name": "New", "last_name": "Bee", "username": "newbee", "email": "newbee@example.com",
+            "gender": "other", "password1": "s3cret-pass-123", "password2": "s3cret-pass-123",
+        }
+        with self.assertNumQueries(19):
+            response = self.client.post("/user/signup/", data)
+        self.assertEqual(response.status_code, 302)
+        user = User.objects.get(username="newbee")
+        self.assertTrue(Customer.objects.filter(user=user).exists())
+        self.assertEqual(Account.objects.filter(user=user).count(), 4)
+
+
+class RecurringTransactionTests(LedgerTestMixin, TestCase):
+    def schedule(self, **kwargs):
+        fields = {"user": self.user, "account": self.bank, "category": self.bills, "amount": Decimal("100.00"),
+                  "type": "expense", "start_date": date(2026, 1, 31), "note": "Rent"}
+        fields.update(kwargs)
+        return RecurringTransaction.objects.create(**fields)
+
+    def test_catches_up_once_and_is_idempotent(self):
+        rent = self.schedule()
+        salary = self.schedule(category=self.salary, type="income", amount=Decimal("1000.00"),
+                               frequency="weekly", interval=2, start_date=date(2026, 3, 2),
+                               end_date=date(2026, 3, 20), note="")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = materialize_recurring(today=date(2026, 4, 15), chunk_size=1)
+        self.assertEqual(
+            list(rent.occurrences.order_by("date").values_list("date", flat=True)),
+            [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31)],
+        )
+        self.assertEqual(list(salary.occurrences.values_list("date", flat=True)), [date(2026, 3, 2), date(2026, 3, 16)])
+        self.assertEqual((result.created, result.schedules, result.finished), (5, 2, 1))
+
+        rent.refresh_from_db()
+        salary.refresh_from_db()
+        self.assertEqual(rent.next_date, date(2026, 4, 30))
+        self.assertFalse(salary.active)
+        self.bank.refresh_from_db()
+        self.assertEqual(self.bank.balance, Decimal("1700.00"))
+        self.assertEqual(check_rollups(self.user), [])
+        self.assertEqual(find_balance_drift(), [])
+
+        again = materialize_recurring(today=date(2026, 4, 15))
+        self.assertEqual((again.created, again.schedules), (0, 0))
+        self.assertEqual(Transaction.objects.filter(recurring__isnull=False).count(), 5)
+
+    def test_skips_occurrences_that_already_exist(self):
+        rent = self.schedule(start_date=date(2026, 3, 1))
+        Transaction.objects.create(user=self.user, account=self.bank, category=self.bills, amount=Decimal("100.00"),
+                                   type="expense", date=date(2026, 3, 1), recurring=rent)
+        result = materialize_recurring(today=date(2026, 4, 1))
+        self.assertEqual(result.created, 1)
+        self.assertEqual(rent.occurrences.count(), 2)
+        self.assertEqual(find_balance_drift(), [])
+
+
+class BatchTransactionTests(LedgerTestMixin, TestCase):
+    def post_batch(self, operations):
+        return self.client.post(
+            "/transaction/batch/", json.dumps({"operations": operations}),
+            content_type="application/json", HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+
+    def test_mixed_batch_applies_once_and_reports_budgets(self):
+        self.client.force_login(self.user)
+        edit = self.add_tx("30.00", "expense", self.food)
+        gone = self.add_tx("20.00", "expense", self.bills, account=self.cash)
+        Budget.objects.create(user=self.user, category=self.food, month=3, year=2026, amount=Decimal("100"))
+
+        operations = [
+            {"op": "create", "amount": "60.00", "type": "expense", "account": self.bank.id,
+             "category": self.food.id, "date": "2026-03-11", "note": "groceries"},
+            {"op": "create", "amount": "500.00", "type": "income", "account": self.cash.id,
+             "category": self.salary.id, "date": "2026-03-01"},
+            {"op": "update", "id": edit.id, "amount": "45.00"},
+            {"op": "delete", "id": gone.id},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post_batch(operations)
+        data = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data["created"]), 2)
+        self.assertEqual(data["deleted"], [gone.id])
+        self.assertEqual(find_balance_drift(), [])
+        self.assertEqual(check_rollups(self.user), [])
+        self.assertEqual(data["total_income"], 500.0)
+        self.assertEqual(data["total_expense"], 105.0)
+        food = next(b for b in data["budgets"] if b["category_id"] == self.food.id)
+        self.assertEqual((food["spent"], food["budget"], food["exceeded"]), (105.0, 100.0, True))
+
+    def test_invalid_operation_writes_nothing(self):
+        self.client.force_login(self.user)
+        operations = [
+            {"op": "create", "amount": "10.00", "type": "expense", "account": self.bank.id,
+             "category": self.food.id, "date": "2026-03-11"},
+            {"op": "create", "amount": "-1", "type": "expense", "account": self.bank.id,
+             "category": self.food.id, "date": "2026-03-11"},
+        ]
+        response = self.post_batch(operations)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["index"], 1)
+        self.assertFalse(Transaction.objects.filter(user=self.user).exists())
+        self.assertEqual(Account.objects.get(pk=self.bank.pk).balance, self.bank.balance)
+
+
+class TransferTests(LedgerTestMixin, TestCase):
+    def transfer(self, **data):
+        return self.client.post("/transaction/transfer/", {
+            "from_account": self.bank.id, "to_account": self.cash.id, "amount": "50.00",
+            "date": "2026-03-12", "note": "rent share", **data,
+        }, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+    def assertBooksBalance(self):
+        self.assertEqual(find_balance_drift(Account.objects.filter(user=self.user)), [])
+        self.assertEqual(check_rollups(self.user), [])
+
+    def balances(self):
+        return {a.id: a.balance for a in Account.objects.filter(pk__in=[self.bank.pk, self.cash.pk])}
+
+    def test_transfer_moves_balances_but_not_income_or_expense(self):
+        self.client.force_login(self.user)
+        self.add_tx("20.00", "expense", self.food, account=self.cash)
+        Budget.objects.create(user=self.user, category=self.food, month=3, year=2026, amount=Decimal("100"))
+
+        data = self.transfer().json()
+        out_leg, in_leg = data["transactions"]
+        self.assertEqual((out_leg["type"], in_leg["type"]), ("transfer_out", "transfer_in"))
+        self.assertEqual((out_leg["counterpart_id"], in_leg["counterpart_id"]), (in_leg["id"], out_leg["id"]))
+        self.assertEqual({a["id"]: a["balance"] for a in data["accounts"]}, {self.bank.id: -50.0, self.cash.id: 30.0})
+        self.assertEqual((data["total_income"], data["total_expense"], data["balance"]), (0.0, 20.0, -20.0))
+        self.assertEqual(self.balances(), {self.bank.id: Decimal("-50.00"), self.cash.id: Decimal("30.00")})
+        self.assertBooksBalance()
+
+        self.assertEqual(month_totals(self.user, date(2026, 3, 1)), {"income": Decimal("0"), "expense": Decimal("20.00")})
+        self.assertEqual(category_totals(self.user, date(2026, 3, 1)), {self.food.id: Decimal("20.00")})
+        self.assertEqual(chart_data(self.user, date(2026, 3, 1), date(2026, 3, 31))["series"],
+                         [{"date": "2026-03-10", "income": 0.0, "expense": 20.0}])
+        self.assertEqual(budget_matrix(self.user, 2026)["totals"][2]["spent"], 20.0)
+        # The note index survived the migration that added transfers
+        self.assertEqual(len(search_transactions(self.user, "rent share")[0]), 2)
+
+    def test_invalid_transfers_write_nothing(self):
+        self.client.force_login(self.user)
+        other = User.objects.create_user(username="wasp", email="wasp@example.com", password="pass12345")
+        wallet = Account.objects.create(user=self.user, name="Wallet", currency="USD")
+        for data in ({"to_account": self.bank.id}, {"to_account": Account.objects.get(user=other, name="Bank").id},
+                     {"amount": "0"}, {"to_account": wallet.id}):
+            self.assertEqual(self.transfer(**data).status_code, 400, data)
+        self.assertFalse(Transaction.objects.exists())
+
+        # Across currencies, the amount received can be given
+        self.transfer(to_account=wallet.id, to_amount="0.60")
+        wallet.refresh_from_db()
+        self.assertEqual(wallet.balance, Decimal("0.60"))
+        self.assertBooksBalance()
+
+    def test_legs_are_deleted_together_and_not_edited_alone(self):
+        self.client.force_login(self.user)
+        out_leg, in_leg = create_transfer(self.user, self.bank, self.cash, Decimal("50.00"), date(2026, 3, 12))
+        ajax = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+        response = self.client.post(f"/transaction/edit/{in_leg.id}/", {"amount": "1"}, **ajax)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/transaction/batch/", json.dumps({"operations": [{"op": "delete", "id": out_leg.id}]}),
+                                    content_type="application/json", **ajax)
+        self.assertEqual(response.status_code, 400)
+        with self.assertRaises(TransferError):
+            create_transfer(self.user, self.bank, self.bank, Decimal("1"))
+
+        response = self.client.post(f"/transaction/delete/{in_leg.id}/", **ajax)
+        self.assertEqual(response.json()["counterpart_id"], out_leg.id)
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(self.balances(), {self.bank.id: Decimal("0.00"), self.cash.id: Decimal("0.00")})
+        self.assertBooksBalance()
+
+    def test_deleting_an_account_keeps_the_other_leg(self):
+        out_leg, in_leg = create_transfer(self.user, self.bank, self.cash, Decimal("50.00"), date(2026, 3, 12))
+        self.bank.delete()
+        in_leg.refresh_from_db()
+        self.assertIsNone(in_leg.counterpart_id)
+        self.assertEqual(self.balances(), {self.cash.id: Decimal("50.00")})
+        self.assertBooksBalance()
+
+        # Still shown as a transfer, without an edit button
+        self.client.force_login(self.user)
+        html = self.client.get("/2026/3/").content.decode()
+        row = re.search(rf'data-id="{in_leg.id}".*?</div>', html, re.S).group(0)
+        self.assertIn("Transfer in", row)
+        self.assertNotIn("edit-transaction", row)
+
+
+class WriteResponseQueryTests(LedgerTestMixin, TestCase):
+    """
+    Write endpoints answer from a fixed number of queries, however many
+    accounts and transactions the user has.
+    """
+    AJAX = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+    def form(self, category, amount="25.00", day="2026-03-12"):
+        return {"amount": amount, "type": category.type, "account": self.bank.id,
+                "category": category.id, "date": day, "note": ""}
+
+    def grow_ledger(self):
+        for i in range(10):
+            account = Account.objects.create(user=self.user, name=f"Extra {i}")
+            self.add_tx("5.00", "expense", self.food, account=account)
+            self.add_tx("7.00", "income", self.salary, account=account, day=date(2026, 2, 1))
+
+    def check_queries(self, add, edit, delete):
+        # Existing rollup rows keep the counts free of first-insert savepoints
+        self.add_tx("1.00", "expense", self.food)
+        self.add_tx("1.00", "expense", self.bills)
+        tx = self.add_tx("10.00", "expense", self.food)
+        gone = self.add_tx("3.00", "expense", self.food)
+
+        with self.assertNumQueries(add):
+            response = self.client.post("/transaction/", self.form(self.food), **self.AJAX)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(edit):
+            response = self.client.post(f"/transaction/edit/{tx.id}/", self.form(self.bills, "12.00"), **self.AJAX)
+        self.assertEqual(response.json()["old_category_budget"]["category_id"], self.food.id)
+        with self.assertNumQueries(delete):
+            response = self.client.post(f"/transaction/delete/{gone.id}/", **self.AJAX)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_query_count_is_pinned_and_independent_of_ledger_size(self):
+        self.client.force_login(self.user)
+        Budget.objects.create(user=self.user, category=self.food, month=3, year=2026, amount=Decimal("20"))
+        small = self.check_queries(add=12, edit=15, delete=9)
+        self.assertEqual((small["budget"]["spent"], small["budget"]["exceeded"]), (26.0, True))
+
+        self.grow_ledger()
+        self.check_queries(add=12, edit=15, delete=9)
+        self.assertEqual(find_balance_drift(), [])
+        self.assertEqual(check_rollups(self.user), [])
+
+
+class HomeFeedTests(LedgerTestMixin, TestCase):
+    def test_keyset_pages_cover_the_month_once(self):
+        for i in range(7):
+            self.add_tx(f"{i + 1}.00", "expense", self.food, day=date(2026, 3, 1 + i % 3))
+        self.add_tx("100.00", "income", self.salary, day=date(2026, 3, 2))
+        self.add_tx("9.00", "expense", self.food, day=date(2026, 4, 1))
+
+        seen, after, day_totals = [], None, {}
+        while True:
+            with self.assertNumQueries(2):
+                days, after = day_groups_page(self.user, 2026, 3, after=after, page_size=3)
+            for day in days:
+                seen.extend(tx.id for tx in day["items"])
+                day_totals[day["date"]] = (day["total_income"], day["total_expense"])
+            if after is None:
+                break
+
+        march = list(Transaction.objects.filter(date__month=3).order_by("-date", "-id").values_list("id", flat=True))
+        self.assertEqual(seen, march)
+        # Days split across pages still report the whole day
+        self.assertEqual(day_totals[date(2026, 3, 2)], (Decimal("100.00"), Decimal("7.00")))
+
+    def test_feed_endpoint_and_first_page_on_home(self):
+        self.client.force_login(self.user)
+        for day in range(1, 4):
+            self.add_tx("5.00", "expense", self.food, day=date(2026, 3, day))
+
+        response = self.client.get("/2026/3/days/")
+        self.assertEqual([d["date"] for d in response.json()["days"]], ["2026-03-03", "2026-03-02", "2026-03-01"])
+        self.assertIsNone(response.json()["next"])
+        self.assertEqual(self.client.get("/2026/3/days/", {"after": "bogus"}).status_code, 400)
+        self.assertContains(self.client.get("/2026/3/"), 'data-feed-url="/2026/3/days/"')
+
+
+class SearchTests(LedgerTestMixin, TestCase):
+    def ids(self, query, **filters):
+        return [tx.id for tx in search_transactions(self.user, query, **filters)[0]]
+
+    def test_notes_and_names_match_every_word(self):
+        lunch = self.add_tx("12.00", "expense", self.food, note="Lunch at Luigi's")
+        rent = self.add_tx("900.00", "expense", self.bills, note="March rent")
+        cash_rent = self.add_tx("50.00", "expense", self.bills, account=self.cash, note="rent top-up")
+
+        self.assertEqual(self.ids("lun"), [lunch.id])  # word prefix
+        self.assertEqual(self.ids("food"), [lunch.id])  # category name
+        self.assertEqual(set(self.ids("rent")), {rent.id, cash_rent.id})
+        self.assertEqual(self.ids("rent cash"), [cash_rent.id])  # note AND account name
+        self.assertEqual(self.ids("rent", min_amount=Decimal("100")), [rent.id])
+        self.assertEqual(self.ids("bills", end=date(2026, 3, 1)), [])
+        self.assertEqual(self.ids("rent", tx_type="income"), [])
+        with self.assertRaises(SearchError):
+            search_transactions(self.user, "  ?! ")
+
+    def test_note_matches_rank_first_and_pages_do_not_overlap(self):
+        by_name = [self.add_tx("1.00", "expense", self.food, day=date(2026, 3, d)) for d in (20, 21, 22)]
+        by_note = self.add_tx("1.00", "expense", self.bills, day=date(2026, 3, 1), note="food court")
+
+        first, has_next = search_transactions(self.user, "food", page_size=2)
+        second, last = search_transactions(self.user, "food", page=2, page_size=2)
+        self.assertTrue(has_next)
+        self.assertFalse(last)
+        ids = [tx.id for tx in first + second]
+        self.assertEqual(ids[0], by_note.id)
+        self.assertEqual(ids[1:], [tx.id for tx in reversed(by_name)])
+
+    def test_index_follows_note_edits_and_deletes(self):
+        tx = self.add_tx("3.00", "expense", self.bills, note="parking")
+        tx.note = "toll road"
+        tx.save()
+        self.assertEqual(self.ids("parking"), [])
+        self.assertEqual(self.ids("toll"), [tx.id])
+        tx.delete()
+        self.assertEqual(self.ids("toll"), [])
+
+    def test_endpoint(self):
+        self.client.force_login(self.user)
+        tx = self.add_tx("8.00", "expense", self.food, note="bagels")
+        other = User.objects.create_user(username="wasp", email="wasp@example.com", password="pass12345")
+        Transaction.objects.create(user=other, account=Account.objects.get(user=other, name="Bank"),
+                                   category=Category.objects.get(user=other, name="Food", type="expense"),
+                                   amount=Decimal("1.00"), type="expense", date=date(2026, 3, 1), note="bagels")
+
+        with self.assertNumQueries(5):  # session, user, categories, accounts, page
+            data = self.client.get("/transaction/search/", {"q": "bagel", "max_amount": "10"}).json()
+        self.assertEqual([r["id"] for r in data["results"]], [tx.id])
+        self.assertEqual(data["results"][0]["account_name"], "Bank")
+        self.assertIsNone(data["next"])
+        self.assertEqual(self.client.get("/transaction/search/", {"q": ""}).status_code, 400)
+        self.assertEqual(self.client.get("/transaction/search/", {"q": "x", "start": "soon"}).status_code, 400)
+
+
+@override_settings(FINANCE_CONDITIONAL_GET=True)
+class ConditionalGetTests(LedgerTestMixin, TestCase):
+    URLS = ["/", "/2026/3/days/", "/accounts/", "/categories/", "/chart/", "/chart/data/", "/budget/2026/3/"]
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_matching_etag_gets_304_without_ledger_queries(self):
+        for url in self.URLS:
+            etag = self.client.get(url)["ETag"]
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, url)
+            self.assertFalse([q for q in captured if "finance_" in q["sql"]], url)
+
+    def test_ledger_and_budget_changes_change_the_etag(self):
+        etag = self.client.get("/budget/2026/3/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_tx("5.00", "expense", self.food)
+        response = self.client.get("/budget/2026/3/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Budget.objects.create(user=self.user, category=self.food, month=3, year=2026, amount=Decimal("50"))
+        self.assertEqual(self.client.get("/budget/2026/3/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(FINANCE_CONDITIONAL_GET=None)
+    def test_no_etag_with_a_per_process_cache(self):
+        self.assertNotIn("ETag", self.client.get("/accounts/"))
+
+
+@override_settings(FINANCE_CONDITIONAL_GET=True)
+class AsyncViewTests(LedgerTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.add_tx("1000.00", "income", self.salary, day=date.today())
+        self.add_tx("25.00", "expense", self.food, day=date.today())
+
+    def request(self, path):
+        request = AsyncRequestFactory().get(path)
+        request.session = SessionStore()
+
+        async def auser():
+            return self.user
+        request.auser = auser
+        return request
+
+    async def test_async_reads_match_sync(self):
+        month = date.today().replace(day=1)
+        self.assertEqual(await amonth_totals(self.user, month), await sync_to_async(month_totals)(self.user, month))
+        self.assertEqual(
+            await acategory_totals(self.user, month, tx_type="expense"),
+            await sync_to_async(category_totals)(self.user, month, tx_type="expense"),
+        )
+        self.assertEqual(await aget_ledger_summary(self.user), await sync_to_async(get_ledger_summary)(self.user))
+        days, cursor = await aday_groups_page(self.user, month.year, month.month)
+        self.assertEqual(
+            [(d["date"], d["total_income"], d["total_expense"], d["items"]) for d in days],
+            [(d["date"], d["total_income"], d["total_expense"], d["items"])
+             for d in (await sync_to_async(day_groups_page)(self.user, month.year, month.month))[0]],
+        )
+        self.assertIsNone(cursor)
+
+    async def test_async_views_render(self):
+        today = date.today()
+        for view, args in [
+            (async_views.home, ()),
+            (async_views.accounts, ()),
+            (async_views.chart, ()),
+            (async_views.budget, (today.year, today.month)),
+        ]:
+            response = await view(self.request("/"), *args)
+            self.assertEqual(response.status_code, 200, view.__name__)
+            self.assertIn("ETag", response)
+        response = await async_views.home(self.request("/"))
+        self.assertContains(response, "25")
+
+
+class GuestPageCacheTests(LedgerTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_second_guest_gets_prerendered_page(self):
+        first = Client().get("/categories/?type=income")
+        with self.assertNumQueries(0):
+            second = Client().get("/categories/?type=income")
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertContains(Client().get("/categories/"), "Food")
+
+    def test_cached_csrf_token_is_replaced_per_visitor(self):
+        html = b'<input type="hidden" name="csrfmiddlewaretoken" value="%s">'
+        cache.set(guest_page_key("/chart/"), ("text/html; charset=utf-8", html % b"__budgetbee_csrf_token__"))
+        response = Client().get("/chart/")
+        token = re.search(rb'value="([^"]+)"', response.content).group(1)
+        self.assertNotEqual(token, b"__budgetbee_csrf_token__")
+        self.assertIn("csrftoken", response.cookies)
+
+    def test_messages_and_users_bypass_the_cache(self):
+        cache.set(guest_page_key("/"), ("text/html; charset=utf-8", b"prerendered"))
+        self.assertEqual(Client().get("/").content, b"prerendered")
+
+        client = Client()
+        client.force_login(self.user)
+        self.assertContains(client.get("/"), self.user.username)
+        client.get("/user/logout/")
+        # A guest with a flash message waiting gets a real render
+        self.assertNotEqual(client.get("/").content, b"prerendered")
+
+
+RATES = """date,base,currency,rate
+2026-03-01,INR,USD,80
+2026-04-01,INR,USD,85
+2026-03-01,USD,INR,0.0125
+"""
+
+
+class CurrencyTests(LedgerTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # Rates cached by one test would outlive its rolled-back rows
+        self.addCleanup(_cached_rate.cache_clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            load_rates(StringIO(RATES))
+        self.wallet = Account.objects.create(user=self.user, name="Wallet", currency="USD")
+        self.euro = Account.objects.create(user=self.user, name="Euro card", currency="EUR")
+        self.add_tx("10.00", "expense", self.food, account=self.wallet)
+        self.add_tx("100.00", "expense", self.food)
+        self.add_tx("5.00", "expense", self.food, account=self.euro)  # no EUR rates
+
+    def test_totals_are_converted_in_the_query(self):
+        with self.assertNumQueries(1):
+            totals = month_totals(self.user, date(2026, 3, 1))
+        # 10 USD at March's rate of 80, plus 100 INR; EUR has no rate
+        self.assertEqual(totals["expense"], Decimal("900.00"))
+        self.assertEqual(category_totals(self.user, date(2026, 3, 1), tx_type="expense"), {self.food.id: Decimal("900.00")})
+        self.assertEqual(budget_matrix(self.user, 2026)["totals"][2]["spent"], 900.0)
+        self.assertEqual(chart_data(self.user, date(2026, 3, 1), date(2026, 3, 31), "day")["expense"], {"Food": 900.0})
+
+        summary = get_ledger_summary(self.user)
+        wallet = next(a for a in summary.accounts if a["id"] == self.wallet.id)
+        self.assertEqual((wallet["currency"], wallet["expense"]), ("USD", Decimal("10.00")))
+        self.assertEqual(summary.total_expense, Decimal("900.00"))
+        # Balances at the latest rate: -10 USD * 85 - 100 INR
+        self.assertEqual(summary.total_balance, Decimal("-950.00"))
+        self.assertEqual(get_financial_snapshot(self.user)["total_balance"], Decimal("-950.00"))
+
+    def test_user_base_currency(self):
+        self.user.base_currency = "USD"
+        self.user.save()
+        self.assertEqual(month_totals(self.user, date(2026, 3, 1))["expense"], Decimal("11.25"))
+        snapshot = get_financial_snapshot(self.user)
+        self.assertEqual((snapshot["base_currency"], snapshot["total_expense"]), ("USD", Decimal("11.25")))
+
+    def test_feed_rows_use_cached_rate_lookups(self):
+        days, _ = day_groups_page(self.user, 2026, 3)
+        amounts = {tx.account_id: (tx.currency, tx.base_amount) for tx in days[0]["items"]}
+        self.assertEqual(amounts[self.wallet.id], ("USD", Decimal("800.00")))
+        self.assertEqual(amounts[self.bank.id], ("INR", Decimal("100.00")))
+        self.assertEqual(amounts[self.euro.id], ("EUR", None))
+        self.assertEqual(days[0]["total_expense"], Decimal("900.00"))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_rate("USD", "INR", date(2026, 3, 10)), Decimal("80"))
+
+    def test_write_responses_carry_the_row_currency(self):
+        self.client.force_login(self.user)
+        response = self.client.post("/transaction/", {
+            "amount": "2.00", "type": "expense", "account": self.wallet.id, "category": self.food.id,
+            "date": "2026-03-10", "note": "",
+        }, headers={"x-requested-with": "XMLHttpRequest"})
+        tx = response.json()["transaction"]
+        self.assertEqual((tx["currency"], tx["base_amount"]), ("USD", 160.0))
+
+    def test_loading_rates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(load_rates(StringIO("date,base,currency,rate\n2026-03-01,INR,EUR,90\n")), 1)
+        self.assertEqual(month_totals(self.user, date(2026, 3, 1))["expense"], Decimal("1350.00"))
+        for bad in ("date,base,rate\n", "date,base,currency,rate\n2026-03-01,INR,euro,90\n",
+                    "date,base,currency,rate\n2026-03-01,INR,EUR,-1\n"):
+            with self.assertRaises(FxRateError):
+                load_rates(StringIO(bad))
+
+
+class BudgetMatrixTests(LedgerTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_matrix_cells_and_caching(self):
+        self.add_tx("60.00", "expense", self.food, day=date(2026, 3, 5))
+        self.add_tx("15.00", "expense", self.food, day=date(2026, 7, 5))
+        self.add_tx("10.00", "expense", self.food, day=date(2025, 3, 5))
+        Budget.objects.create(user=self.user, category=self.food, month=3, year=2026, amount=Decimal("50"))
+        Budget.objects.create(user=self.user, category=self.food, month=7, year=2026, amount=Decimal("60"))
+
+        with self.assertNumQueries(3):
+            matrix = budget_matrix(self.user, 2026)
+        food = next(c for c in matrix["categories"] if c["id"] == self.food.id)
+        self.assertEqual(food["months"][2], {"month": 3, "spent": 60.0, "budget": 50.0, "percent": 100, "exceeded": True})
+        self.assertEqual(food["months"][6]["percent"], 25)
+        self.assertEqual(food["total"]["spent"], 75.0)
+        self.assertEqual(matrix["totals"][0]["spent"], 0.0)
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/budget/2026/data/").json()["total"]["budget"], 110.0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Budget.objects.get(user=self.user, month=3).delete()
+        self.assertEqual(self.client.get("/budget/2026/data/").json()["total"]["budget"], 60.0)
+        self.assertContains(self.client.get("/budget/2026/"), "Budgets for 2026")
+
+    def test_deleting_an_account_refreshes_the_matrix(self):
+        self.add_tx("40.00", "expense", self.food, account=self.cash, day=date(2026, 3, 5))
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/budget/2026/data/").json()["total"]["spent"], 40.0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cash.delete()
+        self.assertEqual(self.client.get("/budget/2026/data/").json()["total"]["spent"], 0.0)
+
+    def test_out_of_range_month_is_rejected_before_saving(self):
+        self.client.force_login(self.user)
+        ajax = {"x-requested-with": "XMLHttpRequest"}
+        for month in ("0", "13"):
+            data = {"category": self.food.id, "amount": "10", "month": month, "year": "2026"}
+            self.assertEqual(self.client.post("/budget/save/", data, headers=ajax).status_code, 400)
+            self.assertEqual(self.client.post("/budget/spent/", data, headers=ajax).status_code, 400)
+        self.assertFalse(Budget.objects.filter(user=self.user).exists())
+
+
+class ExportTests(LedgerTestMixin, TestCase):
+    def test_transactions_csv_stream_with_filters(self):
+        self.add_tx("10.00", "expense", self.food, note="March")
+        self.add_tx("20.00", "expense", self.food, day=date(2026, 4, 1), note="April")
+        self.client.force_login(self.user)
+
+        response = self.client.get("/export/transactions.csv", {"start": "2026-04-01"})
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("April", body)
+        self.assertNotIn("March", body)
+        self.assertTrue(body.startswith("id,date,type,amount,account_currency,account_name,category_name,note"))
+
+        response = self.client.get("/export/transactions.csv", {"start": "nope"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_command_writes_one_folder_per_user(self):
+        self.add_tx("10.00", "expense", self.food)
+        with tempfile.TemporaryDirectory() as out:
+            call_command("export_ledger", out, "--format", "ndjson", stdout=StringIO())
+            with open(os.path.join(out, f"user-{self.user.id}", "transactions.ndjson")) as fh:
+                rows = [json.loads(line) for line in fh]
+        self.assertEqual(rows[0]["amount"], "10.00")
+        self.assertEqual(rows[0]["category_name"], "Food")
+
+    def test_amounts_are_exported_with_their_currency(self):
+        self.cash.currency = "EUR"
+        self.cash.save()
+        self.add_tx("10.00", "expense", self.food, account=self.cash)
+        self.client.force_login(self.user)
+
+        rows = [json.loads(line) for line in b"".join(
+            self.client.get("/export/accounts.ndjson").streaming_content
+        ).decode().splitlines()]
+        self.assertEqual({row["name"]: row["currency"] for row in rows}[self.cash.name], "EUR")
+
+        rows = [json.loads(line) for line in b"".join(
+            self.client.get("/export/transactions.ndjson").streaming_content
+        ).decode().splitlines()]
+        self.assertEqual(rows[0]["account_currency"], "EUR")
+
+
+class ChartDataTests(LedgerTestMixin, TestCase):
+    def test_day_and_month_buckets(self):
+        self.add_tx("10.00", "expense", self.food, day=date(2026, 3, 1))
+        self.add_tx("5.00", "expense", self.food, day=date(2026, 3, 1))
+        self.add_tx("100.00", "income", self.salary, day=date(2026, 3, 15))
+        self.add_tx("7.00", "expense", self.bills, day=date(2026, 5, 2))
+
+        data = chart_data(self.user, date(2026, 3, 1), date(2026, 3, 31), "day")
+        self.assertEqual(data["expense"], {"Food": 15.0})
+        self.assertEqual(data["series"], [
+            {"date": "2026-03-01", "income": 0.0, "expense": 15.0},
+            {"date": "2026-03-15", "income": 100.0, "expense": 0.0},
+        ])
+
+        self.client.force_login(self.user)
+        data = self.client.get("/chart/data/", {"period": "quarter", "year": 2026, "month": 5}).json()
+        self.assertEqual(data["bucket"], "month")
+        self.assertEqual([p["date"] for p in data["series"]], ["2026-05"])
+        self.assertEqual(data["expense"], {"Bills": 7.0})
+
+    def test_partial_month_range_reads_raw_transactions(self):
+        self.add_tx("10.00", "expense", self.food, day=date(2026, 3, 1))
+        self.add_tx("20.00", "expense", self.food, day=date(2026, 3, 20))
+        data = chart_data(self.user, date(2026, 3, 10), date(2026, 3, 25), "day")
+        self.assertEqual(data["expense"], {"Food": 20.0})
+
+
+class ChartReportTests(LedgerTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_rolling_window_is_cached_per_period(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_tx("10.00", "expense", self.food, day=date(2026, 2, 3))
+            self.add_tx("20.00", "expense", self.food, day=date(2026, 3, 3))
+
+        report = prepare_chart_data(self.user, months=2, end=date(2026, 3, 15))
+        self.assertEqual(json.loads(report["expense_json"]), {"Food": 30.0})
+        self.assertEqual([m["date"] for m in json.loads(report["monthly_json"])], ["Feb 2026", "Mar 2026"])
+
+        with self.assertNumQueries(0):
+            prepare_chart_data(self.user, months=2, end=date(2026, 3, 15))
+
+        # A write outside the window leaves it cached; one inside invalidates it
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_tx("5.00", "expense", self.food, day=date(2026, 6, 1))
+        with self.assertNumQueries(0):
+            prepare_chart_data(self.user, months=2, end=date(2026, 3, 15))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_tx("5.00", "expense", self.bills, day=date(2026, 2, 4))
+        report = prepare_chart_data(self.user, months=2, end=date(2026, 3, 15))
+        self.assertEqual(json.loads(report["expense_json"]), {"Food": 30.0, "Bills": 5.0})
+
+    def test_deleted_category_is_reported_as_uncategorized(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_tx("10.00", "expense", self.food, day=date(2026, 3, 3))
+            self.food.delete()
+        report = prepare_chart_data(self.user, months=None, end=date(2026, 3, 3))
+        self.assertEqual(json.loads(report["expense_json"]), {"Uncategorized": 10.0})
+
+
+class BenchmarkSuiteTests(LedgerTestMixin, TestCase):
+    def test_every_route_has_a_case_and_none_errors(self):
+        self.add_tx("10.00", "expense", self.food, day=date.today())
+        report = run_benchmarks(self.user, iterations=1, warmup=0)
+
+        self.assertEqual(report["missing"], [])
+        errors = {label: row["status"] for label, row in report["results"].items() if row["status"] >= 500}
+        self.assertEqual(errors, {})
+        # Everything the benchmark wrote was rolled back
+        self.assertEqual(Transaction.objects.filter(account__user=self.user).count(), 1)
+
+
+class StaticFilesTests(TestCase):
+    def test_collectstatic_writes_hashed_compressed_files_served_immutable(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        with override_settings(STATIC_ROOT=root):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            url = static("js/transaction.js")
+            self.assertRegex(url, r"^/static/js/transaction\.[0-9a-f]{12}\.js$")
+            with open(os.path.join(root, "js", "transaction.js"), "rb") as fh:
+                original = fh.read()
+
+            response = self.client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+            self.assertEqual(response["Vary"], "Accept-Encoding")
+            self.assertTrue(response["Content-Type"].endswith("javascript"))
+            self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), original)
+
+            plain = self.client.get("/static/js/transaction.js")
+            self.assertNotIn("Content-Encoding", plain)
+            self.assertEqual(plain["Cache-Control"], "public, max-age=60")
+            self.assertEqual(b"".join(plain.streaming_content), original)
+            self.assertEqual(self.client.get("/static/js/missing.js").status_code, 404)
+
+
+class RequestTimingMiddlewareTests(LedgerTestMixin, TestCase):
+    def test_timing_headers_and_budget_warning(self):
+        with override_settings(REQUEST_ROUTE_BUDGETS={"finance:accounts": {"queries": 0}}):
+            client = Client()
+            client.force_login(self.user)
+            with self.assertLogs("budgetbee.requests", "INFO") as logs:
+                response = client.get("/accounts/")
+
+        self.assertGreater(int(response["X-DB-Queries"]), 0)
+        sections = [part.split(";")[0] for part in response["Server-Timing"].split(", ")]
+        self.assertEqual(sections, ["db", "view", "ctx", "tpl", "total"])
+        self.assertIn('"route": "finance:accounts"', logs.output[0])
+        self.assertIn("Request budget exceeded for finance:accounts", logs.output[1])
+
+    async def test_counts_queries_under_asgi(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get("/accounts/")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response["X-DB-Queries"]), 0)
@@ -0,0 +1,65 @@
+# finance/transfers.py
+# Moving money between two of a user's accounts as one linked pair of
+# transactions, written in one DB transaction
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+
+from .cache import bump_data_version, month_scope
+from .fx import CENT, convert
+from .models import Transaction
+from .rollups import apply_rollup_delta
+from .signals import apply_balance_delta, deferred_ledger_updates
+
+
+class TransferError(ValueError):
+    """
+    A transfer that can't be made; nothing is written.
+    """
+
+
+def create_transfer(user, from_account, to_account, amount, day=None, note="", to_amount=None):
+    """
+    Debits `amount` from `from_account` and credits `to_account` with a
+    transfer_out / transfer_in pair linked through `counterpart`. Between
+    currencies, `to_amount` is what arrives; without it `amount` is
+    converted at the day's rate.
+
+    Each balance and rollup row is moved once, by delta. Returns
+    (outgoing, incoming).
+    """
+    if from_account.pk == to_account.pk:
+        raise TransferError("choose two different accounts")
+    if from_account.user_id != user.pk or to_account.user_id != user.pk:
+        raise TransferError("account not found")
+    day = day or date.today()
+    amount = Decimal(amount).quantize(CENT)
+    if to_amount is None:
+        to_amount = convert(amount, from_account.currency, to_account.currency, day)
+        if to_amount is None:
+            raise TransferError(
+                f"no {from_account.currency} to {to_account.currency} rate; give the amount received"
+            )
+    to_amount = Decimal(to_amount).quantize(CENT)
+    if amount <= 0 or to_amount <= 0:
+        raise TransferError("amount must be positive")
+
+    with transaction.atomic(), deferred_ledger_updates():
+        outgoing = Transaction.objects.create(
+            user=user, account=from_account, category=None, amount=amount,
+            type="transfer_out", date=day, note=note,
+        )
+        incoming = Transaction.objects.create(
+            user=user, account=to_account, category=None, amount=to_amount,
+            type="transfer_in", date=day, note=note, counterpart=outgoing,
+        )
+        Transaction.objects.filter(pk=outgoing.pk).update(counterpart=incoming)
+        outgoing.counterpart = incoming
+
+        apply_balance_delta(from_account.pk, -amount)
+        apply_balance_delta(to_account.pk, to_amount)
+        apply_rollup_delta(user.pk, from_account.pk, None, "transfer_out", day, amount, 1)
+        apply_rollup_delta(user.pk, to_account.pk, None, "transfer_in", day, to_amount, 1)
+        bump_data_version(user.pk, [month_scope(day)])
+    return outgoing, incoming
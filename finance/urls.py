@@ -1,19 +1,29 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Read-only dashboard pages; the async versions only pay off under ASGI
+dashboard = async_views if getattr(settings, 'FINANCE_ASYNC_VIEWS', False) else views
 
 app_name = 'finance'
 
 urlpatterns = [
-    path('', views.home, name='home'),
-    path('<int:year>/<int:month>/', views.home, name='home_month'),
+    path('', dashboard.home, name='home'),
+    path('<int:year>/<int:month>/', dashboard.home, name='home_month'),
+    path('<int:year>/<int:month>/days/', views.home_days, name='home_days'),
 
     # Transactions
     path('transaction/', views.add_transaction, name='add_transaction'),
     path('transaction/edit/<int:transaction_id>/', views.edit_transaction, name='edit_transaction'),
     path('transaction/delete/<int:transaction_id>/', views.delete_transaction, name='delete_transaction'),
+    path('transaction/transfer/', views.add_transfer, name='add_transfer'),
+    path('transaction/batch/', views.batch_transactions, name='batch_transactions'),
+    path('transaction/import/', views.import_transactions_view, name='import_transactions'),
+    path('transaction/search/', views.search_transactions_view, name='search_transactions'),
+    path('export/<slug:kind>.<slug:fmt>', views.export_ledger, name='export_ledger'),
 
     # Accounts
-    path('accounts/', views.accounts, name='accounts'),
+    path('accounts/', dashboard.accounts, name='accounts'),
     path('accounts/add/', views.add_account, name='add_account'),
     path('accounts/edit/<int:account_id>/', views.edit_account, name='edit_account'),
     path('accounts/delete/<int:account_id>/', views.delete_account, name='delete_account'),
@@ -25,13 +35,16 @@ urlpatterns = [
     path('categories/delete/<int:category_id>/', views.delete_category, name='delete_category'),
 
     # Chart & Settings
-    path('chart/', views.chart, name='chart'),
-    path('chart/<int:year>/<int:month>/', views.chart, name='chart_month'),
+    path('chart/', dashboard.chart, name='chart'),
+    path('chart/<int:year>/<int:month>/', dashboard.chart, name='chart_month'),
+    path('chart/data/', views.chart_data_api, name='chart_data'),
     path('settings/', views.settings, name='settings'),
 
     # Budget
     path('budget/', views.budget_default, name='budget_default'),
-    path('budget/<int:year>/<int:month>/', views.budget, name='budget'),
+    path('budget/<int:year>/', views.budget_year, name='budget_year'),
+    path('budget/<int:year>/data/', views.budget_year_data, name='budget_year_data'),
+    path('budget/<int:year>/<int:month>/', dashboard.budget, name='budget'),
     path('budget/save/', views.save_budget, name='save_budget'),
     path('budget/spent/', views.get_budget_spent, name='get_budget_spent'),
 ]
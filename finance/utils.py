@@ -1,9 +1,12 @@
 # Finance App Utility Functions
-import json
+from calendar import monthrange
+from datetime import date
+from dataclasses import dataclass, field
 from decimal import Decimal
-from django.db.models import Sum, DecimalField
+from django.db.models import Sum, DecimalField, Q, Value
 from django.db.models.functions import Coalesce
-from .models import Account, Transaction, Category
+from .fx import base_currency, in_base, rate_expression
+from .models import Account
 
 
 # ---------------------------
@@ -17,88 +20,90 @@ def get_user_or_guest(user):
 
 
 # ---------------------------
-# CALCULATE TOTALS
+# MONTH RANGE
 # ---------------------------
-def calculate_totals(user):
+def month_range(year, month):
     """
-    Returns total_income, total_expense, total_balance
+    Returns (first_day, last_day) of the month. Filtering with
+    date__range=month_range(...) lets the (…, date) indexes be used, unlike
+    date__year / date__month.
     """
-    if not user:
-        return 0, 0, 0
-
-    accounts = Account.objects.filter(user=user)
-
-    # Total income
-    total_income = Transaction.objects.filter(
-        account__user=user, type='income'
-    ).aggregate(
-        total=Coalesce(Sum('amount'), 0, output_field=DecimalField())
-    )['total']
-
-    # Total expense
-    total_expense = Transaction.objects.filter(
-        account__user=user, type='expense'
-    ).aggregate(
-        total=Coalesce(Sum('amount'), 0, output_field=DecimalField())
-    )['total']
-
-    # Total balance = initial_amount + income - expense per account
-    total_balance = 0
-    for a in accounts:
-        income = Transaction.objects.filter(account=a, type='income').aggregate(
-            total=Coalesce(Sum('amount'), 0, output_field=DecimalField())
-        )['total']
-        expense = Transaction.objects.filter(account=a, type='expense').aggregate(
-            total=Coalesce(Sum('amount'), 0, output_field=DecimalField())
-        )['total']
-        total_balance += a.initial_amount + income - expense
-
-    return total_income, total_expense, total_balance
+    return date(year, month, 1), date(year, month, monthrange(year, month)[1])
 
 
 # ---------------------------
-# PREPARE CHART DATA
+# LEDGER SUMMARY
 # ---------------------------
-def prepare_chart_data(user):
+@dataclass
+class LedgerSummary:
+    """
+    Per-account income/expense/transfers/balance in the account's currency,
+    plus user-wide totals in the user's base currency. Transfers move
+    balances but aren't income or expense.
+    """
+    accounts: list = field(default_factory=list)
+    total_income: Decimal = Decimal("0")
+    total_expense: Decimal = Decimal("0")
+    total_balance: Decimal = Decimal("0")
+
+    def as_tuple(self):
+        return self.total_income, self.total_expense, self.total_balance
+
+
+def _ledger_rows(user):
+    zero = Value(Decimal("0"), output_field=DecimalField())
+    base = base_currency(user)
+    # Flows convert at each rollup month's rate, balances at today's
+    converted = in_base("rollups__total", base, currency="currency", on="rollups__month")
+    return (
+        Account.objects.filter(user=user)
+        .annotate(
+            income=Coalesce(Sum("rollups__total", filter=Q(rollups__type="income")), zero),
+            expense=Coalesce(Sum("rollups__total", filter=Q(rollups__type="expense")), zero),
+            income_base=Coalesce(Sum(converted, filter=Q(rollups__type="income")), zero),
+            expense_base=Coalesce(Sum(converted, filter=Q(rollups__type="expense")), zero),
+            transfers_in=Coalesce(Sum("rollups__total", filter=Q(rollups__type="transfer_in")), zero),
+            transfers_out=Coalesce(Sum("rollups__total", filter=Q(rollups__type="transfer_out")), zero),
+            rate=rate_expression(base, currency="currency", on=date.today()),
+        )
+        .values("id", "name", "icon", "currency", "initial_amount", "balance",
+                "income", "expense", "income_base", "expense_base", "transfers_in", "transfers_out", "rate")
+        .order_by("id")
+    )
+
+
+def _summarise_ledger(rows):
+    summary = LedgerSummary()
+    for row in rows:
+        row["computed_balance"] = (
+            row["initial_amount"] + row["income"] - row["expense"] + row["transfers_in"] - row["transfers_out"]
+        )
+        summary.accounts.append(row)
+        summary.total_income += row["income_base"]
+        summary.total_expense += row["expense_base"]
+        # Accounts in a currency with no rates loaded are left out
+        if row["rate"] is not None:
+            summary.total_balance += row["computed_balance"] * row["rate"]
+    summary.total_balance = summary.total_balance.quantize(Decimal("0.01"))
+    return summary
+
+
+def get_ledger_summary(user):
     """
-    Prepares JSON data for charts: income, expense, monthly, category colors
+    Builds a LedgerSummary in one grouped query: accounts joined to their
+    monthly rollups with income and expense summed by conditional
+    aggregation, natively and converted to the user's base currency.
     """
     if not user:
-        return {'income_json': '{}', 'expense_json': '{}', 'monthly_json': '[]', 'category_colors_json': '{}'}
-
-    transactions = Transaction.objects.filter(account__user=user).select_related('category')
-    categories = Category.objects.filter(user=user)
-
-    income_data, expense_data, category_colors = {}, {}, {}
-    
-    # Category colors
-    for cat in categories:
-        category_colors[cat.name] = getattr(cat, 'color', '#ddd')
-
-    # Income / Expense totals per category
-    for t in transactions:
-        target = income_data if t.type == 'income' else expense_data
-        target[t.category.name] = target.get(t.category.name, 0) + t.amount
-
-    # Monthly totals
-    monthly_data = []
-    months = sorted({t.date.replace(day=1) for t in transactions})
-    for m in months:
-        month_income = transactions.filter(
-            date__year=m.year, date__month=m.month, type='income'
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        month_expense = transactions.filter(
-            date__year=m.year, date__month=m.month, type='expense'
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        monthly_data.append({
-            'date': m.strftime("%b %Y"),
-            'income': float(month_income),
-            'expense': float(month_expense)
-        })
-
-    return {
-        'income_json': json.dumps({k: float(v) for k, v in income_data.items()}),
-        'expense_json': json.dumps({k: float(v) for k, v in expense_data.items()}),
-        'monthly_json': json.dumps(monthly_data),
-        'category_colors_json': json.dumps(category_colors)
-    }
+        return LedgerSummary()
+    return _summarise_ledger(_ledger_rows(user))
+
+
+async def aget_ledger_summary(user):
+    """
+    Async get_ledger_summary.
+    """
+    if not user:
+        return LedgerSummary()
+    return _summarise_ledger([row async for row in _ledger_rows(user)])
+
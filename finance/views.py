@@ -1,61 +1,51 @@
 # finance/views.py
+import io
 import json
 from decimal import Decimal, InvalidOperation
-from collections import defaultdict
-from calendar import monthrange
 from datetime import date
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
 from django.db.models import Sum
 
-from .forms import AccountForm, CategoryForm, TransactionForm
-from .models import Account, Category, Transaction, Budget
-from .utils import get_user_or_guest, calculate_totals
+from .forms import AccountForm, CategoryForm, TransactionForm, TransferForm
+from .models import Account, Category, Transaction, Budget, currency_code_validator
+from .utils import get_user_or_guest, get_ledger_summary, month_range
+from .rollups import month_totals, category_totals, budget_status
 from .constants import (
     DEFAULT_ACCOUNTS, DEFAULT_ACCOUNT_ICONS,
     DEFAULT_CATEGORIES, DEFAULT_CATEGORY_ICONS, DEFAULT_CATEGORY_COLORS
 )
-from .signals import recalc_account_balance
+from .signals import apply_balance_delta
+from .batch import BatchError, apply_batch
+from .importers import import_transactions, parse_rows
+from .exports import EXPORTS, FORMATS, ExportFilterError, encode, export_rows
+from .budgets import cached_budget_matrix
+from .cache import conditional_on_data_version, guest_page_cache
+from .charts import BUCKETS, cached_chart_data, period_range
+from .feed import CursorError, day_groups_page
+from .search import SearchError, parse_filters, search_transactions
+from .fx import annotate_base_amounts, base_currency, in_base
+from .transfers import TransferError, create_transfer
 
 # ---------------- Home Dashboard ----------------
-def home(request, year=None, month=None):
-    user = get_user_or_guest(request.user)
-    today = date.today()
-    year = int(year) if year else today.year
-    month = int(month) if month else today.month
-    month_start = date(year, month, 1)
-    month_end = date(year, month, monthrange(year, month)[1])
-
-    txs = Transaction.objects.filter(account__user=user, date__range=(month_start, month_end)) if user else Transaction.objects.none()
-
-    transactions_by_date = defaultdict(lambda: {"items": [], "total_income": 0, "total_expense": 0})
-    for tx in txs:
-        date_str = str(tx.date)
-        transactions_by_date[date_str]["items"].append(tx)
-        if tx.type == "income":
-            transactions_by_date[date_str]["total_income"] += tx.amount
-        else:
-            transactions_by_date[date_str]["total_expense"] += tx.amount
-
-    total_income = txs.filter(type="income").aggregate(total=Sum("amount"))["total"] or 0
-    total_expense = txs.filter(type="expense").aggregate(total=Sum("amount"))["total"] or 0
-    balance = total_income - total_expense
-    accounts_list = Account.objects.filter(user=user) if user else []
-
+def _home_context(user, year, month, days, next_cursor, totals, accounts_list):
+    total_income = totals["income"]
+    total_expense = totals["expense"]
     prev_year, prev_month_num = prev_month(year, month)
     next_year, next_month_num = next_month(year, month)
-
-    return render(request, 'finance/home.html', {
+    return {
         "active": "home",
         "accounts": accounts_list,
         "total_income": total_income,
         "total_expense": total_expense,
-        "balance": balance,
-        "transactions_by_date": dict(transactions_by_date),
+        "balance": total_income - total_expense,
+        "transactions_by_date": {str(day["date"]): day for day in days},
+        "next_cursor": next_cursor,
         "current_year": year,
         "current_month": month,
         "prev_year": prev_year,
@@ -63,10 +53,111 @@ def home(request, year=None, month=None):
         "next_year": next_year,
         "next_month": next_month_num,
         "is_authenticated": bool(user),
+    }
+
+@conditional_on_data_version
+@guest_page_cache
+def home(request, year=None, month=None):
+    user = get_user_or_guest(request.user)
+    today = date.today()
+    year = int(year) if year else today.year
+    month = int(month) if month else today.month
+    month_start, _ = month_range(year, month)
+
+    if not user:
+        context = _home_context(None, year, month, [], None, {"income": 0, "expense": 0}, [])
+        return render(request, 'finance/home.html', context)
+
+    # First page of day groups only; home.js loads the rest from home_days
+    days, next_cursor = day_groups_page(user, year, month)
+    totals = month_totals(user, month_start)
+    accounts_list = Account.objects.filter(user=user)
+    return render(request, 'finance/home.html', _home_context(user, year, month, days, next_cursor, totals, accounts_list))
+
+
+@conditional_on_data_version
+def home_days(request, year, month):
+    """
+    JSON page of the month's day groups, newest first. Pass the returned
+    `next` back as ?after= to get the following page; `next` is null at the end.
+    """
+    user = get_user_or_guest(request.user)
+    if not user:
+        return JsonResponse({"success": True, "days": [], "next": None})
+    try:
+        month_range(year, month)
+        days, next_cursor = day_groups_page(user, year, month, after=request.GET.get("after"))
+    except (ValueError, CursorError):
+        return JsonResponse({"success": False, "error": "Invalid page"}, status=400)
+
+    return JsonResponse({
+        "success": True,
+        "days": [
+            {
+                "date": str(day["date"]),
+                "total_income": float(day["total_income"]),
+                "total_expense": float(day["total_expense"]),
+                "items": [_transaction_payload(tx) for tx in day["items"]],
+            }
+            for day in days
+        ],
+        "next": next_cursor,
     })
 
 
 # ---------------- Transactions CRUD ----------------
+def _transaction_payload(tx):
+    return {
+        "id": tx.id,
+        "amount": float(tx.amount),
+        "type": tx.type,
+        "account_id": tx.account_id,
+        "category_id": tx.category_id,
+        "category_name": tx.category.name if tx.category else "",
+        "category_icon": tx.category.icon if tx.category else "",
+        "date": str(tx.date),
+        "note": tx.note,
+        "counterpart_id": tx.counterpart_id,
+        # Set by fx.annotate_base_amounts
+        **({"currency": tx.currency,
+            "base_amount": None if tx.base_amount is None else float(tx.base_amount)}
+           if hasattr(tx, "base_amount") else {}),
+    }
+
+def _budget_info(category, status):
+    spent, budget_amount = status["spent"], status["budget"]
+    return {
+        "category_id": category.id,
+        "spent": float(spent),
+        "budget": float(budget_amount),
+        "name": category.name,
+        "icon": category.icon,
+        "exceeded": budget_amount > 0 and spent > budget_amount,
+    }
+
+def _budget_payloads(user, category_months, categories):
+    """
+    Budget info for each (category_id, month) pair, from budget_status.
+    `categories` maps id -> Category for names and icons.
+    """
+    payloads = []
+    for (category_id, month), status in sorted(budget_status(user, category_months).items()):
+        category = categories.get(category_id)
+        if category is None or category.type != "expense":
+            continue
+        payloads.append({**_budget_info(category, status), "year": month.year, "month": month.month})
+    return payloads
+
+def _totals_payload(user):
+    total_income, total_expense, total_balance = get_ledger_summary(user).as_tuple()
+    return {
+        "total_income": float(total_income),
+        "total_expense": float(total_expense),
+        "balance": float(total_balance),
+    }
+
+# Write responses below are built from the ledger summary (one query) and
+# budget_status (two queries), so their cost doesn't grow with the ledger.
 @login_required
 def add_transaction(request):
     user = get_user_or_guest(request.user)
@@ -74,61 +165,20 @@ def add_transaction(request):
         return JsonResponse({"error": "login_required"}, status=403)
 
     if request.method == "POST" and request.headers.get("x-requested-with") == "XMLHttpRequest":
-        form = TransactionForm(request.POST)
+        form = TransactionForm(request.POST, user=user)
         if form.is_valid():
             tx = form.save(commit=False)
-            tx.account = Account.objects.get(id=request.POST.get("account"), user=user)
-            tx.category = Category.objects.get(id=request.POST.get("category"), user=user)
             tx.user = user
             tx.save()
+            annotate_base_amounts([tx], base_currency(user))
 
-            # Recalculate totals
-            total_income, total_expense, total_balance = calculate_totals(user)
-
-            # Budget info
-            budget_obj = Budget.objects.filter(
-                user=user,
-                category=tx.category,
-                month=tx.date.month,
-                year=tx.date.year
-            ).first()
-
-            # Total spent in category this month
-            spent = Transaction.objects.filter(
-                user=user,
-                type='expense',
-                category=tx.category,
-                date__year=tx.date.year,
-                date__month=tx.date.month
-            ).aggregate(total=Sum('amount'))['total'] or 0
-
-            budget_amount = float(budget_obj.amount) if budget_obj else 0
-            category_spent = spent  # ✅ fixed undefined variable
-
+            key = (tx.category_id, tx.date.replace(day=1))
+            budget = _budget_info(tx.category, budget_status(user, [key])[key])
             return JsonResponse({
                 "success": True,
-                "total_income": float(total_income),
-                "total_expense": float(total_expense),
-                "balance": float(total_balance),
-                "transaction": {
-                    "id": tx.id,
-                    "amount": float(tx.amount),
-                    "type": tx.type,
-                    "category_id": tx.category.id,
-                    "category_name": tx.category.name,
-                    "category_icon": tx.category.icon,
-                    "date": str(tx.date),
-                    "note": tx.note,
-                    "category_spent": float(category_spent),
-                },
-                "budget": {
-                    "category_id": tx.category.id,
-                    "spent": float(spent),
-                    "budget": budget_amount,
-                    "name": tx.category.name,
-                    "icon": tx.category.icon,
-                    "exceeded": budget_amount > 0 and spent > budget_amount
-                }
+                **_totals_payload(user),
+                "transaction": {**_transaction_payload(tx), "category_spent": budget["spent"]},
+                "budget": budget,
             })
 
         return JsonResponse({"success": False, "error": form.errors.as_json()}, status=400)
@@ -138,9 +188,9 @@ def add_transaction(request):
     budgets = {}
     today = timezone.now().date()
     month, year = today.month, today.year
-    txs = Transaction.objects.filter(user=user, type='expense', date__month=month, date__year=year)
+    spent_map = category_totals(user, today, tx_type='expense')
     for b in Budget.objects.filter(user=user, month=month, year=year):
-        spent = txs.filter(category=b.category).aggregate(total=Sum('amount'))['total'] or 0
+        spent = spent_map.get(b.category_id, 0)
         budgets[str(b.category.id)] = {
             "budget": float(b.amount),
             "spent": float(spent),
@@ -156,157 +206,233 @@ def add_transaction(request):
 
 @login_required
 def edit_transaction(request, transaction_id):
-    tx = get_object_or_404(Transaction, id=transaction_id, account__user=request.user)
+    tx = get_object_or_404(
+        Transaction.objects.select_related("category"), id=transaction_id, account__user=request.user
+    )
 
     if request.method == "POST" and request.headers.get("x-requested-with") == "XMLHttpRequest":
+        if tx.type in Transaction.TRANSFER_TYPES:
+            return JsonResponse({"success": False, "error": "Transfers can't be edited; delete it and transfer again"},
+                                status=400)
         # Save old values before updating
         old_amount = float(tx.amount)
-        old_category_id = tx.category.id if tx.category else None
+        old_category = tx.category
         old_date = tx.date
 
-        form = TransactionForm(request.POST, instance=tx)
+        form = TransactionForm(request.POST, instance=tx, user=request.user)
         if form.is_valid():
             tx = form.save(commit=False)
-            tx.account = Account.objects.get(id=request.POST.get("account"), user=request.user)
-            tx.category = Category.objects.get(id=request.POST.get("category"), user=request.user)
             tx.user = request.user
             tx.save()
+            annotate_base_amounts([tx], base_currency(request.user))
+
+            new_key = (tx.category_id, tx.date.replace(day=1))
+            keys = [new_key]
+            category_changed = old_category is not None and old_category.id != tx.category_id
+            if category_changed:
+                old_key = (old_category.id, old_date.replace(day=1))
+                keys.append(old_key)
+            statuses = budget_status(request.user, keys)
 
-            total_income, total_expense, total_balance = calculate_totals(request.user)
-
-            # Spent for new category
-            new_category_spent = Transaction.objects.filter(
-                user=request.user,
-                type='expense',
-                category=tx.category,
-                date__year=tx.date.year,
-                date__month=tx.date.month
-            ).aggregate(total=Sum('amount'))['total'] or 0
-
-            # Budget info for new category
-            budget_obj = Budget.objects.filter(
-                user=request.user,
-                category=tx.category,
-                month=tx.date.month,
-                year=tx.date.year
-            ).first()
-            new_budget_amount = float(budget_obj.amount) if budget_obj else 0
-            new_exceeded = new_budget_amount > 0 and new_category_spent > new_budget_amount
-
-            # If category changed, get old category spent & budget
-            old_category_data = None
-            if old_category_id and old_category_id != tx.category.id:
-                old_category_spent = Transaction.objects.filter(
-                    user=request.user,
-                    type='expense',
-                    category_id=old_category_id,
-                    date__year=old_date.year,
-                    date__month=old_date.month
-                ).aggregate(total=Sum('amount'))['total'] or 0
-
-                old_budget_obj = Budget.objects.filter(
-                    user=request.user,
-                    category_id=old_category_id,
-                    month=old_date.month,
-                    year=old_date.year
-                ).first()
-                old_budget_amount = float(old_budget_obj.amount) if old_budget_obj else 0
-                old_exceeded = old_budget_amount > 0 and old_category_spent > old_budget_amount
-
-                old_category_data = {
-                    "category_id": old_category_id,
-                    "spent": float(old_category_spent),
-                    "budget": old_budget_amount,
-                    "exceeded": old_exceeded
-                }
+            budget = _budget_info(tx.category, statuses[new_key])
+            # If category changed, the front-end also updates the old one
+            old_category_data = _budget_info(old_category, statuses[old_key]) if category_changed else None
 
             return JsonResponse({
                 "success": True,
-                "total_income": float(total_income),
-                "total_expense": float(total_expense),
-                "balance": float(total_balance),
+                **_totals_payload(request.user),
                 "transaction": {
-                    "id": tx.id,
-                    "amount": float(tx.amount),
-                    "type": tx.type,
-                    "category_id": tx.category.id,
-                    "category_name": tx.category.name,
-                    "category_icon": tx.category.icon,
-                    "date": str(tx.date),
+                    **_transaction_payload(tx),
                     "old_amount": old_amount,
-                    "old_category_id": old_category_id,
-                    "note": tx.note,
-                    "category_spent": float(new_category_spent)
+                    "old_category_id": old_category.id if old_category else None,
+                    "category_spent": budget["spent"],
                 },
-                "budget": {
-                    "category_id": tx.category.id,
-                    "spent": float(new_category_spent),
-                    "budget": new_budget_amount,
-                    "name": tx.category.name,
-                    "icon": tx.category.icon,
-                    "exceeded": new_exceeded
-                },
-                "old_category_budget": old_category_data  # ✅ for front-end to update old category
+                "budget": budget,
+                "old_category_budget": old_category_data,
             })
         return JsonResponse({"success": False, "error": form.errors.as_json()}, status=400)
 
 @login_required
 def delete_transaction(request, transaction_id):
-    tx = get_object_or_404(Transaction, id=transaction_id, account__user=request.user)
+    tx = get_object_or_404(
+        Transaction.objects.select_related("category", "account"), id=transaction_id, account__user=request.user
+    )
     if request.method == "POST" and request.headers.get('x-requested-with') == 'XMLHttpRequest':
         category = tx.category
-        tx_date = tx.date
-        tx.delete()
-
-        total_income, total_expense, total_balance = calculate_totals(request.user)
-        category_spent = calculate_category_spent(request.user, category.id)  # ✅ fixed
-
-        # Budget info
-        budget_obj = Budget.objects.filter(
-            user=request.user,
-            category=category,
-            month=tx_date.month,
-            year=tx_date.year
-        ).first()
-        spent = Transaction.objects.filter(
-            user=request.user,
-            type='expense',
-            category=category,
-            date__year=tx_date.year,
-            date__month=tx_date.month
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        budget_amount = float(budget_obj.amount) if budget_obj else 0
+        if tx.counterpart_id:
+            # Both legs of a transfer, each through the ledger signals
+            Transaction.objects.filter(pk__in=[tx.pk, tx.counterpart_id], account__user=request.user).delete()
+        else:
+            tx.delete()
+
+        budget = None
+        if category:
+            key = (category.id, tx.date.replace(day=1))
+            budget = _budget_info(category, budget_status(request.user, [key])[key])
 
         return JsonResponse({
             "success": True,
             "amount": float(tx.amount),
-            "category_id": category.id,
-            "category_spent": float(category_spent),
-            "total_income": float(total_income),
-            "total_expense": float(total_expense),
-            "balance": float(total_balance),
+            "category_id": category.id if category else None,
+            "category_spent": budget["spent"] if budget else 0.0,
+            **_totals_payload(request.user),
             "transaction_id": transaction_id,
-            "budget": {
-                "category_id": category.id,
-                "spent": float(spent),
-                "budget": budget_amount,
-                "name": category.name,
-                "icon": category.icon,
-                "exceeded": budget_amount > 0 and spent > budget_amount
-            }
+            "counterpart_id": tx.counterpart_id,
+            "budget": budget,
         })
 
     return JsonResponse({"success": False, "error": "Invalid request"}, status=400)
 
-# ---------------- Accounts CRUD ----------------
-def accounts(request):
+@login_required
+def add_transfer(request):
+    """
+    Moves money between two of the user's accounts: a linked transfer_out /
+    transfer_in pair created in one DB transaction. POST from_account,
+    to_account, amount and optionally to_amount, date, note.
+    """
+    if request.method != "POST" or request.headers.get("x-requested-with") != "XMLHttpRequest":
+        return JsonResponse({"success": False, "error": "Invalid request"}, status=400)
+    form = TransferForm(request.POST, user=request.user)
+    if not form.is_valid():
+        return JsonResponse({"success": False, "error": form.errors.as_json()}, status=400)
+    data = form.cleaned_data
+    try:
+        outgoing, incoming = create_transfer(
+            request.user, data["from_account"], data["to_account"], data["amount"],
+            day=data["date"], note=data["note"], to_amount=data["to_amount"],
+        )
+    except TransferError as exc:
+        return JsonResponse({"success": False, "error": str(exc)}, status=400)
+    annotate_base_amounts([outgoing, incoming], base_currency(request.user))
+
+    summary = get_ledger_summary(request.user)
+    return JsonResponse({
+        "success": True,
+        "total_income": float(summary.total_income),
+        "total_expense": float(summary.total_expense),
+        "balance": float(summary.total_balance),
+        "accounts": [
+            {"id": a["id"], "balance": float(a["computed_balance"])}
+            for a in summary.accounts if a["id"] in (outgoing.account_id, incoming.account_id)
+        ],
+        "transactions": [_transaction_payload(outgoing), _transaction_payload(incoming)],
+    })
+
+@login_required
+def batch_transactions(request):
+    """
+    Applies a JSON list of create / update / delete operations in one DB
+    transaction and returns the consolidated totals and budget info.
+    Body: {"operations": [{"op": "create", ...}, {"op": "update", "id": 1, ...}, {"op": "delete", "id": 2}]}
+    """
+    if request.method != "POST" or request.headers.get("x-requested-with") != "XMLHttpRequest":
+        return JsonResponse({"success": False, "error": "Invalid request"}, status=400)
+    try:
+        operations = json.loads(request.body or b"{}").get("operations")
+    except (ValueError, AttributeError):
+        return JsonResponse({"success": False, "error": "Invalid JSON"}, status=400)
+
+    try:
+        result = apply_batch(request.user, operations)
+    except BatchError as exc:
+        return JsonResponse({"success": False, "error": str(exc), "index": exc.index}, status=400)
+    annotate_base_amounts(result.created + result.updated, base_currency(request.user))
+
+    summary = get_ledger_summary(request.user)
+    return JsonResponse({
+        "success": True,
+        "total_income": float(summary.total_income),
+        "total_expense": float(summary.total_expense),
+        "balance": float(summary.total_balance),
+        "accounts": [
+            {"id": a["id"], "balance": float(a["computed_balance"])}
+            for a in summary.accounts if a["id"] in result.accounts
+        ],
+        "created": [_transaction_payload(tx) for tx in result.created],
+        "updated": [_transaction_payload(tx) for tx in result.updated],
+        "deleted": result.deleted,
+        "budgets": _budget_payloads(request.user, result.category_months, result.categories),
+    })
+
+@login_required
+def import_transactions_view(request):
+    if request.method != "POST" or request.headers.get("x-requested-with") != "XMLHttpRequest":
+        return JsonResponse({"success": False, "error": "Invalid request"}, status=400)
+
+    upload = request.FILES.get("file")
+    if not upload:
+        return JsonResponse({"success": False, "error": "No file uploaded"}, status=400)
+
+    fmt = request.POST.get("format") or upload.name.rsplit(".", 1)[-1].lower()
+    if fmt not in ("csv", "ofx"):
+        return JsonResponse({"success": False, "error": "Unsupported file format"}, status=400)
+
+    account = None
+    if request.POST.get("account"):
+        try:
+            account = Account.objects.filter(id=int(request.POST["account"]), user=request.user).first()
+        except ValueError:
+            pass
+        if not account:
+            return JsonResponse({"success": False, "error": "Account not found"}, status=400)
+
+    lines = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    result = import_transactions(
+        request.user,
+        parse_rows(fmt, lines, request.POST.get("date_format") or "%Y-%m-%d"),
+        default_account=account,
+    )
+    if result.aborted:
+        return JsonResponse({"success": False, "error": result.errors[-1], **result.as_dict()}, status=400)
+    return JsonResponse({"success": True, **result.as_dict()})
+
+@login_required
+def export_ledger(request, kind, fmt):
+    if kind not in EXPORTS or fmt not in FORMATS:
+        return JsonResponse({"success": False, "error": "Unknown export"}, status=404)
+    try:
+        header, rows = export_rows(kind, request.user, request.GET)
+    except ExportFilterError as exc:
+        return JsonResponse({"success": False, "error": str(exc)}, status=400)
+
+    response = StreamingHttpResponse(encode(fmt, header, rows), content_type=FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="budgetbee-{kind}.{fmt}"'
+    return response
+
+@conditional_on_data_version
+def search_transactions_view(request):
+    """
+    JSON search over notes, category and account names: ?q= plus optional
+    min_amount, max_amount, start, end (YYYY-MM-DD), type and page.
+    """
     user = get_user_or_guest(request.user)
+    try:
+        page = int(request.GET.get("page", 1))
+        filters = parse_filters(request.GET)
+        if not user:
+            return JsonResponse({"success": True, "results": [], "page": page, "next": None})
+        results, has_next = search_transactions(user, request.GET.get("q", ""), page=page, **filters)
+        annotate_base_amounts(results, base_currency(user))
+    except (ValueError, SearchError) as e:
+        return JsonResponse({"success": False, "error": str(e) if isinstance(e, SearchError) else "Invalid page"},
+                            status=400)
+
+    return JsonResponse({
+        "success": True,
+        "results": [{**_transaction_payload(tx), "account_name": tx.account.name} for tx in results],
+        "page": page,
+        "next": page + 1 if has_next else None,
+    })
+
+
+# ---------------- Accounts CRUD ----------------
+def _accounts_context(user, summary):
     if user:
         accounts_list = [
-            {"id": a.id, "name": a.name, "balance": a.balance, "icon": a.icon} 
-            for a in Account.objects.filter(user=user)
+            {"id": a["id"], "name": a["name"], "balance": a["balance"], "icon": a["icon"], "currency": a["currency"]}
+            for a in summary.accounts
         ]
-        total_income, total_expense, total_balance = calculate_totals(user)
+        total_income, total_expense, total_balance = summary.as_tuple()
     else:
         accounts_list = [
             {"id": i+1, "name": name, "balance": balance, "icon": icon} 
@@ -314,7 +440,7 @@ def accounts(request):
         ]
         total_income = total_expense = total_balance = 0.0
 
-    return render(request, 'finance/accounts.html', {
+    return {
         "active": "accounts",
         "user_accounts": accounts_list,
         "total_balance": total_balance,
@@ -322,7 +448,14 @@ def accounts(request):
         "total_expense": total_expense,
         "is_authenticated": bool(user),
         "default_account_icons": DEFAULT_ACCOUNT_ICONS
-    })
+    }
+
+@conditional_on_data_version
+@guest_page_cache
+def accounts(request):
+    user = get_user_or_guest(request.user)
+    summary = get_ledger_summary(user) if user else None
+    return render(request, 'finance/accounts.html', _accounts_context(user, summary))
 
 @login_required
 def add_account(request):
@@ -336,7 +469,13 @@ def add_account(request):
             return JsonResponse({"success": False, "error": "Invalid initial amount"}, status=400)
         if not name:
             return JsonResponse({"success": False, "error": "Account name required"})
-        Account.objects.create(user=request.user, name=name, initial_amount=initial_amount, balance=initial_amount, icon=icon)
+        currency = request.POST.get('currency', '').strip().upper() or base_currency(request.user)
+        try:
+            currency_code_validator(currency)
+        except ValidationError as e:
+            return JsonResponse({"success": False, "error": e.messages[0]}, status=400)
+        Account.objects.create(user=request.user, name=name, initial_amount=initial_amount, balance=initial_amount,
+                               icon=icon, currency=currency)
         return JsonResponse({"success": True})
     return JsonResponse({"success": False, "error": "Invalid request"}, status=400)
 
@@ -353,11 +492,13 @@ def edit_account(request, account_id):
             return JsonResponse({"success": False, "error": "Invalid initial amount"}, status=400)
         if not name:
             return JsonResponse({"success": False, "error": "Account name required"})
+        old_initial_amount = account.initial_amount
         account.name = name
         account.initial_amount = initial_amount
         account.icon = icon
-        account.save()
-        recalc_account_balance(account)
+        # Leave balance out of the save; it only moves by delta
+        account.save(update_fields=["name", "initial_amount", "icon"])
+        apply_balance_delta(account.pk, initial_amount - old_initial_amount)
         return JsonResponse({"success": True})
     return JsonResponse({"success": False, "error": "Invalid request"}, status=400)
 
@@ -371,6 +512,8 @@ def delete_account(request, account_id):
 
 
 # ---------------- Categories CRUD ----------------
+@conditional_on_data_version
+@guest_page_cache
 def category(request):
     ctype = request.GET.get('type', 'expense')
     user = get_user_or_guest(request.user)
@@ -426,16 +569,9 @@ def delete_category(request, category_id):
 
     
 # ---------------- Charts ----------------
-def chart(request, year=None, month=None):
-    user = get_user_or_guest(request.user)
-    today = date.today()
-    year = int(year) if year else today.year
-    month = int(month) if month else today.month
-    month_start = date(year, month, 1)
-    month_end = date(year, month, monthrange(year, month)[1])
-
-    if not user:
-        return render(request, 'finance/chart.html', {
+def _chart_context(year, month, data):
+    if data is None:
+        return {
             'active': 'chart',
             'income_json': '{}',
             'expense_json': '{}',
@@ -444,75 +580,73 @@ def chart(request, year=None, month=None):
             'current_year': year,
             'current_month': month,
             'is_authenticated': False,
-        })
-
-    txs = Transaction.objects.filter(account__user=user, date__range=(month_start, month_end)).select_related('category')
-    income_data, expense_data = defaultdict(float), defaultdict(float)
-    monthly_totals = []
-
-    for tx in txs:
-        cat_name = tx.category.name
-        if tx.type == "income":
-            income_data[cat_name] += float(tx.amount)
-        else:
-            expense_data[cat_name] += float(tx.amount)
-
-        date_str = str(tx.date)
-        entry = next((x for x in monthly_totals if x["date"] == date_str), None)
-        if not entry:
-            entry = {"date": date_str, "income": 0, "expense": 0}
-            monthly_totals.append(entry)
-        if tx.type == "income":
-            entry["income"] += float(tx.amount)
-        else:
-            entry["expense"] += float(tx.amount)
-
-    category_colors = {c.name: c.color for c in Category.objects.filter(user=user)}
-
-    return render(request, 'finance/chart.html', {
+        }
+    return {
         'active': 'chart',
-        'income_json': json.dumps(income_data),
-        'expense_json': json.dumps(expense_data),
-        'monthly_json': json.dumps(monthly_totals),
-        'category_colors_json': json.dumps(category_colors),
+        'income_json': json.dumps(data["income"]),
+        'expense_json': json.dumps(data["expense"]),
+        'monthly_json': json.dumps(data["series"]),
+        'category_colors_json': json.dumps(data["category_colors"]),
         'current_year': year,
         'current_month': month,
         'is_authenticated': True,
-    })
+    }
 
+@conditional_on_data_version
+@guest_page_cache
+def chart(request, year=None, month=None):
+    user = get_user_or_guest(request.user)
+    today = date.today()
+    year = int(year) if year else today.year
+    month = int(month) if month else today.month
+    month_start, month_end = month_range(year, month)
 
+    data = cached_chart_data(user, month_start, month_end, bucket="day") if user else None
+    return render(request, 'finance/chart.html', _chart_context(year, month, data))
 
 
-# ---------------- Budget Views ----------------
-def budget_default(request):
+@conditional_on_data_version
+def chart_data_api(request):
+    """
+    JSON chart data for any window: ?period=month|quarter|year|last12 anchored
+    on ?year=&month=, or explicit ?start=&end= (YYYY-MM-DD). ?bucket=day|month.
+    """
+    user = get_user_or_guest(request.user)
     today = date.today()
-    return redirect('finance:budget', year=today.year, month=today.month)
+    period = request.GET.get("period", "month")
+    try:
+        year = int(request.GET.get("year", today.year))
+        month = int(request.GET.get("month", today.month))
+        if request.GET.get("start") and request.GET.get("end"):
+            start = date.fromisoformat(request.GET["start"])
+            end = date.fromisoformat(request.GET["end"])
+        else:
+            start, end = period_range(period, year, month)
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Invalid range"}, status=400)
+    if start > end or (end - start).days > 366 * 5:
+        return JsonResponse({"success": False, "error": "Invalid range"}, status=400)
 
-@login_required
-def budget(request, year=None, month=None):
-    user = request.user
-    today = date.today()
-    year = int(year) if year else today.year
-    month = int(month) if month else today.month
+    bucket = request.GET.get("bucket") or ("day" if (end - start).days <= 31 else "month")
+    if bucket not in BUCKETS:
+        return JsonResponse({"success": False, "error": "Invalid bucket"}, status=400)
 
-    # Month start/end
-    month_start = date(year, month, 1)
-    month_end = date(year, month, monthrange(year, month)[1])
+    if not user:
+        data = {"start": start.isoformat(), "end": end.isoformat(), "bucket": bucket,
+                "income": {}, "expense": {}, "series": [], "category_colors": {}}
+    else:
+        data = cached_chart_data(user, start, end, bucket)
+    return JsonResponse({"success": True, **data})
 
-    # Categories
-    categories_qs = Category.objects.filter(user=user, type="expense").order_by("name")
 
-    # Transactions
-    transactions = Transaction.objects.filter(user=user, type="expense", date__range=(month_start, month_end))
-    spent_map = defaultdict(Decimal)
-    for tx in transactions:
-        if tx.category_id:
-            spent_map[tx.category_id] += tx.amount
 
-    # Budgets
-    budgets_qs = Budget.objects.filter(user=user, month=month, year=year)
-    budget_map = {b.category_id: b.amount for b in budgets_qs}
 
+# ---------------- Budget Views ----------------
+def budget_default(request):
+    today = date.today()
+    return redirect('finance:budget', year=today.year, month=today.month)
+
+def _budget_context(year, month, categories_qs, spent_map, budget_map):
     categories = []
     budgets_json = {}
     for cat in categories_qs:
@@ -542,7 +676,7 @@ def budget(request, year=None, month=None):
     prev_year, prev_month_num = prev_month(year, month)
     next_year, next_month_num = next_month(year, month)
 
-    context = {
+    return {
         "active": "budget",
         "categories": categories,
         "budgets_json": budgets_json,
@@ -553,9 +687,56 @@ def budget(request, year=None, month=None):
         "next_year": next_year,
         "next_month": next_month_num,
     }
+
+@login_required
+@conditional_on_data_version
+def budget(request, year=None, month=None):
+    user = request.user
+    today = date.today()
+    year = int(year) if year else today.year
+    month = int(month) if month else today.month
+
+    month_start = date(year, month, 1)
+
+    # Categories
+    categories_qs = Category.objects.filter(user=user, type="expense").order_by("name")
+
+    # Spent per category (from monthly rollups)
+    spent_map = category_totals(user, month_start, tx_type="expense")
+
+    # Budgets
+    budgets_qs = Budget.objects.filter(user=user, month=month, year=year)
+    budget_map = {b.category_id: b.amount for b in budgets_qs}
+
+    context = _budget_context(year, month, categories_qs, spent_map, budget_map)
     return render(request, "finance/budget.html", context)
 
 
+@login_required
+@conditional_on_data_version
+def budget_year(request, year):
+    if not date.min.year <= year <= date.max.year:
+        raise Http404("Invalid year")
+    matrix = cached_budget_matrix(request.user, year)
+    return render(request, "finance/budget_year.html", {
+        "active": "budget",
+        "matrix": matrix,
+        "current_year": year,
+        "prev_year": year - 1,
+        "next_year": year + 1,
+    })
+
+@login_required
+@conditional_on_data_version
+def budget_year_data(request, year):
+    """
+    JSON category x month budget matrix for a year (see budgets.budget_matrix).
+    """
+    if not date.min.year <= year <= date.max.year:
+        return JsonResponse({"success": False, "error": "Invalid year"}, status=400)
+    return JsonResponse({"success": True, **cached_budget_matrix(request.user, year)})
+
+
 # ---------------- get_budget_spent (consistency fix) ----------------
 @login_required
 def get_budget_spent(request):
@@ -573,6 +754,8 @@ def get_budget_spent(request):
         category_id = int(category_id)
         month = int(month)
         year = int(year)
+        if not (1 <= month <= 12 and date.min.year <= year <= date.max.year):
+            raise ValueError
     except:
         return JsonResponse({"success": False, "error": "Invalid data"}, status=400)
 
@@ -580,16 +763,15 @@ def get_budget_spent(request):
 
     # Budget for this category/month/year
     budget_obj = Budget.objects.filter(user=request.user, category=category, month=month, year=year).first()
-    budget_amount = float(budget_obj.amount) if budget_obj else 0
+    budget_amount = budget_obj.amount if budget_obj else Decimal("0")
 
     # Total spent
     spent = Transaction.objects.filter(
         user=request.user,
         type="expense",
         category=category,
-        date__year=year,
-        date__month=month
-    ).aggregate(total=Sum("amount"))["total"] or 0
+        date__range=month_range(year, month)
+    ).aggregate(total=Sum(in_base("amount", base_currency(request.user), on="date")))["total"] or 0
 
     percent = int(min((spent / budget_amount * 100) if budget_amount > 0 else 0, 100))
     exceeded = budget_amount > 0 and spent > budget_amount  # ✅ consistency fix
@@ -597,7 +779,7 @@ def get_budget_spent(request):
     return JsonResponse({
         "success": True,
         "spent": float(spent),
-        "budget": budget_amount,
+        "budget": float(budget_amount),
         "percent": percent,
         "exceeded": exceeded,
         "name": category.name,
@@ -621,6 +803,8 @@ def save_budget(request):
         amount = Decimal(amount)
         month = int(month)
         year = int(year)
+        if not (1 <= month <= 12 and date.min.year <= year <= date.max.year):
+            raise ValueError
     except:
         return JsonResponse({"success": False, "error": "Invalid data"}, status=400)
 
@@ -640,9 +824,8 @@ def save_budget(request):
         user=request.user,
         type="expense",
         category=category,
-        date__year=year,
-        date__month=month
-    ).aggregate(total=Sum("amount"))["total"] or Decimal("0")
+        date__range=month_range(year, month)
+    ).aggregate(total=Sum(in_base("amount", base_currency(request.user), on="date")))["total"] or Decimal("0")
 
     percent = int(min((spent / amount * 100) if amount > 0 else 0, 100))
     exceeded = spent >= amount if amount > 0 else False
@@ -657,18 +840,6 @@ def save_budget(request):
         "icon": category.icon,
     })
   
-def calculate_category_spent(user, category_id):
-    total = (
-        Transaction.objects.filter(
-            user=user,
-            category_id=category_id,
-            type="expense"
-        )
-        .aggregate(total=Sum("amount"))["total"]
-    )
-    return Decimal(total or 0)
-
-
 # ---------------- Month Navigation Helpers ----------------
 def prev_month(year, month):
     if month == 1:
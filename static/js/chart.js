@@ -7,13 +7,48 @@ document.addEventListener("DOMContentLoaded", () => {
     const nextBtn = document.getElementById("nextMonthBtn");
     const monthLabel = document.getElementById("currentMonthLabel");
     const toggleBtns = document.querySelectorAll('.toggle-btn');
+    const periodSelect = document.getElementById('chartPeriod');
 
     let chart = null;
     let currentType = 'expense';
+    let currentPeriod = 'month';
+
+    // Months each prev/next click moves for the selected period
+    const PERIOD_STEP = { month: 1, quarter: 3, year: 12, last12: 1 };
 
     function updateMonthLabel() {
         const date = new Date(window.currentYear, window.currentMonth - 1);
-        monthLabel.textContent = date.toLocaleString('default', { month: 'short', year: 'numeric' });
+        const fmt = { month: 'short', year: 'numeric' };
+        if (currentPeriod === 'year') {
+            monthLabel.textContent = String(window.currentYear);
+        } else if (currentPeriod === 'quarter') {
+            monthLabel.textContent = `Q${Math.floor((window.currentMonth - 1) / 3) + 1} ${window.currentYear}`;
+        } else if (currentPeriod === 'last12') {
+            const start = new Date(window.currentYear, window.currentMonth - 12);
+            monthLabel.textContent = `${start.toLocaleString('default', fmt)} – ${date.toLocaleString('default', fmt)}`;
+        } else {
+            monthLabel.textContent = date.toLocaleString('default', fmt);
+        }
+    }
+
+    // Fetch a window from the chart API and re-render without reloading
+    function loadData() {
+        const params = new URLSearchParams({
+            period: currentPeriod,
+            year: window.currentYear,
+            month: window.currentMonth
+        });
+        fetch(`${periodSelect.dataset.url}?${params}`)
+            .then(res => res.ok ? res.json() : Promise.reject("Failed to load chart data"))
+            .then(data => {
+                window.incomeDataAll = data.income;
+                window.expenseDataAll = data.expense;
+                window.monthlyDataAll = data.series;
+                window.categoryColors = data.category_colors;
+                updateMonthLabel();
+                renderChart(currentType);
+            })
+            .catch(err => console.error("❌ Chart data error:", err));
     }
 
     function renderChart(type) {
@@ -51,7 +86,7 @@ document.addEventListener("DOMContentLoaded", () => {
                         },
                         tooltip: {
                             callbacks: {
-                                label: ctx => `${ctx.label}: Rs. ${ctx.parsed}`
+                                label: ctx => `${ctx.label}: ${window.baseCurrency} ${ctx.parsed}`
                             }
                         }
                     },
@@ -90,15 +125,21 @@ document.addEventListener("DOMContentLoaded", () => {
     });
 
     function changeMonth(delta) {
-        let newMonth = window.currentMonth + delta;
-        let newYear = window.currentYear;
-
-        if (newMonth < 1) { newMonth = 12; newYear--; }
-        if (newMonth > 12) { newMonth = 1; newYear++; }
+        const index = window.currentYear * 12 + (window.currentMonth - 1) + delta * PERIOD_STEP[currentPeriod];
+        window.currentYear = Math.floor(index / 12);
+        window.currentMonth = index % 12 + 1;
 
-        window.location.href = `/chart/${newYear}/${newMonth}/`;
+        if (currentPeriod === 'month') {
+            history.pushState(null, "", `/chart/${window.currentYear}/${window.currentMonth}/`);
+        }
+        loadData();
     }
 
+    periodSelect.addEventListener('change', () => {
+        currentPeriod = periodSelect.value;
+        loadData();
+    });
+
     prevBtn.addEventListener('click', () => changeMonth(-1));
     nextBtn.addEventListener('click', () => changeMonth(1));
 
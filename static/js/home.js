@@ -36,3 +36,112 @@ document.addEventListener("DOMContentLoaded", () => {
 
     updateMonthLabel();
 });
+
+// Infinite scroll: the page renders the first days of the month, the rest
+// are fetched from the day-group feed when the sentinel comes into view
+document.addEventListener("DOMContentLoaded", () => {
+    const container = document.getElementById("transactionsContainer");
+    const sentinel = document.getElementById("transactionsSentinel");
+    if (!container || !sentinel || !("IntersectionObserver" in window)) return;
+
+    let nextCursor = container.dataset.next;
+    let loading = false;
+    const base = container.dataset.baseCurrency;
+
+    function formatAmount(tx) {
+        const amount = `${tx.currency} ${tx.amount.toFixed(2)}`;
+        if (tx.currency === base || tx.base_amount === null) return amount;
+        return `${amount} (≈ ${base} ${tx.base_amount.toFixed(2)})`;
+    }
+
+    // Rows are built from nodes and textContent: names and icons are user input
+    function renderItem(tx) {
+        const item = document.createElement("div");
+        const transfer = tx.type === "transfer_in" || tx.type === "transfer_out";
+        const credit = tx.type === "income" || tx.type === "transfer_in";
+        item.classList.add("transaction-item");
+        item.dataset.id = tx.id;
+        item.dataset.type = tx.type;
+        item.dataset.baseAmount = tx.base_amount === null ? "" : tx.base_amount;
+
+        const category = document.createElement("span");
+        category.classList.add("category");
+        const icon = document.createElement("i");
+        icon.classList.add("icon");
+        icon.textContent = transfer ? "🔁" : tx.category_icon;
+        category.append(icon, ` ${transfer ? `Transfer ${tx.type === "transfer_in" ? "in" : "out"}` : tx.category_name}`);
+
+        const amount = document.createElement("span");
+        amount.classList.add("amount", credit ? "income" : "expense");
+        amount.textContent = `${credit ? "+" : "-"} ${formatAmount(tx)}`;
+        item.append(category, amount);
+
+        if (!transfer) {
+            const edit = document.createElement("button");
+            edit.classList.add("edit-transaction");
+            edit.dataset.id = tx.id;
+            edit.textContent = "✏️";
+            item.append(edit);
+        }
+        const del = document.createElement("button");
+        del.classList.add("delete-transaction");
+        del.dataset.id = tx.id;
+        del.textContent = "🗑️";
+        item.append(del);
+        return item;
+    }
+
+    function renderDay(day) {
+        // A day can continue from the previous page
+        let dateCard = container.querySelector(`.date-card[data-date="${CSS.escape(day.date)}"]`);
+        if (!dateCard) {
+            dateCard = document.createElement("div");
+            dateCard.classList.add("date-card");
+            dateCard.dataset.date = day.date;
+
+            const header = document.createElement("div");
+            header.classList.add("date-header");
+            const label = document.createElement("span");
+            label.classList.add("date-label");
+            label.textContent = day.date;
+            const summary = document.createElement("span");
+            summary.classList.add("summary");
+            header.append(label, summary);
+            const list = document.createElement("div");
+            list.classList.add("transaction-list");
+            dateCard.append(header, list);
+            container.appendChild(dateCard);
+        }
+        const list = dateCard.querySelector(".transaction-list");
+        day.items.forEach(tx => {
+            if (!list.querySelector(`[data-id="${CSS.escape(String(tx.id))}"]`)) list.appendChild(renderItem(tx));
+        });
+        dateCard.querySelector(".summary").textContent =
+            `Income: ${base} ${day.total_income.toFixed(2)} | Expense: ${base} ${day.total_expense.toFixed(2)}`;
+    }
+
+    function loadMore() {
+        if (loading || !nextCursor) return;
+        loading = true;
+        fetch(`${container.dataset.feedUrl}?after=${encodeURIComponent(nextCursor)}`, {
+            headers: { "X-Requested-With": "XMLHttpRequest" }
+        })
+        .then(res => res.json())
+        .then(res => {
+            if (!res.success) throw new Error(res.error);
+            res.days.forEach(renderDay);
+            nextCursor = res.next;
+            observer.unobserve(sentinel);
+            // Re-observing re-checks the sentinel in case it is still on screen
+            if (nextCursor) observer.observe(sentinel);
+        })
+        .catch(err => console.error("❌ Failed to load more transactions:", err))
+        .finally(() => { loading = false; });
+    }
+
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) loadMore();
+    }, { rootMargin: "200px" });
+
+    if (nextCursor) observer.observe(sentinel);
+});
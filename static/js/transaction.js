@@ -183,12 +183,15 @@ function deleteTransaction(txId) {
     .then(res => res.json())
     .then(res => {
         if (res.success) {
-            const txItem = document.querySelector(`.transaction-item[data-id="${txId}"]`);
-            if (txItem) {
-                const dateCard = txItem.closest(".date-card");
-                txItem.remove();
-                if (dateCard && dateCard.querySelectorAll(".transaction-item").length === 0) dateCard.remove();
-            }
+            // A transfer's other leg is deleted with it
+            [txId, res.counterpart_id].forEach(id => {
+                const txItem = id && document.querySelector(`.transaction-item[data-id="${id}"]`);
+                if (txItem) {
+                    const dateCard = txItem.closest(".date-card");
+                    txItem.remove();
+                    if (dateCard && dateCard.querySelectorAll(".transaction-item").length === 0) dateCard.remove();
+                }
+            });
 
             updateTopSummary(res);
 
@@ -216,6 +219,66 @@ function deleteTransaction(txId) {
     .catch(err => console.error("Error deleting transaction:", err));
 }
 
+// Batch create / edit / delete
+// operations: [{op: "create", amount, type, account, category, date, note},
+//              {op: "update", id, ...fields}, {op: "delete", id}]
+// One request and one set of totals / budgets for the whole batch.
+function sendTransactionBatch(operations) {
+    return fetch("/transaction/batch/", {
+        method: "POST",
+        body: JSON.stringify({ operations }),
+        headers: {
+            "Content-Type": "application/json",
+            "X-Requested-With": "XMLHttpRequest",
+            "X-CSRFToken": getCSRFToken()
+        }
+    })
+    .then(res => res.json())
+    .then(res => {
+        if (!res.success) {
+            console.error("❌ Batch rejected:", res.error);
+            return Promise.reject(res);
+        }
+
+        res.deleted.forEach(txId => {
+            const txItem = document.querySelector(`.transaction-item[data-id="${txId}"]`);
+            if (!txItem) return;
+            const dateCard = txItem.closest(".date-card");
+            txItem.remove();
+            if (dateCard && dateCard.querySelectorAll(".transaction-item").length === 0) dateCard.remove();
+        });
+        res.updated.forEach(tx => {
+            // The date may have moved, so drop the old row before re-inserting
+            const txItem = document.querySelector(`.transaction-item[data-id="${tx.id}"]`);
+            if (txItem && txItem.closest(".date-card").dataset.date !== tx.date) {
+                const dateCard = txItem.closest(".date-card");
+                txItem.remove();
+                if (dateCard.querySelectorAll(".transaction-item").length === 0) dateCard.remove();
+            }
+            updateTransactionList(tx);
+        });
+        res.created.forEach(tx => updateTransactionList(tx));
+
+        updateTopSummary(res);
+
+        // budgetsData holds the current month only
+        const now = new Date();
+        window.budgetsData = window.budgetsData || {};
+        res.budgets.forEach(budget => {
+            if (budget.year !== now.getFullYear() || budget.month !== now.getMonth() + 1) return;
+            window.budgetsData[budget.category_id] = budget;
+            window.dispatchEvent(new CustomEvent("transaction:changed", {
+                detail: {
+                    transaction: { category_id: String(budget.category_id), type: "expense" },
+                    action: "batch"
+                }
+            }));
+        });
+        return res;
+    });
+}
+window.sendTransactionBatch = sendTransactionBatch;
+
 // Close Modal
 function closeModal() {
     const modal = document.getElementById("transactionModal");
@@ -223,6 +286,16 @@ function closeModal() {
     document.body.classList.remove("modal-open");
 }
 
+// Base currency of the page's totals, rendered by the server
+function baseCurrency() {
+    const el = document.querySelector("[data-base-currency]");
+    return el ? el.dataset.baseCurrency : "";
+}
+
+function formatMoney(currency, amount) {
+    return `${currency} ${parseFloat(amount || 0).toFixed(2)}`;
+}
+
 // Update Transaction List
 function updateTransactionList(tx) {
     if (!tx || !tx.date) return;
@@ -233,19 +306,23 @@ function updateTransactionList(tx) {
     const emptyState = document.getElementById("emptyState");
     if (emptyState) emptyState.style.display = "none";
 
-    let dateCard = container.querySelector(`[data-date="${tx.date}"]`);
+    let dateCard = container.querySelector(`.date-card[data-date="${CSS.escape(tx.date)}"]`);
     if (!dateCard) {
         dateCard = document.createElement("div");
         dateCard.classList.add("date-card");
         dateCard.dataset.date = tx.date;
 
-        dateCard.innerHTML = `
-            <div class="date-header">
-                <span class="date-label">${tx.date}</span>
-                <span class="summary">Income: Rs. 0.00 | Expense: Rs. 0.00</span>
-            </div>
-            <div class="transaction-list"></div>
-        `;
+        const header = document.createElement("div");
+        header.classList.add("date-header");
+        const label = document.createElement("span");
+        label.classList.add("date-label");
+        label.textContent = tx.date;
+        const summary = document.createElement("span");
+        summary.classList.add("summary");
+        header.append(label, summary);
+        const list = document.createElement("div");
+        list.classList.add("transaction-list");
+        dateCard.append(header, list);
 
         const existingCards = Array.from(container.querySelectorAll(".date-card"));
         const inserted = existingCards.find(c => new Date(c.dataset.date) < new Date(tx.date));
@@ -262,13 +339,44 @@ function updateTransactionList(tx) {
         list.insertBefore(txItem, list.firstChild);
     }
 
-    txItem.innerHTML = `
-        <span class="category"><i class="icon">${tx.category_icon}</i> ${tx.category_name}</span>
-        <span class="amount ${tx.type}">${tx.type === "income" ? "+" : "-"} Rs. ${parseFloat(tx.amount).toFixed(2)}</span>
-        <button class="edit-transaction" data-id="${tx.id}">✏️</button>
-        <button class="delete-transaction" data-id="${tx.id}">🗑️</button>
-    `;
+    const base = baseCurrency();
+    const currency = tx.currency || base;
+    const transfer = tx.type === "transfer_in" || tx.type === "transfer_out";
+    const credit = tx.type === "income" || tx.type === "transfer_in";
+    // Rows without a rate to the base currency are left out of the day totals
+    const baseAmount = currency === base ? tx.amount : tx.base_amount;
+    txItem.dataset.type = tx.type;
+    txItem.dataset.baseAmount = baseAmount === null || baseAmount === undefined ? "" : baseAmount;
+
+    const category = document.createElement("span");
+    category.classList.add("category");
+    const icon = document.createElement("i");
+    icon.classList.add("icon");
+    icon.textContent = transfer ? "🔁" : tx.category_icon;
+    category.append(icon, ` ${transfer ? `Transfer ${tx.type === "transfer_in" ? "in" : "out"}` : tx.category_name}`);
+
+    const amount = document.createElement("span");
+    amount.classList.add("amount", credit ? "income" : "expense");
+    amount.textContent = `${credit ? "+" : "-"} ${formatMoney(currency, tx.amount)}`;
+    if (currency !== base && tx.base_amount !== null && tx.base_amount !== undefined) {
+        amount.textContent += ` (≈ ${formatMoney(base, tx.base_amount)})`;
+    }
+
+    const buttons = [];
+    if (!transfer) {
+        const edit = document.createElement("button");
+        edit.classList.add("edit-transaction");
+        edit.dataset.id = tx.id;
+        edit.textContent = "✏️";
+        buttons.push(edit);
+    }
+    const del = document.createElement("button");
+    del.classList.add("delete-transaction");
+    del.dataset.id = tx.id;
+    del.textContent = "🗑️";
+    buttons.push(del);
 
+    txItem.replaceChildren(category, amount, ...buttons);
     updateDateSummary(dateCard);
 }
 
@@ -279,27 +387,30 @@ function updateDateSummary(dateCard) {
 
     dateCard.querySelectorAll(".transaction-item").forEach(item => {
         const amtElem = item.querySelector(".amount");
-        if (!amtElem) return;
+        // Day totals are income and expense only, as on the server
+        if (!amtElem || item.dataset.type === "transfer_in" || item.dataset.type === "transfer_out") return;
 
-        const amt = parseFloat(amtElem.textContent.replace(/[^\d.]/g, "")) || 0;
+        const amt = parseFloat(item.dataset.baseAmount) || 0;
         if (amtElem.classList.contains("income")) income += amt;
         else expense += amt;
     });
 
+    const base = baseCurrency();
     const summary = dateCard.querySelector(".summary");
-    if (summary) summary.textContent = `Income: Rs. ${income.toFixed(2)} | Expense: Rs. ${expense.toFixed(2)}`;
+    if (summary) summary.textContent = `Income: ${formatMoney(base, income)} | Expense: ${formatMoney(base, expense)}`;
 }
 
 // Update Top Summary
 function updateTopSummary(data) {
+    const base = baseCurrency();
     const amounts = document.querySelectorAll(".summary-left .amount");
     if (amounts.length >= 2) {
-        amounts[0].innerText = "Rs. " + parseFloat(data.total_income || 0).toFixed(2);
-        amounts[1].innerText = "Rs. " + parseFloat(data.total_expense || 0).toFixed(2);
+        amounts[0].innerText = formatMoney(base, data.total_income);
+        amounts[1].innerText = formatMoney(base, data.total_expense);
     }
 
     const balanceElem = document.querySelector(".summary-right .balance-amount");
-    if (balanceElem) balanceElem.innerText = "Rs. " + parseFloat(data.balance || 0).toFixed(2);
+    if (balanceElem) balanceElem.innerText = formatMoney(base, data.balance);
 }
 
 // -------------------------------
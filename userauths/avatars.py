@@ -0,0 +1,162 @@
+# userauths/avatars.py
+# Avatar uploads: validated on the request, then stripped of metadata and
+# resized into WebP variants on a worker thread once the upload is committed;
+# the original is then swapped for the largest variant and deleted
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Square sizes in pixels; templates pick the smallest that fits
+AVATAR_SIZES = tuple(getattr(settings, "AVATAR_SIZES", (64, 128, 256)))
+MAX_UPLOAD_BYTES = getattr(settings, "AVATAR_MAX_UPLOAD_BYTES", 10 * 1024 * 1024)
+MAX_PIXELS = 40_000_000
+FORMATS = ("JPEG", "PNG", "WEBP", "GIF")
+QUALITY = 80
+
+_executor = ThreadPoolExecutor(max_workers=getattr(settings, "AVATAR_WORKERS", 2), thread_name_prefix="avatar")
+
+
+class AvatarError(ValueError):
+    """
+    An upload that isn't a usable image.
+    """
+
+
+def validate_avatar(upload):
+    """
+    Cheap checks before the upload is saved: size, a readable header, a
+    supported format and sane dimensions. Raises AvatarError.
+    """
+    if upload.size > MAX_UPLOAD_BYTES:
+        raise AvatarError(f"Images can be at most {MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+    try:
+        with Image.open(upload) as image:
+            image.verify()
+            fmt, (width, height) = image.format, image.size
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        raise AvatarError("That file isn't a valid image.")
+    finally:
+        upload.seek(0)
+    if fmt not in FORMATS:
+        raise AvatarError(f"Use a {', '.join(FORMATS[:-1])} or {FORMATS[-1]} image.")
+    if width * height > MAX_PIXELS:
+        raise AvatarError("That image is too large.")
+
+
+def render_variants(data, sizes=AVATAR_SIZES):
+    """
+    Square WebP renditions of the image in `data`, keyed by size. The
+    camera orientation is applied and all other metadata (EXIF, GPS, ICC)
+    dropped; nothing is upscaled.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        side = min(image.size)
+        square = ImageOps.fit(image, (side, side), Image.Resampling.LANCZOS)
+
+    variants = {}
+    for size in sizes:
+        target = min(size, side)
+        out = io.BytesIO()
+        square.resize((target, target), Image.Resampling.LANCZOS).save(out, "WEBP", quality=QUALITY, method=6)
+        variants[size] = out.getvalue()
+    return variants
+
+
+def store_variants(variants):
+    """
+    Saves each variant under a name derived from its content, so the files
+    never change and can be cached forever; identical images share files.
+    Returns {"<size>": storage name}.
+    """
+    names = {}
+    for size, data in variants.items():
+        name = f"avatars/{size}/{hashlib.sha256(data).hexdigest()[:20]}.webp"
+        if not default_storage.exists(name):
+            default_storage.save(name, ContentFile(data))
+        names[str(size)] = name
+    return names
+
+
+def _is_variant(name):
+    # store_variants names: avatars/<size>/<hash>.webp
+    parts = name.split("/")
+    return len(parts) == 3 and parts[0] == "avatars" and parts[1].isdigit()
+
+
+def record_variants(source_name, variants, user_ids):
+    """
+    Gives the users in `user_ids` still on `source_name` their variants.
+    An uploaded original is replaced by the largest variant and deleted
+    once nobody uses it, so only metadata-free copies stay in storage; the
+    shared default avatar is left alone. Returns the number of users updated.
+    """
+    from .models import User
+
+    users = User.objects.filter(pk__in=user_ids, profile_image=source_name)
+    if source_name == User._meta.get_field("profile_image").default:
+        return users.update(avatar_variants=variants)
+    largest = variants[str(max(int(size) for size in variants))]
+    updated = users.update(profile_image=largest, avatar_variants=variants)
+    if not _is_variant(source_name) and not User.objects.filter(profile_image=source_name).exists():
+        default_storage.delete(source_name)
+    return updated
+
+
+def process_avatar(user_id, source_name):
+    """
+    Builds and records the variants of `source_name`. Does nothing but
+    drop the file if the user has uploaded another image since.
+    """
+    with default_storage.open(source_name, "rb") as fh:
+        variants = store_variants(render_variants(fh.read()))
+    return variants if record_variants(source_name, variants, [user_id]) else None
+
+
+def _process_in_background(user_id, source_name):
+    try:
+        process_avatar(user_id, source_name)
+    except Exception:
+        logger.exception("Processing avatar %s for user %s failed", source_name, user_id)
+    finally:
+        # Worker threads otherwise keep their own connection open forever
+        connection.close()
+
+
+def schedule_avatar_processing(user):
+    """
+    Processes the user's current profile_image once the surrounding
+    transaction commits: on a worker thread, or inline when
+    AVATAR_PROCESS_INLINE is set (tests, management commands).
+    """
+    user_id, source_name = user.pk, user.profile_image.name
+    if getattr(settings, "AVATAR_PROCESS_INLINE", False):
+        transaction.on_commit(lambda: process_avatar(user_id, source_name))
+    else:
+        transaction.on_commit(lambda: _executor.submit(_process_in_background, user_id, source_name))
+
+
+def avatar_url(user, size):
+    """
+    URL of the smallest variant at least `size` pixels wide (or the
+    largest there is). Until an upload is processed that is the default
+    avatar: the original, metadata and all, is never linked to.
+    """
+    from .models import User
+
+    variants = getattr(user, "avatar_variants", None) or {}
+    if variants:
+        sizes = sorted(int(s) for s in variants)
+        best = next((s for s in sizes if s >= size), sizes[-1])
+        return default_storage.url(variants[str(best)])
+    return default_storage.url(User._meta.get_field("profile_image").default)
@@ -0,0 +1,46 @@
+# userauths/management/commands/process_avatars.py
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from userauths.avatars import AvatarError, record_variants, render_variants, store_variants
+from userauths.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the resized WebP variants for avatars uploaded before they existed "
+        "(or for all avatars with --force). Each distinct file is processed once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Also redo users that already have variants")
+        parser.add_argument("--user", help="Only this username")
+
+    def handle(self, *args, **options):
+        users = User.objects.exclude(profile_image="").exclude(profile_image__isnull=True)
+        if not options["force"]:
+            users = users.filter(avatar_variants={})
+        if options["user"]:
+            users = users.filter(username=options["user"])
+
+        # Most users share the default avatar; process every file only once
+        by_source = defaultdict(list)
+        for user_id, name in users.values_list("id", "profile_image").iterator():
+            by_source[name].append(user_id)
+
+        done = 0
+        for name, user_ids in by_source.items():
+            if not default_storage.exists(name):
+                self.stdout.write(self.style.WARNING(f"{name}: missing, skipped {len(user_ids)} user(s)"))
+                continue
+            try:
+                with default_storage.open(name, "rb") as fh:
+                    variants = store_variants(render_variants(fh.read()))
+            except (AvatarError, OSError, ValueError) as exc:
+                self.stdout.write(self.style.WARNING(f"{name}: {exc}"))
+                continue
+            done += record_variants(name, variants, user_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(by_source)} file(s) for {done} user(s)"))
@@ -12,6 +12,10 @@ class User(AbstractUser):
         default='avatars/default_avatar.png', 
         blank=True, 
         null=True)
+    # {"<size>": storage name} of the resized WebP copies (userauths.avatars)
+    avatar_variants = models.JSONField(default=dict, blank=True)
+    # Totals are shown in this currency; blank means FINANCE_BASE_CURRENCY
+    base_currency = models.CharField(max_length=3, blank=True, default='')
     gender = models.CharField(
         max_length=10,
         choices=[('male','Male'),('female','Female'),('other','Other')],
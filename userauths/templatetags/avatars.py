@@ -0,0 +1,15 @@
+# userauths/templatetags/avatars.py
+from django import template
+
+from userauths.avatars import avatar_url as variant_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar_url(user, size=128):
+    """
+    {% avatar_url user 200 %}: the smallest stored variant at least `size`
+    pixels wide (pass twice the CSS size for high-DPI screens).
+    """
+    return variant_url(user, int(size))
@@ -1,3 +1,91 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from .avatars import avatar_url
+from .models import User
+
+
+def jpeg_bytes(size=(800, 600)):
+    image = Image.new("RGB", size, "orange")
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"  # Make
+    out = io.BytesIO()
+    image.save(out, "JPEG", exif=exif)
+    return out.getvalue()
+
+
+class AvatarPipelineTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media, AVATAR_PROCESS_INLINE=True)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username="bee", email="bee@example.com", password="pass12345")
+        self.client.force_login(self.user)
+
+    def upload(self, name, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/user/profile/", {"update_avatar": "1", "avatar": SimpleUploadedFile(name, data)}, follow=True
+            )
+
+    def test_upload_is_resized_to_stripped_webp_variants(self):
+        self.upload("phone.jpg", jpeg_bytes())
+        self.user.refresh_from_db()
+
+        # The original, EXIF and all, is replaced by the largest variant
+        self.assertEqual(self.user.profile_image.name, self.user.avatar_variants["256"])
+        self.assertEqual(default_storage.listdir("avatars")[1], [])
+
+        self.assertEqual(sorted(self.user.avatar_variants), ["128", "256", "64"])
+        for size, name in self.user.avatar_variants.items():
+            with default_storage.open(name, "rb") as fh, Image.open(fh) as image:
+                self.assertEqual((image.format, image.size), ("WEBP", (int(size), int(size))))
+                self.assertEqual(len(image.getexif()), 0)
+        self.assertEqual(avatar_url(self.user, 100), "/media/" + self.user.avatar_variants["128"])
+        self.assertEqual(avatar_url(self.user, 500), "/media/" + self.user.avatar_variants["256"])
+
+        # Same picture again: same content-hash names, no new files
+        before = self.user.avatar_variants
+        self.upload("again.jpg", jpeg_bytes())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_variants, before)
+
+    def test_invalid_upload_is_rejected(self):
+        response = self.upload("notes.jpg", b"not an image")
+        self.assertContains(response, "isn&#x27;t a valid image")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.profile_image.name, "avatars/default_avatar.png")
+        self.assertEqual(self.user.avatar_variants, {})
+
+    def test_unprocessed_upload_is_not_linked(self):
+        User.objects.filter(pk=self.user.pk).update(profile_image="avatars/phone.jpg")
+        self.user.refresh_from_db()
+        self.assertEqual(avatar_url(self.user, 64), "/media/avatars/default_avatar.png")
+
+    def test_backfill_processes_each_file_once(self):
+        name = default_storage.save("avatars/old.jpg", ContentFile(jpeg_bytes((200, 200))))
+        other = User.objects.create_user(username="wasp", email="wasp@example.com", password="pass12345")
+        User.objects.filter(pk__in=[self.user.pk, other.pk]).update(profile_image=name)
+
+        out = StringIO()
+        call_command("process_avatars", stdout=out)
+        self.assertIn("Processed 1 file(s) for 2 user(s)", out.getvalue())
+        self.user.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.user.avatar_variants, other.avatar_variants)
+        self.assertEqual(other.profile_image.name, other.avatar_variants["256"])
+        self.assertFalse(default_storage.exists(name))
+        with default_storage.open(self.user.avatar_variants["256"], "rb") as fh, Image.open(fh) as image:
+            # Never upscaled
+            self.assertEqual(image.size, (200, 200))
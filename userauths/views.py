@@ -3,8 +3,11 @@ from django.shortcuts import render, redirect
 from userauths.forms import UserRegistrationForm
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
 from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from userauths.avatars import AvatarError, schedule_avatar_processing, validate_avatar
 from userauths.models import User
-from finance.models import Customer
+from finance.models import Customer, currency_code_validator
 
 # Profile & Password Management
 from django.contrib.auth.decorators import login_required
@@ -22,12 +25,14 @@ def register_view(request):
     if request.method == 'POST':
         form = UserRegistrationForm(request.POST)
         if form.is_valid():
-            new_user = form.save()
-            Customer.objects.create(
-                user=new_user, 
-                name=new_user.username, 
-                email=new_user.email
-            )
+            # User, customer and default categories/accounts commit together
+            with transaction.atomic():
+                new_user = form.save()
+                Customer.objects.create(
+                    user=new_user,
+                    name=new_user.username,
+                    email=new_user.email
+                )
             auth_login(request, new_user)
             return redirect('userauths:login')
         else:
@@ -69,6 +74,7 @@ def logout_view(request):
 @login_required
 def profile_view(request):
     user = request.user
+    form = PasswordChangeForm(user)
 
     if request.method == "POST":
         # Update username
@@ -79,11 +85,31 @@ def profile_view(request):
                 user.save()
                 messages.success(request, "Username updated successfully.")
 
-        # Update avatar
-        if "update_avatar" in request.FILES:
-            user.profile_image = request.FILES["avatar"]
-            user.save()
-            messages.success(request, "Avatar updated successfully.")
+        # Update the currency totals are shown in; blank = site default
+        if "update_currency" in request.POST:
+            code = request.POST.get("base_currency", "").strip().upper()
+            try:
+                if code:
+                    currency_code_validator(code)
+            except ValidationError as exc:
+                messages.error(request, exc.messages[0])
+            else:
+                user.base_currency = code
+                user.save(update_fields=["base_currency"])
+                messages.success(request, "Currency updated successfully.")
+
+        # Update avatar; the resized copies are made off the request thread
+        if "update_avatar" in request.POST and request.FILES.get("avatar"):
+            try:
+                validate_avatar(request.FILES["avatar"])
+            except AvatarError as exc:
+                messages.error(request, str(exc))
+            else:
+                user.profile_image = request.FILES["avatar"]
+                user.avatar_variants = {}
+                user.save()
+                schedule_avatar_processing(user)
+                messages.success(request, "Avatar updated successfully.")
 
         # Change password
         if "change_password" in request.POST:
@@ -94,8 +120,6 @@ def profile_view(request):
                 messages.success(request, "Password changed successfully.")
             else:
                 messages.error(request, "Please correct the errors below.")
-    else:
-        form = PasswordChangeForm(user)
 
     return render(request, "userauths/profile.html", {"form": form})
 